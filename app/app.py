@@ -1,15 +1,14 @@
+import importlib
+
 import reflex as rx
 import reflex_enterprise as rxe
-from app.components.sidebar import sidebar
-from app.pages.upload import upload_page
-from app.pages.explore import explore_page
-from app.pages.analysis import analysis_page
-from app.pages.results import results_page
-from app.pages.admin import admin_page
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
 
-
-def index() -> rx.Component:
-    return upload_page()
+from app import metrics, profiling
+from app.components.sidebar import sidebar
 
 
 def base_layout(child_page: rx.Component) -> rx.Component:
@@ -20,6 +19,36 @@ def base_layout(child_page: rx.Component) -> rx.Component:
     )
 
 
+def lazy_page(module: str, name: str):
+    """Import a page module only when the page is evaluated, which a
+    backend-only worker with compiled pages skips."""
+
+    def page() -> rx.Component:
+        page_fn = getattr(importlib.import_module(f"app.pages.{module}"), name)
+        return base_layout(page_fn())
+
+    return page
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+async def profile_endpoint(request: Request) -> PlainTextResponse:
+    collapsed = profiling.read_profile(request.path_params["name"])
+    if collapsed is None:
+        return PlainTextResponse("Profile not found.", status_code=404)
+    return PlainTextResponse(collapsed)
+
+
+api = Starlette(
+    routes=[
+        Route("/metrics", metrics_endpoint),
+        Route("/profiles/{name}", profile_endpoint),
+    ]
+)
 app = rxe.App(
     theme=rx.theme(appearance="light", accent_color="green", radius="large"),
     head_components=[
@@ -30,9 +59,12 @@ app = rxe.App(
             rel="stylesheet",
         ),
     ],
+    api_transformer=api,
 )
-app.add_page(lambda: base_layout(index()), route="/")
-app.add_page(lambda: base_layout(explore_page()), route="/explore")
-app.add_page(lambda: base_layout(analysis_page()), route="/analysis")
-app.add_page(lambda: base_layout(results_page()), route="/results")
-app.add_page(lambda: base_layout(admin_page()), route="/admin")
\ No newline at end of file
+app.add_middleware(profiling.PayloadProfiler())
+app.add_middleware(profiling.EventProfiler())
+app.add_page(lazy_page("upload", "upload_page"), route="/")
+app.add_page(lazy_page("explore", "explore_page"), route="/explore")
+app.add_page(lazy_page("analysis", "analysis_page"), route="/analysis")
+app.add_page(lazy_page("results", "results_page"), route="/results")
+app.add_page(lazy_page("admin", "admin_page"), route="/admin")
\ No newline at end of file
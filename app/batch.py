@@ -0,0 +1,263 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import numpy as np
+
+from app import dataset_cache, ingest, metrics, results_cache, scheduler
+from app.pvgis_analyzer import AnalyzerError, ResultSet, analyze_base, cache_key
+
+PARAMETERS = ("tilt", "azimuth", "pv_kwp", "losses")
+
+
+def load_params(path: str) -> dict:
+    with open(path) as f:
+        params = json.load(f)
+    missing = [name for name in PARAMETERS if name not in params]
+    if missing:
+        raise ValueError(f"{path} is missing {', '.join(missing)}.")
+    return {
+        **{name: float(params[name]) for name in PARAMETERS},
+        "aoi": ingest.parse_aoi(params.get("aoi", "")),
+        "columns": ingest.parse_columns(params.get("columns", "")),
+    }
+
+
+def load_dataset(executor, path: str, params: dict) -> dict:
+    """Dataset artifacts from the cache, or ingested with one pool task per
+    layer part exactly as an upload is."""
+    filename = os.path.basename(path)
+    digest = dataset_cache.dataset_key(
+        [dataset_cache.hash_file(path)], params["aoi"], params["columns"]
+    )
+    claim = dataset_cache.claim(digest)
+    try:
+        artifacts = dataset_cache.load(digest)
+        if artifacts is not None:
+            return artifacts
+        layers = ingest.plan_parts([(filename, path, digest)], params["aoi"])
+        futures = [
+            executor.submit(
+                ingest.process_part, i, *layer, params["aoi"], params["columns"]
+            )
+            for i, layer in enumerate(layers)
+        ]
+        parts = []
+        for future in futures:
+            part, worker_metrics = future.result()
+            metrics.merge(worker_metrics)
+            parts.append(part)
+        artifacts = ingest.merge_parts(parts, filename)
+        dataset_cache.store(digest, artifacts)
+        return artifacts
+    finally:
+        dataset_cache.release(claim)
+
+
+def analyze_shard(
+    building_ids: np.ndarray, points: np.ndarray, params: dict, threads: int
+) -> tuple[np.ndarray, list[dict | None], int, list[str]]:
+    """Base results of one shard; runs in a worker process. Cached locations
+    come from the results cache, the rest are analyzed on `threads` threads
+    since analyzer calls wait on the network. Returns the ids, base results
+    (None on failure), the number of cache hits and the error messages."""
+    keys = [
+        cache_key(lat, lon, params["tilt"], params["azimuth"])
+        for lat, lon in points.tolist()
+    ]
+    cached = results_cache.get_many(keys)
+    bases = [cached.get(key) for key in keys]
+    missing = [i for i, base in enumerate(bases) if base is None]
+    errors = []
+
+    def run(i: int):
+        lat, lon = points[i].tolist()
+        try:
+            base = analyze_base(lat, lon, params["tilt"], params["azimuth"])
+        except (AnalyzerError, OSError) as e:
+            errors.append(f"building {building_ids[i]}: {e}")
+            return
+        bases[i] = base
+        results_cache.put(keys[i], base)
+
+    if missing:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(run, missing))
+    results_cache.flush()
+    return building_ids, bases, len(cached), errors
+
+
+class ParquetSink:
+    """Results as GeoParquet (WKB geometry in EPSG:4326), one row group per
+    shard as it completes, so memory stays bounded by the shard size."""
+
+    def __init__(self, path: str, geometry: np.ndarray):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Writing GeoParquet requires pyarrow.") from e
+        self.pa = pa
+        self.geometry = geometry
+        geo = {
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {
+                "geometry": {
+                    "encoding": "WKB",
+                    "geometry_types": ["Polygon", "MultiPolygon"],
+                }
+            },
+        }
+        self.schema = pa.schema(
+            [
+                ("building_id", pa.int64()),
+                ("pv_potential_kwh", pa.float64()),
+                ("yield_kwh_per_kwp", pa.float64()),
+                ("confidence", pa.float64()),
+                ("monthly_kwh", pa.list_(pa.float64())),
+                ("geometry", pa.binary()),
+            ],
+            metadata={"geo": json.dumps(geo)},
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, results: ResultSet):
+        import shapely
+
+        ids, _ = results.arrays()
+        n = len(ids)
+        scale = results.pv_kwp * (1 - results.losses / 100)
+        monthly = np.round(results.base_monthly[:n] * scale, 2)
+        batch = self.pa.record_batch(
+            [
+                self.pa.array(ids),
+                self.pa.array(results.energy[:n]),
+                self.pa.array(results.yields[:n]),
+                self.pa.array(results.confidence[:n]),
+                self.pa.array(list(monthly)),
+                self.pa.array(shapely.to_wkb(self.geometry[ids])),
+            ],
+            schema=self.schema,
+        )
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+
+
+def run(args) -> dict:
+    """Ingest `args.dataset` through the dataset cache, analyze it in shards
+    across `args.workers` processes through the shared results cache and stream
+    the results to `args.output`. Returns throughput statistics."""
+    params = load_params(args.params)
+    context = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, mp_context=context) as executor:
+        artifacts = load_dataset(executor, args.dataset, params)
+        centroids = np.asarray(artifacts["centroids"])
+        building_ids = np.flatnonzero(~np.isnan(centroids[:, 0]))
+        # Shards follow a Z-order curve so each worker gets neighbouring buildings.
+        building_ids = building_ids[
+            np.argsort(scheduler.morton_order(centroids)[building_ids], kind="stable")
+        ]
+        shards = [
+            building_ids[start : start + args.shard_size]
+            for start in range(0, len(building_ids), args.shard_size)
+        ]
+        ingested = time.perf_counter()
+        print(
+            f"{len(centroids):,} buildings loaded in {ingested - started:.1f}s, "
+            f"{len(shards)} shards on {args.workers} workers",
+            file=sys.stderr,
+        )
+        sink = ParquetSink(args.output, artifacts["geometry"])
+        totals = {"written": 0, "cached": 0, "failed": 0}
+
+        def collect(futures):
+            for future in futures:
+                for name, count in write_shard(sink, future.result(), params).items():
+                    totals[name] += count
+            report(totals["written"], len(building_ids), ingested)
+
+        try:
+            # A bounded number of shards in flight, so results stream out and
+            # memory stays flat however large the dataset.
+            pending = set()
+            for shard in shards:
+                pending.add(
+                    executor.submit(
+                        analyze_shard, shard, centroids[shard], params, args.threads
+                    )
+                )
+                if len(pending) >= 2 * args.workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        finally:
+            sink.close()
+    elapsed = time.perf_counter() - ingested
+    return {
+        "buildings": len(building_ids),
+        **totals,
+        "analyzed": totals["written"] - totals["cached"],
+        "ingest_s": round(ingested - started, 2),
+        "analysis_s": round(elapsed, 2),
+        "buildings_per_s": round(totals["written"] / elapsed, 1) if elapsed else None,
+        "workers": args.workers,
+        "threads_per_worker": args.threads,
+    }
+
+
+def write_shard(sink: ParquetSink, result, params: dict) -> dict[str, int]:
+    building_ids, bases, cached, errors = result
+    for error in errors[:5]:
+        print(f"failed: {error}", file=sys.stderr)
+    results = ResultSet(params["pv_kwp"], params["losses"])
+    for building_id, base in zip(building_ids.tolist(), bases):
+        if base is not None:
+            results.add(building_id, base)
+    sink.write(results)
+    return {"written": len(results), "cached": cached, "failed": len(errors)}
+
+
+def report(done: int, total: int, since: float):
+    elapsed = time.perf_counter() - since
+    rate = done / elapsed if elapsed else 0.0
+    print(f"{done:,}/{total:,} buildings, {rate:,.1f}/s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Whole-dataset PV analysis without the app.",
+        epilog="The parameter file may also set the upload page's aoi and columns.",
+    )
+    parser.add_argument("dataset", help=f"one of {', '.join(ingest.UPLOAD_EXTENSIONS)}")
+    parser.add_argument("params", help="JSON file with tilt, azimuth, pv_kwp, losses")
+    parser.add_argument("--output", default="pv_results.parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="concurrent analyzer calls per worker"
+    )
+    parser.add_argument("--shard-size", type=int, default=500)
+    args = parser.parse_args()
+    try:
+        stats = run(args)
+    except (ingest.IngestError, ValueError, RuntimeError, OSError) as e:
+        sys.exit(f"error: {e}")
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
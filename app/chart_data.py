@@ -0,0 +1,106 @@
+import numpy as np
+
+
+def yield_arrays(results) -> tuple[np.ndarray, np.ndarray]:
+    """Building ids and specific yields of a `pvgis_analyzer.ResultSet`."""
+    return results.arrays()
+
+
+def histogram_bins(values: np.ndarray, bin_count: int) -> list[dict]:
+    if values.size == 0:
+        return []
+    counts, edges = np.histogram(values, bins=max(1, bin_count))
+    return [
+        {
+            "index": i,
+            "start": round(float(edges[i]), 2),
+            "end": round(float(edges[i + 1]), 2),
+            "count": int(counts[i]),
+            "label": f"{edges[i]:.0f}-{edges[i + 1]:.0f}",
+        }
+        for i in range(len(counts))
+    ]
+
+
+def box_stats(values: np.ndarray) -> dict | None:
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        "count": int(values.size),
+        "min": round(float(values.min()), 2),
+        "q1": round(float(q1), 2),
+        "median": round(float(median), 2),
+        "q3": round(float(q3), 2),
+        "max": round(float(values.max()), 2),
+        "lower_whisker": round(float(inside.min()), 2),
+        "upper_whisker": round(float(inside.max()), 2),
+        "outlier_count": int(values.size - inside.size),
+    }
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; x must be sorted."""
+    n = x.size
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_scatter(
+    ids: np.ndarray, values: np.ndarray, max_points: int
+) -> list[dict]:
+    order = np.argsort(ids, kind="stable")
+    ids, values = ids[order], values[order]
+    keep = lttb_indices(ids.astype(np.float64), values, max_points)
+    return [
+        {"index": i, "building_id": int(ids[k]), "y": round(float(values[k]), 2)}
+        for i, k in enumerate(keep)
+    ]
+
+
+class ValueIndex:
+    """Building ids ordered by value so chart bins resolve by binary search."""
+
+    def __init__(self, ids: np.ndarray, values: np.ndarray):
+        order = np.argsort(values, kind="stable")
+        self.ids = ids[order]
+        self.values = values[order]
+
+    def _between(self, start: float, end: float, include_end: bool) -> tuple[int, int]:
+        lo = np.searchsorted(self.values, start, side="left")
+        hi = np.searchsorted(self.values, end, side="right" if include_end else "left")
+        return int(lo), int(hi)
+
+    def ids_in_bin(
+        self, bin_index: int, bin_count: int, limit: int | None = None
+    ) -> tuple[int, list[int]]:
+        """Number of buildings in a histogram bin and the first `limit` ids."""
+        edges = np.histogram_bin_edges(self.values, bins=max(1, bin_count))
+        if not 0 <= bin_index < len(edges) - 1:
+            return 0, []
+        lo, hi = self._between(
+            edges[bin_index], edges[bin_index + 1], bin_index == len(edges) - 2
+        )
+        end = hi if limit is None else min(hi, lo + limit)
+        return hi - lo, self.ids[lo:end].tolist()
\ No newline at end of file
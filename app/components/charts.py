@@ -0,0 +1,20 @@
+from typing import Any
+
+import reflex as rx
+from reflex.components.recharts import cartesian
+
+
+def _item_index(data: rx.Var[dict[str, Any]], index: rx.Var[int]) -> tuple[rx.Var[int]]:
+    return (index,)
+
+
+class Bar(cartesian.Bar):
+    on_click: rx.EventHandler[_item_index]
+
+
+class Scatter(cartesian.Scatter):
+    on_click: rx.EventHandler[_item_index]
+
+
+indexed_bar = Bar.create
+indexed_scatter = Scatter.create
\ No newline at end of file
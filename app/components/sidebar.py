@@ -1,5 +1,6 @@
 import reflex as rx
-from app.state import AppState, SidebarState
+
+from app.state import SidebarState
 
 
 def nav_item(text: str, href: str, icon: str, is_active: rx.Var[bool]) -> rx.Component:
@@ -0,0 +1,64 @@
+from collections.abc import Callable
+from typing import TypedDict
+
+import reflex as rx
+from reflex.components.el.elements.typography import Div
+
+ROW_HEIGHT = 40
+BLOCK_ROWS = 50
+WINDOW_ROWS = 3 * BLOCK_ROWS
+
+
+class _ScrollTarget(TypedDict):
+    scrollTop: float
+
+
+class _ScrollEvent(TypedDict):
+    target: _ScrollTarget
+
+
+def _scroll_top(e: rx.Var[_ScrollEvent]) -> tuple[rx.Var[float]]:
+    return (e.target.scrollTop,)
+
+
+class ScrollArea(Div):
+    on_scroll: rx.EventHandler[_scroll_top]
+
+
+def window_offset(scroll_top: float) -> int:
+    """First row of the fetched window: one block before the visible block."""
+    block = int(scroll_top) // ROW_HEIGHT // BLOCK_ROWS
+    return max(block - 1, 0) * BLOCK_ROWS
+
+
+def virtual_table(
+    header: rx.Component,
+    rows: rx.Var,
+    render_row: Callable[[rx.Var], rx.Component],
+    total_rows: rx.Var,
+    offset: rx.Var,
+    on_scroll: rx.EventHandler,
+    **props,
+) -> rx.Component:
+    """Table whose body only holds the fetched window of `rows`; spacer rows keep
+    the scrollbar sized for `total_rows`, and scrolling asks the server for the
+    window around the visible block."""
+    return ScrollArea.create(
+        rx.el.table(
+            rx.el.thead(header, class_name="sticky top-0 z-10"),
+            rx.el.tbody(
+                rx.el.tr(style={"height": f"{offset * ROW_HEIGHT}px"}),
+                rx.foreach(rows, render_row),
+                rx.el.tr(
+                    style={
+                        "height": f"{(total_rows - offset - rows.length()) * ROW_HEIGHT}px"
+                    }
+                ),
+                class_name="bg-white divide-y divide-gray-200",
+            ),
+            class_name="min-w-full divide-y divide-gray-200",
+        ),
+        on_scroll=on_scroll.throttle(100),
+        class_name="overflow-auto max-h-[480px]",
+        **props,
+    )
\ No newline at end of file
@@ -0,0 +1,228 @@
+import asyncio
+import fcntl
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from app.table import SearchIndex
+
+logger = logging.getLogger(__name__)
+# Attributes are stored as Arrow IPC, so the cache needs pyarrow.
+ENABLED = (
+    os.environ.get("PVGIS_DATASET_CACHE", "1") != "0"
+    and importlib.util.find_spec("pyarrow") is not None
+)
+CACHE_DIR = os.environ.get("PVGIS_DATASET_CACHE_DIR", "dataset_cache")
+MAX_BYTES = int(os.environ.get("PVGIS_DATASET_CACHE_MB", "1024")) * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+CLAIM_POLL_S = 0.1
+# Part of every key; bump when the entry layout or the artifacts change.
+CACHE_VERSION = 3
+
+
+async def spool_hashed(file) -> tuple[str, str]:
+    """Copy an upload to a temporary file in chunks, hashing it as it streams
+    in. The caller removes the file."""
+    digest = hashlib.sha256()
+    suffix = os.path.splitext(file.name)[1].lower()
+    fd, path = tempfile.mkstemp(prefix="pvgis-upload-", suffix=suffix)
+    with os.fdopen(fd, "wb") as out:
+        while chunk := await file.read(CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+    return path, digest.hexdigest()
+
+
+def combined_digest(digests: list[str]) -> str:
+    """Cache key of several uploads, in the order their layers are merged, plus
+    any read options that change the result."""
+    if len(digests) == 1:
+        return digests[0]
+    return hashlib.sha256("\n".join(digests).encode()).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataset_key(digests: list[str], aoi=None, columns: list[str] | None = None) -> str:
+    keys = [*digests, f"version:{CACHE_VERSION}"]
+    if aoi is not None:
+        keys.append(f"aoi:{aoi.wkt}")
+    if columns is not None:
+        keys.append(f"columns:{','.join(columns)}")
+    return combined_digest(keys)
+
+
+def _entry(digest: str) -> str:
+    return os.path.join(CACHE_DIR, digest)
+
+
+def store(digest: str, artifacts: dict):
+    """Write artifacts for one upload.
+
+    Entries are content-addressed and immutable, so any number of worker
+    processes can share CACHE_DIR: an entry appears atomically by rename and
+    readers memory-map it without locks.
+
+    Geometry is a flat WKB buffer plus offsets and, like the centroids and the
+    search-index postings, is a plain .npy array that `load` memory-maps.
+    Attributes are an uncompressed Arrow IPC file, also memory-mapped; the
+    summary is JSON. Map features are built from the geometry when needed.
+    """
+    if not ENABLED or os.path.isdir(_entry(digest)):
+        return
+    import shapely
+    from pyarrow import feather
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=CACHE_DIR)
+    try:
+        wkb = shapely.to_wkb(artifacts["geometry"])
+        lengths = np.fromiter((len(g) for g in wkb), dtype=np.int64, count=len(wkb))
+        np.save(os.path.join(tmp, "geometry_offsets.npy"), np.cumsum(lengths) - lengths)
+        np.save(
+            os.path.join(tmp, "geometry_wkb.npy"),
+            np.frombuffer(b"".join(wkb), dtype=np.uint8),
+        )
+        np.save(os.path.join(tmp, "centroids.npy"), artifacts["centroids"])
+        np.save(os.path.join(tmp, "issues.npy"), artifacts["issues"])
+        search = artifacts["search"]
+        np.save(os.path.join(tmp, "search_indptr.npy"), search.indptr)
+        np.save(os.path.join(tmp, "search_rows.npy"), search.rows)
+        with open(os.path.join(tmp, "search_vocab.json"), "w") as f:
+            json.dump(search.vocab.tolist(), f)
+        feather.write_feather(
+            artifacts["attributes"],
+            os.path.join(tmp, "attributes.arrow"),
+            compression="uncompressed",
+        )
+        with open(os.path.join(tmp, "summary.json"), "w") as f:
+            json.dump(artifacts["summary"], f)
+        os.replace(tmp, _entry(digest))
+    except (OSError, ValueError, TypeError):
+        # Arrow raises ValueError or TypeError for columns it cannot convert.
+        shutil.rmtree(tmp, ignore_errors=True)
+        if os.path.isdir(_entry(digest)):
+            # Another worker stored the same content first.
+            return
+        logger.exception(f"Could not store dataset cache entry {digest}")
+        return
+    evict()
+
+
+def _lock(digest: str, blocking: bool) -> int | None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd = os.open(os.path.join(CACHE_DIR, f".lock-{digest}"), os.O_CREAT | os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def claim(digest: str) -> int | None:
+    """Block until this process is the only one building `digest`, so workers
+    sharing CACHE_DIR process each upload once. Returns a handle for
+    `release`, or None when the cache is disabled."""
+    if not ENABLED:
+        return None
+    return _lock(digest, blocking=True)
+
+
+async def claim_async(digest: str) -> int | None:
+    """`claim` for the event loop. Polls without blocking so waiting uploads
+    hold no executor thread; the holder needs those threads to finish."""
+    if not ENABLED:
+        return None
+    while (fd := _lock(digest, blocking=False)) is None:
+        await asyncio.sleep(CLAIM_POLL_S)
+    return fd
+
+
+def release(handle: int | None):
+    if handle is not None:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+        os.close(handle)
+
+
+def load(digest: str) -> dict | None:
+    if not ENABLED:
+        return None
+    path = _entry(digest)
+    if not os.path.isdir(path):
+        return None
+    import shapely
+    from pyarrow import feather
+
+    try:
+        offsets = np.load(os.path.join(path, "geometry_offsets.npy"))
+        wkb = np.load(os.path.join(path, "geometry_wkb.npy"), mmap_mode="r")
+        ends = np.append(offsets[1:], len(wkb))
+        geometry = shapely.from_wkb(
+            [wkb[start:end].tobytes() for start, end in zip(offsets, ends)]
+        )
+        with open(os.path.join(path, "search_vocab.json")) as f:
+            vocab = np.array(json.load(f), dtype=object)
+        with open(os.path.join(path, "summary.json")) as f:
+            summary = json.load(f)
+        summary["bounds"] = tuple(summary["bounds"])
+        attributes = feather.read_table(
+            os.path.join(path, "attributes.arrow"), memory_map=True
+        ).to_pandas()
+        artifacts = {
+            "geometry": geometry,
+            "attributes": attributes,
+            "centroids": np.load(os.path.join(path, "centroids.npy"), mmap_mode="r"),
+            "issues": np.load(os.path.join(path, "issues.npy"), mmap_mode="r"),
+            "search": SearchIndex(
+                vocab,
+                np.load(os.path.join(path, "search_indptr.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, "search_rows.npy"), mmap_mode="r"),
+                len(geometry),
+            ),
+            "summary": summary,
+        }
+    except (OSError, ValueError):
+        logger.exception(f"Discarding unreadable dataset cache entry {digest}")
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+    os.utime(path)
+    return artifacts
+
+
+def _size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def evict(max_bytes: int | None = None):
+    """Drop least recently used entries until the store fits in `max_bytes`."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if not name.startswith(".") and os.path.isdir(path):
+            entries.append((os.path.getmtime(path), _size(path), path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        # Lock files stay: a claim may hold or be waiting on one, and a new
+        # file for the same digest would let a second builder in.
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
\ No newline at end of file
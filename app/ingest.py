@@ -0,0 +1,492 @@
+import os
+import zipfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from app import metrics, projection, validation
+from app.spatial import SpatialIndex
+from app.table import SearchIndex, SortIndex, TableIndex
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+REQUIRED_EXTENSIONS = {".shp", ".shx", ".dbf", ".prj"}
+UPLOAD_EXTENSIONS = (".zip", ".gpkg", ".fgb", ".parquet", ".geoparquet")
+PARQUET_EXTENSIONS = (".parquet", ".geoparquet")
+CHUNK_ROWS = int(os.environ.get("PVGIS_INGEST_CHUNK_ROWS", "100000"))
+REPORT_ROWS = 100
+
+
+class IngestError(ValueError):
+    """Raised for uploads that are readable but not a usable dataset."""
+
+
+class UploadCancelled(Exception):
+    """Raised in a worker at the next stage boundary after a cancel request."""
+
+
+def parse_aoi(text: str):
+    """Area of interest in WGS84, as `min_lon, min_lat, max_lon, max_lat` or a
+    WKT (multi)polygon; None when blank."""
+    import shapely
+
+    text = text.strip()
+    if not text:
+        return None
+    parts = text.split(",")
+    if len(parts) == 4:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(p) for p in parts)
+        except ValueError:
+            raise IngestError("Area of interest bounds must be four numbers.")
+        if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise IngestError(
+                "Area of interest must be min_lon, min_lat, max_lon, max_lat in degrees."
+            )
+        return shapely.box(min_lon, min_lat, max_lon, max_lat)
+    try:
+        shape = shapely.from_wkt(text)
+    except shapely.errors.GEOSException:
+        raise IngestError("Area of interest is neither bounds nor valid WKT.")
+    if shape.geom_type not in ("Polygon", "MultiPolygon") or shape.is_empty:
+        raise IngestError("Area of interest must be a Polygon or MultiPolygon.")
+    return shapely.make_valid(shape)
+
+
+def parse_columns(text: str) -> list[str] | None:
+    columns = [c.strip() for c in text.split(",") if c.strip()]
+    return columns or None
+
+
+def _extension(name: str) -> str:
+    return os.path.splitext(name)[1].lower()
+
+
+def list_layers(filename: str, path: str) -> list[str]:
+    """Layers to read from one upload: every shapefile inside a ZIP (each with
+    its companion files), every geometry layer of a GeoPackage, and "" for the
+    single layer of FlatGeobuf and GeoParquet files."""
+    ext = _extension(filename)
+    if ext == ".gpkg":
+        import pyogrio
+
+        layers = [name for name, geometry in pyogrio.list_layers(path) if geometry]
+        if not layers:
+            raise IngestError(f"{filename} has no layers with geometry.")
+        return layers
+    if ext != ".zip":
+        return [""]
+    with metrics.span("upload.zip_scan"), zipfile.ZipFile(path) as zf:
+        names = [n for n in zf.namelist() if not n.startswith("__MACOSX/")]
+    found_ext: dict[str, set[str]] = {}
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        found_ext.setdefault(stem, set()).add(ext.lower())
+    layers = sorted(n for n in names if n.lower().endswith(".shp"))
+    if not layers:
+        missing = REQUIRED_EXTENSIONS - set().union(*found_ext.values())
+        raise IngestError(
+            f"{filename} is missing required files: {', '.join(sorted(missing))}"
+        )
+    for layer in layers:
+        missing = REQUIRED_EXTENSIONS - found_ext[os.path.splitext(layer)[0]]
+        if missing:
+            raise IngestError(
+                f"{filename}: {layer} is missing required files: {', '.join(sorted(missing))}"
+            )
+    return layers
+
+
+def _check_columns(available, columns: list[str] | None):
+    unknown = [c for c in columns or [] if c not in set(available)]
+    if unknown:
+        raise IngestError(f"Unknown columns: {', '.join(unknown)}")
+
+
+def _read_parquet(path: str, mask, columns: list[str] | None) -> "gpd.GeoDataFrame":
+    import json
+
+    import geopandas as gpd
+
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise IngestError("GeoParquet uploads need pyarrow installed on the server.")
+    schema = pq.read_schema(path)
+    if b"geo" not in (schema.metadata or {}):
+        raise IngestError("Parquet file has no GeoParquet metadata.")
+    _check_columns(schema.names, columns)
+    geo = json.loads(schema.metadata[b"geo"])
+    primary = geo["primary_column"]
+    if columns is not None:
+        columns = [*columns, primary]
+    if mask is None:
+        return gpd.read_parquet(path, columns=columns)
+    # Row groups are only skipped when the file has a bbox covering column.
+    crs = geo["columns"][primary].get("crs", "OGC:CRS84")
+    if geo["columns"][primary].get("covering"):
+        bbox = tuple(mask.to_crs(crs).total_bounds)
+        gdf = gpd.read_parquet(path, columns=columns, bbox=bbox)
+    else:
+        gdf = gpd.read_parquet(path, columns=columns)
+    return gdf[gdf.intersects(mask.to_crs(gdf.crs).iloc[0])]
+
+
+def _source(path: str, layer: str) -> tuple[str, str | None]:
+    """GDAL path and layer name of one layer of a spooled upload."""
+    if _extension(path) == ".zip":
+        return f"zip://{os.path.abspath(path)}!{layer}", None
+    return path, layer if _extension(path) == ".gpkg" else None
+
+
+def split_layer(path: str, layer: str, aoi=None) -> list[slice | None]:
+    """Row ranges of at most CHUNK_ROWS for reading a big layer as several
+    pool tasks; None reads the whole layer. AOI reads are not split, their
+    row count is only known after filtering."""
+    if aoi is not None or _extension(path) in PARQUET_EXTENSIONS:
+        return [None]
+    import pyogrio
+
+    count = pyogrio.read_info(*_source(path, layer))["features"]
+    if count <= CHUNK_ROWS:
+        return [None]
+    return [
+        slice(start, min(start + CHUNK_ROWS, count))
+        for start in range(0, count, CHUNK_ROWS)
+    ]
+
+
+def plan_parts(
+    uploads: list[tuple[str, str, str]], aoi=None
+) -> list[tuple[str, str, str, slice | None]]:
+    """(filename, path, layer, rows) of every pool task for a set of uploads."""
+    return [
+        (filename, path, layer, rows)
+        for filename, path, _ in uploads
+        for layer in list_layers(filename, path)
+        for rows in split_layer(path, layer, aoi)
+    ]
+
+
+def part_name(filename: str, layer: str) -> str:
+    return f"{filename}/{layer}" if layer else filename
+
+
+def read_layer(
+    path: str,
+    layer: str,
+    aoi=None,
+    columns: list[str] | None = None,
+    rows: slice | None = None,
+) -> "gpd.GeoDataFrame":
+    """Read one layer, or the `rows` range of it, keeping only features
+    intersecting `aoi` (WGS84) and only `columns` when given. GeoPackage and
+    FlatGeobuf answer the AOI from their spatial index."""
+    import geopandas as gpd
+    import pyogrio
+
+    mask = None if aoi is None else gpd.GeoSeries([aoi], crs="EPSG:4326")
+    with metrics.span("upload.read_file"):
+        if _extension(path) in PARQUET_EXTENSIONS:
+            return _read_parquet(path, mask, columns)
+        source, layer = _source(path, layer)
+        if columns is not None:
+            _check_columns(pyogrio.read_info(source, layer=layer)["fields"], columns)
+        return gpd.read_file(source, layer=layer, mask=mask, columns=columns, rows=rows)
+
+
+def validate(
+    gdf: "gpd.GeoDataFrame", first_row: int = 0
+) -> tuple["gpd.GeoDataFrame", np.ndarray, list[tuple[int, int]]]:
+    """Check and repair the layer's geometry (see `validation`). Returns the
+    usable rows, their issue bits, and (layer row, issue bits) of dropped rows."""
+    import geopandas as gpd
+
+    with metrics.span("upload.validate"):
+        issues = validation.check(gdf.geometry.to_numpy())
+    geometry = validation.repair(gdf.geometry.to_numpy(), issues)
+    gdf = gdf.set_geometry(gpd.GeoSeries(geometry, index=gdf.index, crs=gdf.crs))
+    dropped = (issues & validation.DROPPED) != 0
+    dropped_rows = [
+        (first_row + int(row), int(issues[row])) for row in np.flatnonzero(dropped)
+    ]
+    return gdf[~dropped], issues[~dropped], dropped_rows
+
+
+def reproject(gdf: "gpd.GeoDataFrame") -> tuple["gpd.GeoDataFrame", "gpd.GeoSeries"]:
+    """The layer in EPSG:4326 for display plus its geometry in a local metric
+    CRS for areas and centroids; see `projection.project`."""
+    import geopandas as gpd
+
+    if gdf.crs is None:
+        raise IngestError("Dataset has no coordinate reference system (.prj).")
+    display, metric, metric_crs = projection.project(gdf.geometry.to_numpy(), gdf.crs)
+    gdf_reprojected = gpd.GeoDataFrame(
+        gdf.drop(columns=gdf.geometry.name), geometry=display, crs=projection.WGS84
+    )
+    gdf_reprojected["id"] = range(len(gdf_reprojected))
+    return gdf_reprojected, gpd.GeoSeries(metric, crs=metric_crs)
+
+
+def summarize(
+    frame: pd.DataFrame,
+    geometry: np.ndarray,
+    crs: str,
+    filename: str,
+    layers: list[str],
+) -> dict:
+    bounds = total_bounds(geometry)
+    return {
+        "filename": filename,
+        "feature_count": len(frame),
+        "crs": crs,
+        "bounds": (
+            round(bounds[0], 4),
+            round(bounds[1], 4),
+            round(bounds[2], 4),
+            round(bounds[3], 4),
+        ),
+        "schema": {col: str(frame[col].dtype) for col in frame.columns},
+        "layers": layers,
+    }
+
+
+def attributes(gdf: "gpd.GeoDataFrame") -> pd.DataFrame:
+    return pd.DataFrame(gdf.drop(columns="geometry"))
+
+
+def centroids(metric: "gpd.GeoSeries") -> np.ndarray:
+    """(lat, lon) per row of the centroids taken in the metric CRS; NaN for
+    empty geometries."""
+    import shapely
+
+    points = shapely.centroid(metric.to_numpy())
+    xy = np.column_stack([shapely.get_x(points), shapely.get_y(points)])
+    result = np.full((len(xy), 2), np.nan)
+    present = np.isfinite(xy).all(axis=1)
+    result[present] = projection.to_lonlat(xy[present], metric.crs)[:, ::-1]
+    return result
+
+
+def areas(metric: "gpd.GeoSeries") -> np.ndarray:
+    import shapely
+
+    return np.round(shapely.area(metric.to_numpy()), 1)
+
+
+def total_bounds(geometry: np.ndarray) -> tuple[float, float, float, float]:
+    import shapely
+
+    return tuple(shapely.total_bounds(geometry).tolist())
+
+
+def build_search_index(frame: pd.DataFrame) -> SearchIndex:
+    with metrics.span("upload.search_index"):
+        return SearchIndex.from_frame(frame)
+
+
+def build_sort_index(frame: pd.DataFrame) -> SortIndex:
+    with metrics.span("upload.sort_index"):
+        return SortIndex.from_frame(frame)
+
+
+def build_table_index(
+    frame: pd.DataFrame, version: int, search: SearchIndex | None = None
+) -> TableIndex:
+    if search is None:
+        search = build_search_index(frame)
+    return TableIndex(search, build_sort_index(frame), frame, version)
+
+
+def build_spatial_index(geometry: np.ndarray) -> SpatialIndex:
+    with metrics.span("upload.spatial_index"):
+        return SpatialIndex(geometry)
+
+
+def build_dataset(artifacts: dict) -> dict:
+    """In-memory indexes and map data of a loaded dataset, as held in the
+    session store; the TableIndex LRU is per dataset, so its version is fixed."""
+    return {
+        "table_index": build_table_index(
+            artifacts["attributes"], 0, artifacts["search"]
+        ),
+        "spatial_index": build_spatial_index(artifacts["geometry"]),
+        "centroids": artifacts["centroids"],
+        "geometry": artifacts["geometry"],
+    }
+
+
+def reconcile(frames: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    """Columns that are numeric in some parts and text in others become text
+    in all of them, so the merged column has one kind; nulls stay null."""
+    kinds: dict[str, set[bool]] = {}
+    for frame in frames:
+        for col in frame.columns:
+            kinds.setdefault(col, set()).add(
+                pd.api.types.is_numeric_dtype(frame[col])
+                and not pd.api.types.is_bool_dtype(frame[col])
+            )
+    mixed = [col for col, kind in kinds.items() if len(kind) > 1]
+    if not mixed:
+        return frames
+    return [
+        frame.assign(
+            **{
+                col: frame[col].astype(str).where(frame[col].notna())
+                for col in mixed
+                if col in frame
+            }
+        )
+        for frame in frames
+    ]
+
+
+def part(
+    gdf: "gpd.GeoDataFrame",
+    metric: "gpd.GeoSeries",
+    name: str,
+    issues: np.ndarray | None = None,
+    dropped: list[tuple[int, int]] | None = None,
+) -> dict:
+    """Per-layer artifacts with ids local to the layer; see `merge_parts`.
+    Geometry travels as WKB, which pickles far faster than shapely objects."""
+    import shapely
+
+    frame = attributes(gdf)
+    frame["area_m2"] = areas(metric)
+    return {
+        "name": name,
+        "crs": str(gdf.crs),
+        "wkb": shapely.to_wkb(gdf.geometry.to_numpy()),
+        "attributes": frame,
+        "centroids": centroids(metric),
+        "issues": np.zeros(len(gdf), dtype=np.uint8) if issues is None else issues,
+        "dropped": dropped or [],
+    }
+
+
+def geometry_report(parts: list[dict], issues: np.ndarray) -> dict:
+    """Issue counts plus the first REPORT_ROWS repaired and dropped features.
+    Shell orientation alone is not listed, it is normal for shapefiles."""
+    counts = {
+        name: int(np.count_nonzero(issues & bit))
+        + sum(1 for p in parts for _, flags in p["dropped"] if flags & bit)
+        for bit, name in validation.ISSUES.items()
+    }
+    listed = np.flatnonzero(issues & ~np.uint8(validation.ORIENTATION))
+    features = [
+        {
+            "feature": f"id {row}",
+            "issues": validation.describe(issues[row]),
+            "action": "repaired",
+        }
+        for row in listed[:REPORT_ROWS].tolist()
+    ]
+    features += [
+        {
+            "feature": f"{p['name']} row {row}",
+            "issues": validation.describe(flags),
+            "action": "dropped",
+        }
+        for p in parts
+        for row, flags in p["dropped"]
+    ][:REPORT_ROWS]
+    return {"counts": {k: v for k, v in counts.items() if v}, "features": features}
+
+
+def merge_parts(parts: list[dict], filename: str) -> dict:
+    """Concatenate layer parts in order into one dataset's artifacts (see
+    `dataset_cache.store`). Ids are global row positions, so they are stable
+    for the same files and layer order."""
+    import shapely
+
+    with metrics.span("upload.merge"):
+        counts = [len(p["wkb"]) for p in parts]
+        if not sum(counts):
+            raise IngestError(
+                "No features were read; check the files and the area of interest."
+            )
+        frame = pd.concat(
+            reconcile([p["attributes"].drop(columns="id") for p in parts]),
+            ignore_index=True,
+        )
+        names = [p["name"] for p in parts]
+        layers = list(dict.fromkeys(names))
+        if len(layers) > 1:
+            frame["source_layer"] = np.repeat(names, counts)
+        frame["id"] = np.arange(len(frame))
+        geometry = shapely.from_wkb(np.concatenate([p["wkb"] for p in parts]))
+        issues = np.concatenate([p["issues"] for p in parts])
+    summary = summarize(frame, geometry, parts[0]["crs"], filename, layers)
+    summary["validation"] = geometry_report(parts, issues)
+    return {
+        "geometry": geometry,
+        "attributes": frame,
+        "centroids": np.concatenate([p["centroids"] for p in parts]),
+        "search": build_search_index(frame),
+        "issues": issues,
+        "summary": summary,
+    }
+
+
+def prepare(gdf: "gpd.GeoDataFrame", metric: "gpd.GeoSeries", filename: str) -> dict:
+    """Artifacts of a single reprojected layer."""
+    return merge_parts([part(gdf, metric, filename)], filename)
+
+
+def process_part(
+    index: int,
+    filename: str,
+    path: str,
+    layer: str,
+    rows: slice | None = None,
+    aoi=None,
+    columns: list[str] | None = None,
+    progress=None,
+    cancel_event=None,
+):
+    """Read, validate, reproject and prepare one layer (or a row range of one)
+    of a spooled upload; runs in a worker process. Progress updates are `(index, stage, percent)`.
+
+    Returns the part and the metrics recorded while producing it.
+    """
+    metrics.drain()
+
+    def stage(label: str, percent: int):
+        if cancel_event is not None and cancel_event.is_set():
+            raise UploadCancelled()
+        if progress is not None:
+            progress.put((index, label, percent))
+
+    stage("Reading", 10)
+    gdf = read_layer(path, layer, aoi, columns, rows)
+    stage("Validating geometry", 30)
+    gdf, issues, dropped = validate(gdf, rows.start if rows else 0)
+    stage("Reprojecting", 45)
+    gdf, metric = reproject(gdf)
+    stage("Building map geometry", 60)
+    result = part(gdf, metric, part_name(filename, layer), issues, dropped)
+    stage("Transferring", 90)
+    return result, metrics.drain()
+
+
+def build_map_features(geometry: np.ndarray, positions: np.ndarray) -> list[dict]:
+    """Map polygons of the footprints at row `positions` (EPSG:4326): the
+    exterior ring, of the first polygon for multipolygons. Ids are row
+    positions; empty footprints are left out."""
+    import shapely
+
+    rings = shapely.get_exterior_ring(shapely.get_geometry(geometry[positions], 0))
+    coords, index = shapely.get_coordinates(rings, return_index=True)
+    bounds = np.searchsorted(index, np.arange(len(positions) + 1)).tolist()
+    coords = coords.tolist()
+    return [
+        {
+            "id": position,
+            "positions": [{"lat": y, "lng": x} for x, y in coords[start:end]],
+        }
+        for position, start, end in zip(positions.tolist(), bounds, bounds[1:])
+        if start < end
+    ]
\ No newline at end of file
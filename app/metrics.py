@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.environ.get("PVGIS_METRICS", "1") != "0"
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_histograms: dict[str, "Histogram"] = {}
+_counters: dict[str, float] = {}
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+def observe(stage: str, seconds: float):
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+
+def inc(counter: str, amount: float = 1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + amount
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def span(stage: str):
+    """Time a block into the `stage` histogram; a shared no-op when disabled."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+class _TimedLock:
+    __slots__ = ("stage", "state")
+
+    def __init__(self, state, stage: str):
+        self.state = state
+        self.stage = stage
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        await self.state.__aenter__()
+        observe(self.stage, time.perf_counter() - start)
+        return self.state
+
+    async def __aexit__(self, *exc):
+        return await self.state.__aexit__(*exc)
+
+
+def locked(state, stage: str = "analysis.lock_wait"):
+    """`async with locked(self)` behaves like `async with self`, timing the wait."""
+    if not ENABLED:
+        return state
+    return _TimedLock(state, stage)
+
+
+def summary() -> tuple[list[dict], list[dict]]:
+    with _lock:
+        stages = [
+            {
+                "stage": stage,
+                "count": h.count,
+                "total_s": round(h.total, 3),
+                "mean_ms": round(h.total / h.count * 1000, 2) if h.count else 0.0,
+                "max_ms": round(h.max * 1000, 2),
+            }
+            for stage, h in sorted(_histograms.items())
+        ]
+        counters = [
+            {"name": name, "value": value} for name, value in sorted(_counters.items())
+        ]
+    return stages, counters
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP pvgis_stage_seconds Time spent per ingest/analysis stage.",
+        "# TYPE pvgis_stage_seconds histogram",
+    ]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, h.bucket_counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'pvgis_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'pvgis_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}'
+            )
+            lines.append(f'pvgis_stage_seconds_sum{{stage="{stage}"}} {h.total}')
+            lines.append(f'pvgis_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        for name, value in sorted(_counters.items()):
+            lines.append(f"# TYPE pvgis_{name}_total counter")
+            lines.append(f"pvgis_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def drain() -> dict:
+    """Take and clear everything recorded so far, e.g. inside a worker process."""
+    with _lock:
+        data = {"histograms": dict(_histograms), "counters": dict(_counters)}
+        _histograms.clear()
+        _counters.clear()
+    return data
+
+
+def merge(data: dict):
+    """Add measurements drained from a worker process."""
+    if not ENABLED:
+        return
+    with _lock:
+        for stage, other in data["histograms"].items():
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                histogram = _histograms[stage] = Histogram()
+            histogram.bucket_counts = [
+                a + b for a, b in zip(histogram.bucket_counts, other.bucket_counts)
+            ]
+            histogram.count += other.count
+            histogram.total += other.total
+            histogram.max = max(histogram.max, other.max)
+        for name, value in data["counters"].items():
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
\ No newline at end of file
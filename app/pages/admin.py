@@ -1,12 +1,254 @@
 import reflex as rx
 
+from app.state import (
+    AdminState,
+    CounterMetric,
+    EventProfile,
+    PayloadStat,
+    StageMetric,
+)
+
+API_URL = rx.config.get_config().api_url
+
+
+def header_cell(text: str) -> rx.Component:
+    return rx.el.th(
+        text,
+        class_name="px-4 py-2 text-left text-xs font-medium text-gray-500 uppercase",
+    )
+
+
+def stage_row(row: rx.Var[StageMetric]) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(row["stage"], class_name="px-4 py-2 text-sm font-mono text-gray-800"),
+        rx.el.td(row["count"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["mean_ms"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["max_ms"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["total_s"], class_name="px-4 py-2 text-sm text-gray-700"),
+        class_name="border-t border-gray-200",
+    )
+
+
+def counter_card(counter: rx.Var[CounterMetric]) -> rx.Component:
+    return rx.el.div(
+        rx.el.p(
+            counter["name"], class_name="text-xs font-medium text-gray-500 uppercase"
+        ),
+        rx.el.p(counter["value"], class_name="text-xl font-semibold text-gray-900"),
+        class_name="p-4 bg-white rounded-2xl shadow-sm border border-gray-100/50",
+    )
+
+
+def metrics_section() -> rx.Component:
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h2(
+                "Performance Metrics", class_name="text-2xl font-bold text-gray-800"
+            ),
+            rx.el.div(
+                rx.el.a(
+                    "/metrics",
+                    href=f"{API_URL}/metrics",
+                    target="_blank",
+                    class_name="text-sm text-emerald-600 hover:underline",
+                ),
+                rx.el.button(
+                    "Refresh",
+                    on_click=AdminState.refresh_metrics,
+                    class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50",
+                ),
+                rx.el.button(
+                    "Reset",
+                    on_click=AdminState.reset_metrics,
+                    class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50",
+                ),
+                class_name="flex items-center gap-3",
+            ),
+            class_name="flex justify-between items-center mb-4",
+        ),
+        rx.cond(
+            AdminState.metrics_enabled,
+            None,
+            rx.el.p(
+                "Metrics are disabled (PVGIS_METRICS=0).",
+                class_name="text-sm text-gray-500 mb-4",
+            ),
+        ),
+        rx.el.div(
+            rx.foreach(AdminState.counter_metrics, counter_card),
+            class_name="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6",
+        ),
+        rx.el.div(
+            rx.el.table(
+                rx.el.thead(
+                    rx.el.tr(
+                        header_cell("Stage"),
+                        header_cell("Count"),
+                        header_cell("Mean (ms)"),
+                        header_cell("Max (ms)"),
+                        header_cell("Total (s)"),
+                    )
+                ),
+                rx.el.tbody(rx.foreach(AdminState.stage_metrics, stage_row)),
+                class_name="min-w-full bg-white",
+            ),
+            class_name="w-full overflow-x-auto rounded-lg border border-gray-200 shadow-sm",
+        ),
+        class_name="w-full max-w-5xl p-8 bg-gray-50 rounded-2xl border border-gray-200",
+    )
+
+
+def payload_row(row: rx.Var[PayloadStat]) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(
+            row["handler"], class_name="px-4 py-2 text-sm font-mono text-gray-800"
+        ),
+        rx.el.td(row["var"], class_name="px-4 py-2 text-sm font-mono text-gray-800"),
+        rx.el.td(row["kind"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["count"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["max_bytes"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["mean_ms"], class_name="px-4 py-2 text-sm text-gray-700"),
+        class_name=rx.cond(
+            row["over_budget"],
+            "border-t border-gray-200 bg-red-50",
+            "border-t border-gray-200",
+        ),
+    )
+
+
+def payload_section() -> rx.Component:
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h2("State Payloads", class_name="text-2xl font-bold text-gray-800"),
+            rx.el.div(
+                rx.el.button(
+                    rx.cond(
+                        AdminState.payload_profiling,
+                        "Stop Profiling",
+                        "Start Profiling",
+                    ),
+                    on_click=AdminState.toggle_payload_profiling,
+                    class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50",
+                ),
+                rx.el.button(
+                    "Reset",
+                    on_click=AdminState.reset_payload_stats,
+                    class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50",
+                ),
+                class_name="flex items-center gap-3",
+            ),
+            class_name="flex justify-between items-center mb-4",
+        ),
+        rx.el.p(
+            f"Largest serialized vars per handler; rows over {AdminState.payload_budget_kb} KB are highlighted.",
+            class_name="text-sm text-gray-500 mb-4",
+        ),
+        rx.el.div(
+            rx.el.table(
+                rx.el.thead(
+                    rx.el.tr(
+                        header_cell("Handler"),
+                        header_cell("Var"),
+                        header_cell("Kind"),
+                        header_cell("Events"),
+                        header_cell("Max bytes"),
+                        header_cell("Mean (ms)"),
+                    )
+                ),
+                rx.el.tbody(rx.foreach(AdminState.payload_offenders, payload_row)),
+                class_name="min-w-full bg-white",
+            ),
+            class_name="w-full overflow-x-auto rounded-lg border border-gray-200 shadow-sm",
+        ),
+        class_name="w-full max-w-5xl p-8 mt-6 bg-gray-50 rounded-2xl border border-gray-200",
+    )
+
+
+def profile_row(row: rx.Var[EventProfile]) -> rx.Component:
+    return rx.el.tr(
+        rx.el.td(row["timestamp"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(
+            row["handler"], class_name="px-4 py-2 text-sm font-mono text-gray-800"
+        ),
+        rx.el.td(row["duration_ms"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(row["samples"], class_name="px-4 py-2 text-sm text-gray-700"),
+        rx.el.td(
+            rx.el.a(
+                row["profile"],
+                href=f"{API_URL}/profiles/" + row["profile"],
+                target="_blank",
+                class_name="text-emerald-600 hover:underline",
+            ),
+            class_name="px-4 py-2 text-sm font-mono",
+        ),
+        class_name="border-t border-gray-200",
+    )
+
+
+def event_profile_section() -> rx.Component:
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h2("Event Profiles", class_name="text-2xl font-bold text-gray-800"),
+            rx.el.div(
+                rx.el.label("Sample rate", class_name="text-sm text-gray-600"),
+                rx.el.input(
+                    default_value=AdminState.event_sample_rate.to_string(),
+                    on_blur=AdminState.set_event_sample_rate,
+                    type="number",
+                    step="0.05",
+                    min="0",
+                    max="1",
+                    class_name="w-20 p-1 border-gray-300 rounded-md text-sm",
+                ),
+                rx.el.button(
+                    rx.cond(
+                        AdminState.event_profiling,
+                        "Stop Profiling",
+                        "Start Profiling",
+                    ),
+                    on_click=AdminState.toggle_event_profiling,
+                    class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50",
+                ),
+                class_name="flex items-center gap-3",
+            ),
+            class_name="flex justify-between items-center mb-4",
+        ),
+        rx.el.p(
+            "Slowest recent sampled events; profiles are collapsed stacks for flamegraph tools. "
+            "Stacks come from the event-loop thread all sessions share, so a profile "
+            "also includes other work that ran while the event was in flight.",
+            class_name="text-sm text-gray-500 mb-4",
+        ),
+        rx.el.div(
+            rx.el.table(
+                rx.el.thead(
+                    rx.el.tr(
+                        header_cell("Time"),
+                        header_cell("Handler"),
+                        header_cell("Duration (ms)"),
+                        header_cell("Samples"),
+                        header_cell("Profile"),
+                    )
+                ),
+                rx.el.tbody(rx.foreach(AdminState.slow_events, profile_row)),
+                class_name="min-w-full bg-white",
+            ),
+            class_name="w-full overflow-x-auto rounded-lg border border-gray-200 shadow-sm",
+        ),
+        class_name="w-full max-w-5xl p-8 mt-6 bg-gray-50 rounded-2xl border border-gray-200",
+    )
+
 
 def admin_page() -> rx.Component:
     return rx.el.div(
-        rx.el.h1("Admin Page", class_name="text-4xl font-bold text-gray-800"),
+        rx.el.h1("Admin", class_name="text-4xl font-bold text-gray-800 mb-2"),
         rx.el.p(
-            "Cache management and diagnostics will be implemented in Phase 5.",
-            class_name="text-gray-600 mt-4",
+            "Diagnostics for ingest and analysis performance.",
+            class_name="text-gray-600 mb-8",
         ),
-        class_name="flex flex-col items-center justify-center h-full p-8",
+        metrics_section(),
+        payload_section(),
+        event_profile_section(),
+        on_mount=AdminState.refresh_metrics,
+        class_name="flex flex-col items-center p-4 md:p-8 font-['Poppins'] w-full min-h-screen",
     )
\ No newline at end of file
@@ -1,5 +1,6 @@
 import reflex as rx
-from app.state import AppState, AnalysisState, BuildingStatus
+
+from app.state import AnalysisState, AppState, ExploreState
 
 
 def parameter_input(
@@ -55,6 +56,30 @@ def analysis_controls() -> rx.Component:
                         "Single Building",
                         class_name="flex items-center text-sm font-medium text-gray-700",
                     ),
+                    rx.el.label(
+                        rx.el.input(
+                            type="radio",
+                            name="analysis_mode",
+                            value="filtered",
+                            on_change=AnalysisState.set_analysis_mode,
+                            checked=AnalysisState.analysis_mode == "filtered",
+                            class_name="mr-2 text-emerald-600 focus:ring-emerald-500",
+                        ),
+                        f"Explore Selection ({ExploreState.explore_row_count})",
+                        class_name="flex items-center text-sm font-medium text-gray-700",
+                    ),
+                    rx.el.label(
+                        rx.el.input(
+                            type="radio",
+                            name="analysis_mode",
+                            value="selection",
+                            on_change=AnalysisState.set_analysis_mode,
+                            checked=AnalysisState.analysis_mode == "selection",
+                            class_name="mr-2 text-emerald-600 focus:ring-emerald-500",
+                        ),
+                        f"Map Selection ({ExploreState.selection_count})",
+                        class_name="flex items-center text-sm font-medium text-gray-700",
+                    ),
                     class_name="flex gap-6",
                 ),
             ),
@@ -65,9 +90,18 @@ def analysis_controls() -> rx.Component:
                         "Select Building ID",
                         class_name="block text-sm font-medium text-gray-700 mb-1",
                     ),
+                    rx.debounce_input(
+                        rx.el.input(
+                            placeholder="Type a building ID...",
+                            value=AnalysisState.building_search,
+                            on_change=AnalysisState.set_building_search,
+                            class_name="w-full p-2 mb-2 border-gray-300 rounded-lg shadow-sm focus:ring-emerald-500 focus:border-emerald-500",
+                        ),
+                        debounce_timeout=300,
+                    ),
                     rx.el.select(
                         rx.foreach(
-                            AnalysisState.building_ids_for_dropdown,
+                            AnalysisState.building_id_matches,
                             lambda bid: rx.el.option(bid, value=bid.to_string()),
                         ),
                         placeholder="Select a building...",
@@ -134,6 +168,14 @@ def progress_section() -> rx.Component:
                 "Building Status",
                 class_name="text-lg font-semibold text-gray-800 mt-6 mb-2",
             ),
+            rx.el.p(
+                f"{AnalysisState.completed_count} completed, "
+                f"{AnalysisState.cached_count} from cache, "
+                f"{AnalysisState.error_count} failed of "
+                f"{AnalysisState.analysis_total} buildings. "
+                "Showing the most recent.",
+                class_name="text-sm text-gray-600 mb-2",
+            ),
             rx.el.div(
                 rx.el.table(
                     rx.el.thead(
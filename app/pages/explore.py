@@ -1,7 +1,9 @@
 import reflex as rx
 import reflex_enterprise as rxe
-from app.state import AppState, ExploreState, SampleRow, GeoJSONFeature
-from reflex_enterprise.components.map.types import LatLng, latlng
+from reflex_enterprise.components.map.types import LatLng, LatLngBounds
+
+from app.components.virtual_table import ROW_HEIGHT, virtual_table
+from app.state import AppState, ExploreState
 
 MAP_ID = "explore-map"
 
@@ -31,22 +33,21 @@ def map_section() -> rx.Component:
                 rx.cond(
                     AppState.is_data_loaded,
                     rx.foreach(
-                        AppState.map_features,
+                        ExploreState.map_features,
                         lambda feature: rxe.map.polygon(
-                            positions=feature["positions"],
+                            positions=feature["positions"].to(list[LatLng]),
                             path_options={
                                 "color": "#2B79D1",
                                 "weight": 2,
                                 "fillColor": rx.cond(
-                                    ExploreState.selected_building_id
-                                    == feature["properties"]["id"],
+                                    ExploreState.selected_building_id == feature["id"],
                                     "#F3340B",
                                     "#2B79D1",
                                 ),
                                 "fillOpacity": 0.6,
                             },
                             on_click=ExploreState.select_building_from_map(
-                                feature["properties"]["id"]
+                                feature["id"]
                             ),
                             key=feature["id"],
                         ),
@@ -55,10 +56,33 @@ def map_section() -> rx.Component:
                 ),
                 None,
             ),
+            rx.cond(
+                ExploreState.selection_shape.length() > 0,
+                rxe.map.polygon(
+                    positions=ExploreState.selection_shape.to(list[LatLng]),
+                    path_options={
+                        "color": "#F59E0B",
+                        "weight": 2,
+                        "dashArray": "6 4",
+                        "fillOpacity": 0.1,
+                    },
+                ),
+                None,
+            ),
+            rx.cond(
+                ExploreState.draw_points.length() > 0,
+                rxe.map.polyline(
+                    positions=ExploreState.draw_points.to(list[LatLng]),
+                    path_options={"color": "#F59E0B", "weight": 2},
+                ),
+                None,
+            ),
             id=MAP_ID,
-            center=ExploreState.map_center,
+            center=ExploreState.map_center.to(LatLng),
             zoom=ExploreState.map_zoom,
-            max_bounds=ExploreState.map_bounds_for_map,
+            max_bounds=ExploreState.map_bounds_for_map.to(LatLngBounds),
+            on_click=ExploreState.add_draw_point,
+            on_move_end=ExploreState.set_viewport,
             width="100%",
             height="100%",
             class_name="rounded-2xl",
@@ -67,99 +91,168 @@ def map_section() -> rx.Component:
     )
 
 
+def tool_button(label: str, icon: str, tool: str) -> rx.Component:
+    return rx.el.button(
+        rx.icon(icon, class_name="mr-2 h-4 w-4"),
+        label,
+        on_click=ExploreState.set_selection_tool(
+            rx.cond(ExploreState.selection_tool == tool, "none", tool)
+        ),
+        class_name=rx.cond(
+            ExploreState.selection_tool == tool,
+            "flex items-center px-4 py-2 text-sm font-semibold text-white bg-amber-500 rounded-lg shadow-sm hover:bg-amber-600",
+            "flex items-center px-4 py-2 text-sm font-semibold text-gray-700 bg-white border rounded-lg hover:bg-gray-100",
+        ),
+    )
+
+
+def selection_toolbar() -> rx.Component:
+    return rx.el.div(
+        tool_button("Rectangle", "square-dashed", "rectangle"),
+        tool_button("Polygon", "lasso", "polygon"),
+        rx.cond(
+            (ExploreState.selection_tool == "polygon")
+            & (ExploreState.draw_points.length() >= 3),
+            rx.el.button(
+                "Finish",
+                on_click=ExploreState.finish_selection,
+                class_name="px-4 py-2 text-sm font-semibold text-white bg-emerald-600 rounded-lg hover:bg-emerald-700",
+            ),
+            None,
+        ),
+        rx.cond(
+            ExploreState.selection_count > 0,
+            rx.el.div(
+                rx.el.span(
+                    f"{ExploreState.selection_count} selected",
+                    class_name="text-sm font-medium text-gray-700",
+                ),
+                rx.el.button(
+                    rx.icon("x", class_name="h-4 w-4"),
+                    on_click=ExploreState.clear_map_selection,
+                    class_name="p-1 text-gray-500 hover:text-gray-700",
+                ),
+                class_name="flex items-center gap-2",
+            ),
+            None,
+        ),
+        class_name="flex items-center gap-4 ml-auto",
+    )
+
+
 def attribute_table() -> rx.Component:
     return rx.el.div(
         rx.el.div(
             rx.el.div(
                 rx.icon("search", class_name="h-5 w-5 text-gray-400"),
-                rx.el.input(
-                    placeholder="Filter rows...",
-                    on_change=ExploreState.set_table_filter,
-                    class_name="w-full bg-transparent focus:outline-none",
+                rx.debounce_input(
+                    rx.el.input(
+                        placeholder="Filter rows...",
+                        value=ExploreState.table_filter,
+                        on_change=ExploreState.set_table_filter,
+                        class_name="w-full bg-transparent focus:outline-none",
+                    ),
+                    debounce_timeout=300,
                 ),
                 class_name="flex items-center gap-3 px-4 py-2 bg-white border rounded-lg shadow-sm w-full max-w-sm",
             ),
-            class_name="flex justify-between items-center mb-4",
+            rx.el.form(
+                rx.icon("list-filter", class_name="h-5 w-5 text-gray-400"),
+                rx.el.input(
+                    name="predicate",
+                    placeholder="Where... e.g. height > 10 AND use IN ('residential')",
+                    default_value=ExploreState.table_predicate,
+                    key=ExploreState.table_predicate,
+                    class_name="w-full bg-transparent font-mono text-sm focus:outline-none",
+                ),
+                rx.el.button(
+                    "Apply",
+                    type="submit",
+                    class_name="px-3 py-1 text-sm font-semibold text-white bg-emerald-600 rounded-md hover:bg-emerald-700",
+                ),
+                rx.cond(
+                    ExploreState.table_predicate != "",
+                    rx.el.button(
+                        rx.icon("x", class_name="h-4 w-4"),
+                        type="button",
+                        on_click=ExploreState.clear_predicate,
+                        class_name="p-1 text-gray-500 hover:text-gray-700",
+                    ),
+                    None,
+                ),
+                on_submit=ExploreState.apply_predicate,
+                reset_on_submit=False,
+                class_name="flex items-center gap-3 px-4 py-2 bg-white border rounded-lg shadow-sm w-full max-w-xl",
+            ),
+            class_name="flex flex-wrap justify-between items-center gap-4 mb-2",
         ),
         rx.el.div(
-            rx.el.div(
-                rx.el.table(
-                    rx.el.thead(
-                        rx.el.tr(
-                            rx.foreach(
-                                AppState.attribute_columns,
-                                lambda col: rx.el.th(
-                                    rx.el.button(
-                                        col,
-                                        rx.icon(
-                                            rx.cond(
-                                                ExploreState.table_sort_column == col,
-                                                rx.cond(
-                                                    ExploreState.table_sort_direction
-                                                    == "asc",
-                                                    "arrow-up",
-                                                    "arrow-down",
-                                                ),
-                                                "chevrons-up-down",
-                                            ),
-                                            class_name="ml-2 h-4 w-4",
+            rx.cond(
+                ExploreState.predicate_error != "",
+                rx.el.p(
+                    ExploreState.predicate_error,
+                    class_name="text-sm text-red-600",
+                ),
+                rx.el.p(
+                    f"{ExploreState.explore_row_count} matching rows",
+                    class_name="text-sm text-gray-500",
+                ),
+            ),
+            class_name="mb-4",
+        ),
+        rx.el.div(
+            virtual_table(
+                rx.el.tr(
+                    rx.foreach(
+                        AppState.attribute_columns,
+                        lambda col: rx.el.th(
+                            rx.el.button(
+                                col,
+                                rx.icon(
+                                    rx.cond(
+                                        ExploreState.table_sort_column == col,
+                                        rx.cond(
+                                            ExploreState.table_sort_direction == "asc",
+                                            "arrow-up",
+                                            "arrow-down",
                                         ),
-                                        on_click=ExploreState.sort_table(col),
-                                        class_name="flex items-center gap-1 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
+                                        "chevrons-up-down",
                                     ),
-                                    scope="col",
-                                    class_name="px-6 py-3",
+                                    class_name="ml-2 h-4 w-4",
                                 ),
+                                on_click=ExploreState.sort_table(col),
+                                class_name="flex items-center gap-1 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
                             ),
-                            class_name="bg-gray-50",
-                        )
+                            scope="col",
+                            class_name="px-6 py-3",
+                        ),
                     ),
-                    rx.el.tbody(
-                        rx.foreach(
-                            ExploreState.paginated_explore_rows,
-                            lambda row: rx.el.tr(
-                                rx.foreach(
-                                    AppState.attribute_columns,
-                                    lambda col: rx.el.td(
-                                        row["data"][col].to_string(),
-                                        class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-700",
-                                    ),
-                                ),
-                                on_click=ExploreState.select_building_from_table(row),
-                                class_name=rx.cond(
-                                    ExploreState.selected_building_id == row["id"],
-                                    "bg-emerald-100/50 cursor-pointer",
-                                    "hover:bg-gray-50 cursor-pointer",
-                                ),
-                            ),
+                    class_name="bg-gray-50",
+                ),
+                ExploreState.visible_explore_rows,
+                lambda row: rx.el.tr(
+                    rx.foreach(
+                        AppState.attribute_columns,
+                        lambda col: rx.el.td(
+                            row["data"][col].to_string(),
+                            class_name="px-6 py-2 whitespace-nowrap text-sm text-gray-700",
                         ),
-                        class_name="bg-white divide-y divide-gray-200",
                     ),
-                    class_name="min-w-full divide-y divide-gray-200",
+                    on_click=ExploreState.select_building_from_table(row),
+                    style={"height": f"{ROW_HEIGHT}px"},
+                    class_name=rx.cond(
+                        ExploreState.selected_building_id == row["id"],
+                        "bg-emerald-100/50 cursor-pointer",
+                        "hover:bg-gray-50 cursor-pointer",
+                    ),
                 ),
-                class_name="overflow-x-auto",
+                ExploreState.explore_row_count,
+                ExploreState.table_offset,
+                ExploreState.scroll_table,
+                key=ExploreState.table_view_key,
             ),
             class_name="shadow border-b border-gray-200 sm:rounded-lg",
         ),
-        rx.el.div(
-            rx.el.button(
-                "Previous",
-                on_click=ExploreState.prev_page,
-                disabled=ExploreState.current_page <= 1,
-                class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50",
-            ),
-            rx.el.span(
-                f"Page {ExploreState.current_page} of {ExploreState.explore_total_pages}",
-                class_name="text-sm text-gray-700",
-            ),
-            rx.el.button(
-                "Next",
-                on_click=ExploreState.next_page,
-                disabled=ExploreState.current_page >= ExploreState.explore_total_pages,
-                class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50",
-            ),
-            class_name="flex items-center justify-between mt-4",
-        ),
     )
 
 
@@ -216,7 +309,8 @@ def explore_page() -> rx.Component:
                             "flex items-center px-4 py-2 text-sm font-semibold text-gray-700 bg-white border rounded-lg hover:bg-gray-100",
                         ),
                     ),
-                    class_name="flex gap-4 my-4",
+                    selection_toolbar(),
+                    class_name="flex flex-wrap gap-4 my-4",
                 ),
                 attribute_table(),
                 class_name="w-full",
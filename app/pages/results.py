@@ -1,12 +1,135 @@
 import reflex as rx
 
+from app.components.charts import indexed_bar, indexed_scatter
+from app.state import AppState, ResultsState
+
+
+def stat_cell(label: str, value: rx.Var) -> rx.Component:
+    return rx.el.div(
+        rx.el.p(label, class_name="text-xs font-medium text-gray-500 uppercase"),
+        rx.el.p(value.to_string(), class_name="text-lg font-semibold text-gray-900"),
+        class_name="p-3 bg-gray-50 rounded-lg text-center",
+    )
+
+
+def yield_histogram_chart() -> rx.Component:
+    return rx.el.div(
+        rx.el.h2(
+            "Specific Yield Distribution",
+            class_name="text-2xl font-bold text-gray-800 mb-4",
+        ),
+        rx.recharts.bar_chart(
+            rx.recharts.cartesian_grid(stroke_dasharray="3 3"),
+            rx.recharts.x_axis(data_key="label"),
+            rx.recharts.y_axis(),
+            rx.recharts.graphing_tooltip(),
+            indexed_bar(
+                data_key="count",
+                fill="#10B981",
+                on_click=ResultsState.select_histogram_bin,
+                class_name="cursor-pointer",
+            ),
+            data=ResultsState.yield_histogram,
+            width="100%",
+            height=300,
+        ),
+        rx.cond(
+            ResultsState.yield_box_stats,
+            rx.el.div(
+                stat_cell("Min", ResultsState.yield_box_stats["min"]),
+                stat_cell("Q1", ResultsState.yield_box_stats["q1"]),
+                stat_cell("Median", ResultsState.yield_box_stats["median"]),
+                stat_cell("Q3", ResultsState.yield_box_stats["q3"]),
+                stat_cell("Max", ResultsState.yield_box_stats["max"]),
+                stat_cell("Outliers", ResultsState.yield_box_stats["outlier_count"]),
+                class_name="grid grid-cols-3 md:grid-cols-6 gap-3 mt-4",
+            ),
+            None,
+        ),
+        class_name="p-6 bg-white rounded-2xl shadow-sm border border-gray-100/50",
+    )
+
+
+def yield_scatter_chart() -> rx.Component:
+    return rx.el.div(
+        rx.el.h2(
+            "Specific Yield by Building",
+            class_name="text-2xl font-bold text-gray-800 mb-4",
+        ),
+        rx.recharts.scatter_chart(
+            rx.recharts.cartesian_grid(stroke_dasharray="3 3"),
+            rx.recharts.x_axis(data_key="building_id", type_="number", name="Building"),
+            rx.recharts.y_axis(data_key="y", type_="number", name="kWh/kWp"),
+            rx.recharts.graphing_tooltip(),
+            indexed_scatter(
+                data=ResultsState.yield_scatter,
+                fill="#2B79D1",
+                on_click=ResultsState.select_scatter_point,
+                is_animation_active=False,
+            ),
+            width="100%",
+            height=300,
+        ),
+        class_name="p-6 bg-white rounded-2xl shadow-sm border border-gray-100/50",
+    )
+
+
+def selection_panel() -> rx.Component:
+    return rx.cond(
+        ResultsState.selection["count"] > 0,
+        rx.el.div(
+            rx.el.div(
+                rx.el.p(
+                    f"{ResultsState.selection['count']} buildings selected ({ResultsState.selection_label})",
+                    class_name="text-sm font-medium text-gray-700",
+                ),
+                rx.el.button(
+                    "Clear",
+                    on_click=ResultsState.clear_selection,
+                    class_name="px-3 py-1 text-sm text-gray-700 bg-white border rounded-md hover:bg-gray-50",
+                ),
+                class_name="flex justify-between items-center",
+            ),
+            rx.el.p(
+                ResultsState.selection["building_ids"].join(", "),
+                class_name="text-sm text-gray-600 font-mono mt-2 break-words",
+            ),
+            class_name="p-4 bg-emerald-50 rounded-2xl border border-emerald-200",
+        ),
+        None,
+    )
+
 
 def results_page() -> rx.Component:
     return rx.el.div(
-        rx.el.h1("Results Page", class_name="text-4xl font-bold text-gray-800"),
+        rx.el.h1("Results", class_name="text-4xl font-bold text-gray-800 mb-2"),
         rx.el.p(
-            "Charts and KPIs will be implemented in Phase 4.",
-            class_name="text-gray-600 mt-4",
+            "Click a bar or point to list the buildings behind it.",
+            class_name="text-gray-600 mb-8",
+        ),
+        rx.cond(
+            AppState.analysis_count > 0,
+            rx.el.div(
+                yield_histogram_chart(),
+                selection_panel(),
+                yield_scatter_chart(),
+                class_name="w-full max-w-5xl space-y-6",
+            ),
+            rx.el.div(
+                rx.el.h2(
+                    "No Results Yet", class_name="text-2xl font-bold text-gray-800 mb-4"
+                ),
+                rx.el.p(
+                    "Run an analysis on the Analysis page to see results.",
+                    class_name="text-gray-600 mb-6",
+                ),
+                rx.el.a(
+                    "Go to Analysis Page",
+                    href="/analysis",
+                    class_name="px-6 py-3 bg-emerald-600 text-white rounded-lg font-semibold hover:bg-emerald-700 transition",
+                ),
+                class_name="text-center p-8 bg-white rounded-2xl shadow-sm border",
+            ),
         ),
-        class_name="flex flex-col items-center justify-center h-full p-8",
+        class_name="flex flex-col items-center p-4 md:p-8 font-['Poppins'] w-full min-h-screen",
     )
\ No newline at end of file
@@ -1,6 +1,8 @@
 import reflex as rx
 import reflex_enterprise as rxe
-from app.state import AppState, SampleRow
+
+from app.components.virtual_table import ROW_HEIGHT, virtual_table
+from app.state import MAX_UPLOAD_FILES, AppState, UploadPart
 
 
 def kpi_card(title: str, value: rx.Var | str, icon: str) -> rx.Component:
@@ -88,67 +90,119 @@ def schema_table() -> rx.Component:
     )
 
 
+def geometry_report() -> rx.Component:
+    report = AppState.dataset_summary["validation"]
+    return rx.cond(
+        report["counts"].length() > 0,
+        rx.el.div(
+            rx.el.h2(
+                "Geometry Report", class_name="text-2xl font-bold text-gray-800 mb-4"
+            ),
+            rx.el.div(
+                rx.foreach(
+                    report["counts"].items(),
+                    lambda item: rx.el.span(
+                        f"{item[0]}: {item[1]}",
+                        class_name="px-3 py-1 text-sm bg-amber-50 text-amber-800 rounded-full border border-amber-200",
+                    ),
+                ),
+                class_name="flex flex-wrap gap-2 mb-4",
+            ),
+            rx.el.table(
+                rx.el.tbody(
+                    rx.foreach(
+                        report["features"],
+                        lambda row: rx.el.tr(
+                            rx.el.td(
+                                row["feature"],
+                                class_name="px-6 py-2 text-sm font-medium text-gray-900",
+                            ),
+                            rx.el.td(
+                                row["issues"],
+                                class_name="px-6 py-2 text-sm text-gray-500",
+                            ),
+                            rx.el.td(
+                                row["action"],
+                                class_name="px-6 py-2 text-sm text-gray-500",
+                            ),
+                            class_name="border-b border-gray-200",
+                        ),
+                    ),
+                    class_name="bg-white",
+                ),
+                class_name="min-w-full",
+            ),
+        ),
+        None,
+    )
+
+
 def sample_rows_table() -> rx.Component:
     return rx.el.div(
         rx.el.h2(
-            "Sample Rows (First 50)", class_name="text-2xl font-bold text-gray-800 mb-4"
+            f"Attribute Rows ({AppState.row_count})",
+            class_name="text-2xl font-bold text-gray-800 mb-4",
         ),
         rx.el.div(
-            rx.el.div(
-                rx.el.table(
-                    rx.el.thead(
-                        rx.el.tr(
-                            rx.foreach(
-                                AppState.attribute_columns,
-                                lambda col: rx.el.th(
-                                    col,
-                                    scope="col",
-                                    class_name="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
-                                ),
-                            ),
-                            class_name="bg-gray-50",
-                        )
+            virtual_table(
+                rx.el.tr(
+                    rx.foreach(
+                        AppState.attribute_columns,
+                        lambda col: rx.el.th(
+                            col,
+                            scope="col",
+                            class_name="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider",
+                        ),
                     ),
-                    rx.el.tbody(
-                        rx.foreach(
-                            AppState.paginated_rows,
-                            lambda row: rx.el.tr(
-                                rx.foreach(
-                                    AppState.attribute_columns,
-                                    lambda col: rx.el.td(
-                                        row["data"][col].to_string(),
-                                        class_name="px-6 py-4 whitespace-nowrap text-sm text-gray-700",
-                                    ),
-                                )
-                            ),
+                    class_name="bg-gray-50",
+                ),
+                AppState.preview_rows,
+                lambda row: rx.el.tr(
+                    rx.foreach(
+                        AppState.attribute_columns,
+                        lambda col: rx.el.td(
+                            row["data"][col].to_string(),
+                            class_name="px-6 py-2 whitespace-nowrap text-sm text-gray-700",
                         ),
-                        class_name="bg-white divide-y divide-gray-200",
                     ),
-                    class_name="min-w-full divide-y divide-gray-200",
+                    style={"height": f"{ROW_HEIGHT}px"},
                 ),
-                class_name="overflow-x-auto",
+                AppState.row_count,
+                AppState.preview_offset,
+                AppState.scroll_preview,
+                key=AppState.dataset_version,
             ),
             class_name="shadow border-b border-gray-200 sm:rounded-lg",
         ),
-        rx.el.div(
-            rx.el.button(
-                "Previous",
-                on_click=AppState.prev_page,
-                disabled=AppState.current_page <= 1,
-                class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50",
-            ),
-            rx.el.span(
-                f"Page {AppState.current_page} of {AppState.total_pages}",
-                class_name="text-sm text-gray-700",
-            ),
-            rx.el.button(
-                "Next",
-                on_click=AppState.next_page,
-                disabled=AppState.current_page >= AppState.total_pages,
-                class_name="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50",
-            ),
-            class_name="flex items-center justify-between mt-4",
+    )
+
+
+def upload_part_row(part: UploadPart) -> rx.Component:
+    return rx.el.li(
+        rx.el.span(part["name"], class_name="truncate text-gray-700"),
+        rx.el.span(
+            f"{part['stage']} · {part['percent']}%",
+            class_name="shrink-0 ml-4 text-gray-500",
+        ),
+        class_name="flex justify-between text-xs",
+    )
+
+
+def read_options() -> rx.Component:
+    return rx.el.div(
+        rx.el.input(
+            default_value=AppState.upload_aoi,
+            on_blur=AppState.set_upload_aoi,
+            placeholder="Area of interest: min_lon, min_lat, max_lon, max_lat or WKT polygon",
+            class_name="w-full p-2 border border-gray-300 rounded-lg text-sm",
         ),
+        rx.el.input(
+            default_value=AppState.upload_columns,
+            on_blur=AppState.set_upload_columns,
+            placeholder="Columns to load, comma separated (default: all)",
+            class_name="w-full p-2 border border-gray-300 rounded-lg text-sm",
+        ),
+        class_name="mt-4 space-y-2",
     )
 
 
@@ -162,20 +216,27 @@ def drop_target_component() -> rx.Component:
             rx.el.div(
                 rx.icon("cloud_upload", class_name="w-16 h-16 text-gray-400 mb-4"),
                 rx.el.h3(
-                    "Drag & drop a .zip file here",
+                    "Drag & drop files here",
                     class_name="text-lg font-semibold text-gray-700",
                 ),
                 rx.el.p(
-                    "or click to select a file", class_name="text-sm text-gray-500 mt-1"
+                    "or click to select files", class_name="text-sm text-gray-500 mt-1"
+                ),
+                rx.el.p(
+                    "Zipped shapefiles, GeoPackage, GeoParquet or FlatGeobuf; several files are merged into one dataset (max 50MB each)",
+                    class_name="text-xs text-gray-400 mt-2",
                 ),
-                rx.el.p("(Max 50MB)", class_name="text-xs text-gray-400 mt-2"),
                 class_name="flex flex-col items-center justify-center p-12 text-center",
             ),
             rx.upload.root(
                 rx.el.input(type="file", class_name="hidden"),
                 id="zip_upload",
-                accept={"application/zip": [".zip"]},
-                max_files=1,
+                accept={
+                    "application/zip": [".zip"],
+                    "application/geopackage+sqlite3": [".gpkg"],
+                    "application/octet-stream": [".fgb", ".parquet", ".geoparquet"],
+                },
+                max_files=MAX_UPLOAD_FILES,
                 max_size=50 * 1024 * 1024,
                 class_name="hidden",
             ),
@@ -195,7 +256,7 @@ def upload_page() -> rx.Component:
     return rx.el.div(
         rx.el.h1("Upload Dataset", class_name="text-4xl font-bold text-gray-800 mb-2"),
         rx.el.p(
-            "Upload a zipped shapefile containing building footprints to begin analysis.",
+            "Upload building footprints to begin analysis.",
             class_name="text-gray-600 mb-8",
         ),
         rx.cond(
@@ -203,7 +264,7 @@ def upload_page() -> rx.Component:
             rx.el.div(
                 rx.el.div(
                     rx.el.p(
-                        "Processing your file...",
+                        AppState.upload_stage,
                         class_name="text-lg font-medium text-gray-700",
                     ),
                     rx.el.p(
@@ -219,6 +280,19 @@ def upload_page() -> rx.Component:
                     ),
                     class_name="w-full bg-gray-200 rounded-full h-2.5",
                 ),
+                rx.cond(
+                    AppState.upload_parts.length() > 1,
+                    rx.el.ul(
+                        rx.foreach(AppState.upload_parts, upload_part_row),
+                        class_name="mt-4 space-y-1 max-h-48 overflow-y-auto",
+                    ),
+                    None,
+                ),
+                rx.el.button(
+                    "Cancel",
+                    on_click=AppState.cancel_upload,
+                    class_name="mt-4 px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-lg hover:bg-gray-50",
+                ),
                 class_name="w-full max-w-md p-8 bg-white rounded-2xl shadow-lg border border-gray-200",
             ),
             rx.cond(
@@ -226,6 +300,7 @@ def upload_page() -> rx.Component:
                 rx.el.div(
                     summary_section(),
                     schema_table(),
+                    geometry_report(),
                     sample_rows_table(),
                     rx.el.button(
                         "Proceed to Map",
@@ -237,14 +312,18 @@ def upload_page() -> rx.Component:
                 ),
                 rx.el.div(
                     drop_target_component(),
-                    rx.foreach(
-                        rx.selected_files("zip_upload"),
-                        lambda file: rx.el.div(
-                            rx.el.p(
-                                file, class_name="text-sm text-gray-700 font-medium"
+                    read_options(),
+                    rx.cond(
+                        rx.selected_files("zip_upload").length() > 0,
+                        rx.el.div(
+                            rx.foreach(
+                                rx.selected_files("zip_upload"),
+                                lambda file: rx.el.p(
+                                    file, class_name="text-sm text-gray-700 font-medium"
+                                ),
                             ),
                             rx.el.button(
-                                "Process File",
+                                "Process Files",
                                 on_click=AppState.handle_upload(
                                     rx.upload_files(upload_id="zip_upload")
                                 ),
@@ -252,6 +331,7 @@ def upload_page() -> rx.Component:
                             ),
                             class_name="mt-4 text-center",
                         ),
+                        None,
                     ),
                     rx.cond(
                         AppState.upload_error != "",
@@ -0,0 +1,217 @@
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+      | '(?P<sq>(?:[^']|'')*)'
+      | "(?P<dq>(?:[^"]|"")*)"
+      | `(?P<bq>[^`]*)`
+      | (?P<op><=|>=|!=|<>|==|=|<|>|\(|\)|,)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_.]*)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = {"AND", "OR", "NOT", "IN", "IS", "NULL", "BETWEEN", "TRUE", "FALSE"}
+_COMPARISONS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class PredicateError(ValueError):
+    """Raised for filter expressions that do not parse or do not type-check."""
+
+
+def tokenize(text: str) -> list[tuple[str, object]]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise PredicateError(f"Unexpected input at position {pos}: {text[pos:]!r}")
+        pos = match.end()
+        if match["number"] is not None:
+            tokens.append(("literal", float(match["number"])))
+        elif match["sq"] is not None:
+            tokens.append(("literal", match["sq"].replace("''", "'")))
+        elif match["dq"] is not None:
+            tokens.append(("column", match["dq"].replace('""', '"')))
+        elif match["bq"] is not None:
+            tokens.append(("column", match["bq"]))
+        elif match["op"] is not None:
+            tokens.append(("op", match["op"]))
+        elif match["word"].upper() in _KEYWORDS:
+            word = match["word"].upper()
+            if word in ("TRUE", "FALSE"):
+                tokens.append(("literal", word == "TRUE"))
+            else:
+                tokens.append(("keyword", word))
+        else:
+            tokens.append(("column", match["word"]))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing nested tuples.
+
+    expr   := and ("OR" and)*
+    and    := not ("AND" not)*
+    not    := "NOT" not | "(" expr ")" | test
+    test   := column (cmp literal | [NOT] IN (literals) | IS [NOT] NULL
+              | [NOT] BETWEEN literal AND literal)
+    """
+
+    def __init__(self, tokens: list[tuple[str, object]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, kind: str, value: object = None) -> bool:
+        if self.pos >= len(self.tokens):
+            return False
+        token_kind, token_value = self.tokens[self.pos]
+        return token_kind == kind and (value is None or token_value == value)
+
+    def take(self, kind: str, value: object = None) -> object:
+        if not self.peek(kind, value):
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end"
+            raise PredicateError(f"Expected {value or kind}, found {found!r}")
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def parse(self):
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise PredicateError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def expr(self):
+        node = self.conjunction()
+        while self.peek("keyword", "OR"):
+            self.take("keyword")
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.peek("keyword", "AND"):
+            self.take("keyword")
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self):
+        if self.peek("keyword", "NOT"):
+            self.take("keyword")
+            return ("not", self.negation())
+        if self.peek("op", "("):
+            self.take("op")
+            node = self.expr()
+            self.take("op", ")")
+            return node
+        return self.test()
+
+    def test(self):
+        column = self.take("column")
+        if self.peek("op") and self.tokens[self.pos][1] in _COMPARISONS:
+            return ("cmp", column, self.take("op"), self.take("literal"))
+        if self.peek("keyword", "IS"):
+            self.take("keyword")
+            negate = self.peek("keyword", "NOT") and bool(self.take("keyword"))
+            self.take("keyword", "NULL")
+            node = ("null", column)
+            return ("not", node) if negate else node
+        negate = self.peek("keyword", "NOT") and bool(self.take("keyword"))
+        if self.peek("keyword", "IN"):
+            self.take("keyword")
+            self.take("op", "(")
+            values = [self.take("literal")]
+            while self.peek("op", ","):
+                self.take("op")
+                values.append(self.take("literal"))
+            self.take("op", ")")
+            node = ("in", column, values)
+        elif self.peek("keyword", "BETWEEN"):
+            self.take("keyword")
+            low = self.take("literal")
+            self.take("keyword", "AND")
+            node = ("between", column, low, self.take("literal"))
+        else:
+            raise PredicateError(f"Expected a comparison after column {column!r}")
+        return ("not", node) if negate else node
+
+
+def parse(text: str):
+    return _Parser(tokenize(text)).parse()
+
+
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    if name not in frame.columns:
+        raise PredicateError(f"Unknown column {name!r}")
+    return frame[name]
+
+
+def _typed(series: pd.Series, literals: list) -> tuple[np.ndarray, list]:
+    """Align column values and literals on one comparable type."""
+    numeric_literals = all(
+        isinstance(v, (float, bool)) and not isinstance(v, str) for v in literals
+    )
+    if pd.api.types.is_numeric_dtype(series):
+        try:
+            return series.to_numpy(dtype=np.float64, na_value=np.nan), [
+                float(v) for v in literals
+            ]
+        except ValueError:
+            raise PredicateError(
+                f"Column {series.name!r} is numeric; cannot compare with {literals!r}"
+            ) from None
+    if numeric_literals:
+        values = pd.to_numeric(series, errors="coerce")
+        return values.to_numpy(dtype=np.float64, na_value=np.nan), literals
+    return series.astype(str).to_numpy(dtype=object), [str(v) for v in literals]
+
+
+def _evaluate(node, frame: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """(true, false) masks of `node`; rows in neither are unknown, as tests on
+    nulls are in SQL, and stay unknown under NOT."""
+    kind = node[0]
+    if kind in ("and", "or"):
+        true1, false1 = _evaluate(node[1], frame)
+        true2, false2 = _evaluate(node[2], frame)
+        if kind == "and":
+            return true1 & true2, false1 | false2
+        return true1 | true2, false1 & false2
+    if kind == "not":
+        true, false = _evaluate(node[1], frame)
+        return false, true
+    series = _column(frame, node[1])
+    present = series.notna().to_numpy()
+    if kind == "null":
+        return ~present, present
+    if kind == "cmp":
+        values, (literal,) = _typed(series, [node[3]])
+        mask = np.zeros(len(series), dtype=bool)
+        mask[present] = _COMPARISONS[node[2]](values[present], literal)
+    elif kind == "in":
+        values, literals = _typed(series, node[2])
+        mask = np.isin(values, literals) & present
+    elif kind == "between":
+        values, (low, high) = _typed(series, [node[2], node[3]])
+        mask = np.zeros(len(series), dtype=bool)
+        mask[present] = (values[present] >= low) & (values[present] <= high)
+    else:
+        raise PredicateError(f"Unsupported expression {kind!r}")
+    return mask, present & ~mask
+
+
+def compile_mask(text: str, frame: pd.DataFrame) -> np.ndarray:
+    """Evaluate e.g. `height > 10 AND use IN ('residential','mixed')` to a mask."""
+    return _evaluate(parse(text), frame)[0]
\ No newline at end of file
@@ -0,0 +1,275 @@
+import os
+import pickle
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from reflex.middleware import Middleware
+from reflex.utils.format import json_dumps
+
+payload_profiling = os.environ.get("PVGIS_PAYLOAD_PROFILE", "0") == "1"
+payload_budget_bytes = int(os.environ.get("PVGIS_PAYLOAD_BUDGET_KB", "256")) * 1024
+
+event_profiling = os.environ.get("PVGIS_EVENT_PROFILE", "0") == "1"
+event_sample_rate = float(os.environ.get("PVGIS_EVENT_PROFILE_RATE", "0.1"))
+sample_interval_s = float(os.environ.get("PVGIS_EVENT_PROFILE_INTERVAL_MS", "5")) / 1000
+max_profile_s = float(os.environ.get("PVGIS_EVENT_PROFILE_MAX_S", "60"))
+profile_dir = os.environ.get("PVGIS_PROFILE_DIR", "profiles")
+profile_ring_size = int(os.environ.get("PVGIS_PROFILE_RING", "50"))
+
+_lock = threading.Lock()
+_payload_stats: dict[tuple[str, str, str], dict] = {}
+_active_samplers: dict[tuple[str, str], "StackSampler"] = {}
+_recent_profiles: list[dict] = []
+_profile_seq = 0
+
+
+def short_name(full_name: str) -> str:
+    """`reflex___state____state.app___state____explore_state` -> `explore_state`."""
+    return full_name.rsplit(".", 1)[-1].rsplit("____", 1)[-1]
+
+
+def handler_name(event_name: str) -> str:
+    state_path, _, handler = event_name.rpartition(".")
+    return f"{short_name(state_path)}.{handler}"
+
+
+def _record(handler: str, var: str, kind: str, size: int, seconds: float):
+    with _lock:
+        stat = _payload_stats.get((handler, var, kind))
+        if stat is None:
+            stat = _payload_stats[(handler, var, kind)] = {
+                "handler": handler,
+                "var": var,
+                "kind": kind,
+                "count": 0,
+                "total_bytes": 0,
+                "max_bytes": 0,
+                "total_ms": 0.0,
+            }
+        stat["count"] += 1
+        stat["total_bytes"] += size
+        stat["max_bytes"] = max(stat["max_bytes"], size)
+        stat["total_ms"] += seconds * 1000
+
+
+def _measure(serialize, value) -> tuple[int, float]:
+    start = time.perf_counter()
+    try:
+        size = len(serialize(value))
+    except (
+        pickle.PicklingError,
+        TypeError,
+        ValueError,
+        AttributeError,
+        RecursionError,
+    ):
+        size = -1
+    return size, time.perf_counter() - start
+
+
+def _pickle(value) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _json(value) -> bytes:
+    return json_dumps(value).encode()
+
+
+class PayloadProfiler(Middleware):
+    """Record per-var delta (JSON) and session (pickle) sizes for each event,
+    plus the pickled size of each touched substate."""
+
+    async def preprocess(self, app, state, event):
+        return None
+
+    async def postprocess(self, app, state, event, update):
+        if not payload_profiling or not update.delta:
+            return update
+        handler = handler_name(event.name)
+        for state_name, delta in update.delta.items():
+            substate_name = short_name(state_name)
+            for var_name, value in delta.items():
+                size, seconds = _measure(_json, value)
+                var = f"{substate_name}.{var_name.removesuffix('_rx_state_')}"
+                _record(handler, var, "delta", size, seconds)
+            try:
+                substate = state.get_substate(state_name.split("."))
+            except ValueError:
+                continue
+            # What the state manager pickles: the substate as a whole, then
+            # each var in it, including the cached values of computed vars.
+            size, seconds = _measure(_pickle, substate)
+            _record(handler, f"{substate_name}.*", "session", size, seconds)
+            for key, value in substate.__getstate__().items():
+                var_name = key.removeprefix("__cached_").removesuffix("_rx_state_")
+                if (
+                    var_name not in substate.vars
+                    and var_name not in substate.backend_vars
+                ):
+                    continue
+                size, seconds = _measure(_pickle, value)
+                _record(
+                    handler, f"{substate_name}.{var_name}", "session", size, seconds
+                )
+        return update
+
+
+class StackSampler:
+    """Periodically sample one thread's Python stack into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval_s: float, max_duration_s: float = 300):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.max_duration_s = max_duration_s
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self.started
+
+    def _run(self):
+        deadline = time.perf_counter() + self.max_duration_s
+        while not self._stop.wait(self.interval_s) and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def _store_profile(handler: str, duration_s: float, sampler: StackSampler):
+    global _profile_seq
+    with _lock:
+        _profile_seq += 1
+        name = f"{_profile_seq:06d}-{handler.replace('.', '-')}.folded"
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, name), "w") as f:
+            f.write(sampler.collapsed())
+        _recent_profiles.append(
+            {
+                "handler": handler,
+                "duration_ms": round(duration_s * 1000, 1),
+                "samples": sum(sampler.stacks.values()),
+                "profile": name,
+                "timestamp": time.strftime("%H:%M:%S"),
+            }
+        )
+        while len(_recent_profiles) > profile_ring_size:
+            expired = _recent_profiles.pop(0)
+            try:
+                os.remove(os.path.join(profile_dir, expired["profile"]))
+            except OSError:
+                pass
+
+
+def _reap_samplers():
+    """Stop samplers whose event never reached a final update, e.g. because
+    its handler raised, so they do not stay registered."""
+    now = time.perf_counter()
+    for key, sampler in list(_active_samplers.items()):
+        if now - sampler.started > sampler.max_duration_s:
+            del _active_samplers[key]
+            sampler.stop()
+
+
+class EventProfiler(Middleware):
+    """Sample-profile a fraction of app events, including the computed-var
+    recomputation that happens before the final delta is postprocessed.
+
+    Samples are stacks of the event-loop thread, which every session's events
+    and background tasks share, so a profile also holds whatever else ran on
+    the loop while the event was in flight. Samplers left behind by events
+    that failed are dropped after max_profile_s."""
+
+    async def preprocess(self, app, state, event):
+        _reap_samplers()
+        if not event_profiling or random.random() >= event_sample_rate:
+            return
+        if "app___state" not in event.name:
+            return
+        try:
+            _, handler = state._get_event_handler(event)
+        except ValueError:
+            return
+        if handler.is_background:
+            return
+        sampler = StackSampler(threading.get_ident(), sample_interval_s, max_profile_s)
+        previous = _active_samplers.pop((event.token, event.name), None)
+        if previous is not None:
+            previous.stop()
+        _active_samplers[(event.token, event.name)] = sampler
+        sampler.start()
+
+    async def postprocess(self, app, state, event, update):
+        if not update.final:
+            return update
+        sampler = _active_samplers.pop((event.token, event.name), None)
+        if sampler is not None:
+            _store_profile(handler_name(event.name), sampler.stop(), sampler)
+        return update
+
+
+def slowest_profiles(limit: int = 20) -> list[dict]:
+    with _lock:
+        return sorted(_recent_profiles, key=lambda p: p["duration_ms"], reverse=True)[
+            :limit
+        ]
+
+
+def read_profile(name: str) -> str | None:
+    if os.path.basename(name) != name or not name.endswith(".folded"):
+        return None
+    try:
+        with open(os.path.join(profile_dir, name)) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def set_event_profiling(enabled: bool, sample_rate: float | None = None):
+    global event_profiling, event_sample_rate
+    event_profiling = enabled
+    if sample_rate is not None:
+        event_sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+
+def payload_offenders(limit: int = 25) -> list[dict]:
+    with _lock:
+        stats = sorted(
+            _payload_stats.values(), key=lambda s: s["max_bytes"], reverse=True
+        )[:limit]
+        return [
+            {
+                **s,
+                "mean_ms": round(s["total_ms"] / s["count"], 3),
+                "total_ms": round(s["total_ms"], 3),
+                "over_budget": s["max_bytes"] > payload_budget_bytes,
+            }
+            for s in stats
+        ]
+
+
+def set_payload_profiling(enabled: bool):
+    global payload_profiling
+    payload_profiling = enabled
+
+
+def reset_payload_stats():
+    with _lock:
+        _payload_stats.clear()
\ No newline at end of file
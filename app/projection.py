@@ -0,0 +1,95 @@
+import functools
+
+import numpy as np
+
+from app import metrics
+
+WGS84 = "EPSG:4326"
+# Largest scale error at the dataset centre for which a metre-based CRS is
+# used for areas and lengths as is (UTM zones, national grids).
+MAX_SCALE_ERROR = 0.01
+
+
+@functools.lru_cache(maxsize=32)
+def transformer(source, target):
+    """Process-wide `pyproj.Transformer` per (source, target) CRS; both may be
+    anything `pyproj.CRS` accepts, CRS objects hash by their WKT."""
+    from pyproj import Transformer
+
+    metrics.inc("transformer_cache_misses")
+    return Transformer.from_crs(source, target, always_xy=True)
+
+
+def is_wgs84(crs) -> bool:
+    return crs.equals(WGS84, ignore_axis_order=True)
+
+
+def is_metric(crs) -> bool:
+    return crs.is_projected and crs.axis_info[0].unit_name in ("metre", "meter")
+
+
+def is_local_metric(crs, lon: float, lat: float) -> bool:
+    """Whether `crs` is in metres and close to true scale at (lon, lat); global
+    projections such as Web Mercator are metre-based but inflate areas by
+    about 1/cos²(lat)."""
+    if not is_metric(crs):
+        return False
+    from pyproj import Proj
+
+    factors = Proj(crs).get_factors(lon, lat)
+    return (
+        max(abs(factors.meridional_scale - 1), abs(factors.parallel_scale - 1))
+        <= MAX_SCALE_ERROR
+    )
+
+
+def utm_crs(lon: float, lat: float) -> str:
+    zone = min(int((lon + 180) // 6) + 1, 60)
+    return f"EPSG:{32600 + zone if lat >= 0 else 32700 + zone}"
+
+
+def _apply(source, target, coords: np.ndarray) -> np.ndarray:
+    x, y = transformer(source, target).transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([x, y])
+
+
+def project(geometry: np.ndarray, crs) -> tuple[np.ndarray, np.ndarray, str]:
+    """Display (EPSG:4326) and local metric copies of `geometry` from one read
+    of its coordinates; transformed copies drop Z.
+
+    Data already in EPSG:4326 is not transformed for display, and data in a
+    local metre-based projection (see `is_local_metric`) is its own metric
+    copy. Otherwise the metric CRS is the UTM zone of the dataset centre.
+    Returns (display, metric, metric CRS).
+    """
+    import shapely
+
+    coords = shapely.get_coordinates(geometry)
+    with metrics.span("upload.to_crs"):
+        if is_wgs84(crs):
+            metrics.inc("reprojection_skipped")
+            lonlat = coords
+        else:
+            lonlat = _apply(crs, WGS84, coords)
+        lon, lat = np.nanmean(lonlat, axis=0) if len(lonlat) else (0.0, 0.0)
+        if is_local_metric(crs, lon, lat):
+            metric_crs, metric_coords = crs.to_string(), coords
+        else:
+            metric_crs = utm_crs(lon, lat)
+            metric_coords = _apply(WGS84, metric_crs, lonlat)
+    # Untransformed copies share the input geometries instead of rebuilding them.
+    display = (
+        geometry
+        if lonlat is coords
+        else shapely.set_coordinates(geometry.copy(), lonlat)
+    )
+    metric = (
+        geometry
+        if metric_coords is coords
+        else shapely.set_coordinates(geometry.copy(), metric_coords)
+    )
+    return display, metric, metric_crs
+
+
+def to_lonlat(points: np.ndarray, crs) -> np.ndarray:
+    return points if is_wgs84(crs) else _apply(crs, WGS84, points)
\ No newline at end of file
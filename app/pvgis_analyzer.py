@@ -1,27 +1,262 @@
+import asyncio
+import functools
+import hashlib
+import math
+import os
 import random
 import time
 
+import numpy as np
+
+from app import metrics, results_cache
+
+BACKEND = os.environ.get("PVGIS_ANALYZER", "mock")
+SEED = int(os.environ.get("PVGIS_ANALYZER_SEED", "0"))
+LATENCY = os.environ.get("PVGIS_ANALYZER_LATENCY", "uniform:0.1,0.3")
+SPIKES = os.environ.get("PVGIS_ANALYZER_SPIKES", "")
+ERROR_RATE = float(os.environ.get("PVGIS_ANALYZER_ERROR_RATE", "0"))
+# Bump when analyzer output changes so cached results from before are not reused.
+ANALYZER_VERSION = 1
+
+
+class AnalyzerError(RuntimeError):
+    pass
 
-def analyze_building(
-    lat: float, lon: float, tilt: float, azimuth: float, pv_kwp: float, losses: float
-) -> dict:
-    """Mock PVGIS analysis function."""
-    time.sleep(random.uniform(0.1, 0.3))
-    base_yield = 1100 + (40 - lat) * 15
-    specific_yield = base_yield + random.uniform(-50, 50)
-    total_production = specific_yield * pv_kwp
-    import math
 
+def _base_result(lat: float, noise: float, confidence: float) -> dict:
+    """Result normalized to 1 kWp and before system losses; `derive` scales
+    it to a system."""
+    specific_yield = (1100 + (40 - lat) * 15 + noise) / (1 - 0.14)
     monthly_series = []
     for i in range(12):
         month_factor = (1 - math.cos((i - 6) * math.pi / 6)) / 2
-        monthly_production = total_production / 12 * (0.7 + month_factor * 0.6)
-        monthly_series.append(round(monthly_production, 2))
+        monthly_series.append(specific_yield / 12 * (0.7 + month_factor * 0.6))
+    return {
+        "yield_kwh_per_kwp": specific_yield,
+        "monthly_kwh_per_kwp": monthly_series,
+        "confidence": confidence,
+        "dev_mode": True,
+    }
+
+
+class Latency:
+    """Response time distribution from a spec: `fixed:S`, `uniform:A,B` or
+    `lognormal:MEDIAN,SIGMA` (seconds), plus optional spikes `P,S` that add
+    S seconds to a fraction P of calls, e.g. `0.01,5` for a p99 tail."""
+
+    def __init__(self, spec: str, spikes: str = ""):
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if expected.get(kind) != len(values):
+            raise ValueError(f"Invalid analyzer latency {spec!r}.")
+        self.kind, self.values = kind, values
+        self.spike_rate, self.spike_s = (
+            [float(v) for v in spikes.split(",")] if spikes else (0.0, 0.0)
+        )
+
+    def sample(self, rng: np.random.Generator) -> float:
+        if self.kind == "fixed":
+            delay = self.values[0]
+        elif self.kind == "uniform":
+            delay = rng.uniform(*self.values)
+        else:
+            median, sigma = self.values
+            delay = rng.lognormal(math.log(median), sigma)
+        if rng.random() < self.spike_rate:
+            delay += self.spike_s
+        return float(delay)
+
+
+class MockBackend:
+    """Development mock: random output and latency on every call."""
+
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.rng = np.random.default_rng()
+
+    def call(self, lat: float, lon: float, tilt: float, azimuth: float):
+        noise = random.uniform(-50, 50)
+        confidence = round(random.uniform(0.85, 0.99), 2)
+        return self.latency.sample(self.rng), _base_result(lat, noise, confidence)
+
+
+class StandInBackend:
+    """Load-testing stand-in whose output, latency and injected failures are
+    drawn from a generator seeded with the seed and the call's inputs, so the
+    same inputs give the same outcome in every run and process; an input
+    picked for an injected error fails on every call."""
+
+    def __init__(self, seed: int, latency: Latency, error_rate: float):
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+
+    def call(self, lat: float, lon: float, tilt: float, azimuth: float):
+        key = f"{self.seed}|{location_key(lat, lon, tilt, azimuth)}"
+        digest = hashlib.sha256(key.encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+        delay = self.latency.sample(rng)
+        if rng.random() < self.error_rate:
+            return delay, AnalyzerError(f"Injected PVGIS error at {lat:.5f},{lon:.5f}")
+        noise = rng.uniform(-50, 50)
+        return delay, _base_result(lat, noise, round(rng.uniform(0.85, 0.99), 2))
+
+
+@functools.lru_cache(maxsize=1)
+def backend():
+    latency = Latency(LATENCY, SPIKES)
+    if BACKEND == "mock":
+        return MockBackend(latency)
+    if BACKEND == "standin":
+        return StandInBackend(SEED, latency, ERROR_RATE)
+    raise ValueError(f"Unknown PVGIS_ANALYZER backend {BACKEND!r}.")
+
+
+def _result(outcome):
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+
+def analyze_base(lat: float, lon: float, tilt: float, azimuth: float) -> dict:
+    """PVGIS analysis of one location and orientation by the configured
+    backend, normalized to 1 kWp and before system losses. Blocks for the
+    backend's latency; see `analyze_base_async` for event-loop callers."""
+    delay, outcome = backend().call(lat, lon, tilt, azimuth)
+    time.sleep(delay)
+    return _result(outcome)
+
+
+async def analyze_base_async(
+    lat: float, lon: float, tilt: float, azimuth: float
+) -> dict:
+    delay, outcome = backend().call(lat, lon, tilt, azimuth)
+    await asyncio.sleep(delay)
+    return _result(outcome)
+
+
+async def analyze_cached(
+    lat: float, lon: float, tilt: float, azimuth: float
+) -> tuple[dict, bool]:
+    """Base result from the results cache, or from the analyzer and then
+    cached; also returns whether it was a cache hit."""
+    key = cache_key(lat, lon, tilt, azimuth)
+    with metrics.span("analysis.cache_lookup"):
+        cached = await asyncio.to_thread(results_cache.get, key)
+    if cached is not None:
+        metrics.inc("analysis_cache_hits")
+        return cached, True
+    with metrics.span("analysis.analyzer"):
+        base = await analyze_base_async(lat, lon, tilt, azimuth)
+    metrics.inc("buildings_analyzed")
+    results_cache.put(key, base)
+    return base, False
+
+
+def location_key(lat: float, lon: float, tilt: float, azimuth: float) -> str:
+    return f"{lat:.5f},{lon:.5f}-{float(tilt)}-{float(azimuth)}"
+
+
+def cache_key(lat: float, lon: float, tilt: float, azimuth: float) -> str:
+    # Keyed on location, not building id, so results carry over between
+    # datasets and workers; system size and losses are applied on top. The
+    # backend, its seed and the analyzer version keep results from another
+    # source out of the shared cache.
+    source = f"{BACKEND}:{SEED}" if BACKEND == "standin" else BACKEND
+    return f"v{ANALYZER_VERSION}|{source}|{location_key(lat, lon, tilt, azimuth)}"
+
+
+def derive(base: dict, pv_kwp: float, losses: float) -> dict:
+    specific_yield = base["yield_kwh_per_kwp"] * (1 - losses / 100)
+    scale = pv_kwp * (1 - losses / 100)
     return {
-        "pv_potential_kwh": round(total_production, 2),
+        "pv_potential_kwh": round(specific_yield * pv_kwp, 2),
         "pv_kwp": pv_kwp,
         "yield_kwh_per_kwp": round(specific_yield, 2),
-        "confidence": round(random.uniform(0.85, 0.99), 2),
-        "monthly_series": monthly_series,
-        "dev_mode": True,
-    }
\ No newline at end of file
+        "confidence": base["confidence"],
+        "monthly_series": [round(m * scale, 2) for m in base["monthly_kwh_per_kwp"]],
+        "dev_mode": base["dev_mode"],
+    }
+
+
+def analyze_building(
+    lat: float, lon: float, tilt: float, azimuth: float, pv_kwp: float, losses: float
+) -> dict:
+    return derive(analyze_base(lat, lon, tilt, azimuth), pv_kwp, losses)
+
+
+class ResultSet:
+    """Base results of analyzed buildings in columns, plus the results derived
+    from them for one system size and loss figure.
+
+    Energy scales linearly with kWp and with (1 - losses), so `derive` re-sizes
+    every building with array arithmetic instead of new analyzer calls.
+    """
+
+    def __init__(self, pv_kwp: float, losses: float):
+        self.pv_kwp = pv_kwp
+        self.losses = losses
+        self.ids = np.empty(0, dtype=np.int64)
+        self.base_yield = np.empty(0)
+        self.base_monthly = np.empty((0, 12))
+        self.confidence = np.empty(0)
+        self.dev_mode = np.empty(0, dtype=bool)
+        self.yields = np.empty(0)
+        self.energy = np.empty(0)
+        self._rows: dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self):
+        capacity = max(64, 2 * len(self.ids))
+        for name in ("ids", "base_yield", "confidence", "dev_mode", "yields", "energy"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            setattr(self, name, grown)
+        monthly = np.empty((capacity, 12))
+        monthly[: self._size] = self.base_monthly[: self._size]
+        self.base_monthly = monthly
+
+    def add(self, building_id: int, base: dict):
+        row = self._rows.get(building_id)
+        if row is None:
+            if self._size == len(self.ids):
+                self._grow()
+            row = self._rows[building_id] = self._size
+            self._size += 1
+        self.ids[row] = building_id
+        self.base_yield[row] = base["yield_kwh_per_kwp"]
+        self.base_monthly[row] = base["monthly_kwh_per_kwp"]
+        self.confidence[row] = base["confidence"]
+        self.dev_mode[row] = base["dev_mode"]
+        factor = 1 - self.losses / 100
+        self.yields[row] = round(self.base_yield[row] * factor, 2)
+        self.energy[row] = round(self.base_yield[row] * factor * self.pv_kwp, 2)
+
+    def derive(self, pv_kwp: float, losses: float):
+        self.pv_kwp, self.losses = pv_kwp, losses
+        n, factor = self._size, 1 - losses / 100
+        self.yields[:n] = np.round(self.base_yield[:n] * factor, 2)
+        self.energy[:n] = np.round(self.base_yield[:n] * factor * pv_kwp, 2)
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Building ids and specific yields (kWh/kWp after losses)."""
+        return self.ids[: self._size], self.yields[: self._size]
+
+    def result(self, building_id: int) -> dict | None:
+        row = self._rows.get(building_id)
+        if row is None:
+            return None
+        scale = self.pv_kwp * (1 - self.losses / 100)
+        return {
+            "pv_potential_kwh": float(self.energy[row]),
+            "pv_kwp": self.pv_kwp,
+            "yield_kwh_per_kwp": float(self.yields[row]),
+            "confidence": float(self.confidence[row]),
+            "monthly_series": np.round(self.base_monthly[row] * scale, 2).tolist(),
+            "dev_mode": bool(self.dev_mode[row]),
+        }
\ No newline at end of file
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+ENABLED = os.environ.get("PVGIS_RESULTS_CACHE", "1") != "0"
+DB_PATH = os.environ.get("PVGIS_RESULTS_DB", "results_cache.sqlite")
+BATCH = 256
+BUSY_TIMEOUT_MS = 5000
+
+_local = threading.local()
+_writes: "queue.Queue[tuple[str, str] | None]" = queue.Queue()
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+    # WAL lets every worker read while one connection at a time writes.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+    return conn
+
+
+def _reader() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
+    return conn
+
+
+def get_many(keys: list[str]) -> dict[str, dict]:
+    """Cached results for those of `keys` any worker has stored."""
+    if not ENABLED or not keys:
+        return {}
+    found = {}
+    try:
+        conn = _reader()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+    except sqlite3.Error:
+        logger.exception("Results cache read failed")
+        return {}
+    metrics.inc("results_cache_hits", len(found))
+    metrics.inc("results_cache_misses", len(keys) - len(found))
+    return found
+
+
+def get(key: str) -> dict | None:
+    return get_many([key]).get(key)
+
+
+def _write_loop():
+    conn = _connect()
+    while True:
+        item = _writes.get()
+        batch = [item]
+        while len(batch) < BATCH:
+            try:
+                batch.append(_writes.get_nowait())
+            except queue.Empty:
+                break
+        rows = [row for row in batch if row is not None]
+        if rows:
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                        rows,
+                    )
+                metrics.inc("results_cache_writes", len(rows))
+            except sqlite3.Error:
+                logger.exception(f"Results cache write of {len(rows)} rows failed")
+        for _ in batch:
+            _writes.task_done()
+        if None in batch:
+            conn.close()
+            return
+
+
+def put(key: str, result: dict):
+    """Queue `result` for the single writer thread of this process, which
+    commits in batches so analysis never waits on the database lock."""
+    global _writer
+    if not ENABLED:
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=_write_loop, name="results-cache-writer", daemon=True
+            )
+            _writer.start()
+    _writes.put((key, json.dumps(result)))
+
+
+def flush():
+    """Wait until every queued result is committed."""
+    if _writer is not None and _writer.is_alive():
+        _writes.join()
+
+
+def close():
+    """Commit queued results, stop the writer and close this thread's reader,
+    so DB_PATH can point at another database."""
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        _writes.put(None)
+        _writer.join()
+    _writer = None
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
\ No newline at end of file
@@ -0,0 +1,93 @@
+import heapq
+import math
+
+import numpy as np
+
+SELECTED, VISIBLE, REST = 0, 1, 2
+VIEW_WIDTH_PX = 1024
+VIEW_HEIGHT_PX = 600
+
+
+def _spread(v: np.ndarray) -> np.ndarray:
+    v = v.astype(np.uint64)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+    return v
+
+
+def morton_order(points: np.ndarray) -> np.ndarray:
+    """Rank of each (lat, lon) point along a Z-order curve over their bounds,
+    so neighbouring ranks are spatially close; NaN points rank last."""
+    ranks = np.full(len(points), len(points), dtype=np.int64)
+    valid = ~np.isnan(points).any(axis=1)
+    if not valid.any():
+        return ranks
+    p = points[valid]
+    low, high = p.min(axis=0), p.max(axis=0)
+    cells = ((p - low) / np.maximum(high - low, 1e-12) * 65535).astype(np.uint32)
+    codes = _spread(cells[:, 0]) << np.uint64(1) | _spread(cells[:, 1])
+    order = np.argsort(codes, kind="stable")
+    ranks[np.flatnonzero(valid)[order]] = np.arange(len(order))
+    return ranks
+
+
+def viewport_bounds(lat: float, lng: float, zoom: float) -> tuple[dict, dict]:
+    """Approximate corners of a VIEW_WIDTH_PX x VIEW_HEIGHT_PX Web Mercator
+    map centred on (lat, lng), since the map only reports centre and zoom."""
+    half_lng = 360 / 2**zoom * VIEW_WIDTH_PX / 256 / 2
+    half_lat = half_lng * VIEW_HEIGHT_PX / VIEW_WIDTH_PX * math.cos(math.radians(lat))
+    return (
+        {"lat": max(lat - half_lat, -90.0), "lng": lng - half_lng},
+        {"lat": min(lat + half_lat, 90.0), "lng": lng + half_lng},
+    )
+
+
+class AnalysisQueue:
+    """Buildings of one analysis run in a heap keyed on (tier, spatial rank).
+
+    `prioritize` moves buildings between tiers while the run is going: it pushes
+    fresh entries and leaves the old ones in the heap, where `pop` skips them
+    because their tier no longer matches. Cost is proportional to the number
+    of buildings whose tier changes, not to the size of the run.
+    """
+
+    def __init__(self, building_ids: list[int], ranks: np.ndarray):
+        self._rank = dict(zip(building_ids, ranks[building_ids].tolist()))
+        self._tier = dict.fromkeys(building_ids, REST)
+        self._heap = [(REST, rank, b) for b, rank in self._rank.items()]
+        heapq.heapify(self._heap)
+        self._urgent: set[int] = set()
+        self.total = len(building_ids)
+
+    def __len__(self) -> int:
+        return len(self._tier)
+
+    def _set_tier(self, building_id: int, tier: int):
+        if self._tier.get(building_id, tier) != tier:
+            self._tier[building_id] = tier
+            heapq.heappush(self._heap, (tier, self._rank[building_id], building_id))
+
+    def prioritize(self, selected: int | None, visible):
+        """Analyze `selected` first, then the `visible` building ids, then the
+        rest; replaces the previous priorities."""
+        urgent = {b for b in visible if b in self._tier}
+        if selected is not None and selected in self._tier:
+            urgent.add(selected)
+        for building_id in self._urgent - urgent:
+            self._set_tier(building_id, REST)
+        for building_id in urgent:
+            self._set_tier(
+                building_id, SELECTED if building_id == selected else VISIBLE
+            )
+        self._urgent = urgent
+
+    def pop(self) -> int | None:
+        while self._heap:
+            tier, _, building_id = heapq.heappop(self._heap)
+            if self._tier.get(building_id) == tier:
+                del self._tier[building_id]
+                self._urgent.discard(building_id)
+                return building_id
+        return None
\ No newline at end of file
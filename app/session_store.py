@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+TTL_S = float(os.environ.get("PVGIS_SESSION_TTL_S", "3600"))
+MAX_BYTES = int(os.environ.get("PVGIS_SESSION_STORE_MB", "512")) * 1024 * 1024
+SPILL_DIR = os.environ.get("PVGIS_SESSION_SPILL_DIR", "")
+SAMPLE = 64
+
+_lock = threading.RLock()
+_entries: "OrderedDict[str, _Entry]" = OrderedDict()
+_bytes = 0
+
+
+class _Entry:
+    __slots__ = ("size", "spill", "touched", "value")
+
+    def __init__(self, value, size: int, spill: bool):
+        self.value = value
+        self.size = size
+        self.touched = time.monotonic()
+        self.spill = spill
+
+
+def sizeof(value, depth: int = 0) -> int:
+    """Approximate in-memory size; large containers are sampled."""
+    if isinstance(value, np.ndarray):
+        if value.dtype != object or not len(value):
+            return value.nbytes
+        sample = value[:SAMPLE]
+        return sum(sizeof(v, depth + 1) for v in sample) * len(value) // len(sample)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=False)))
+    if depth > 6:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.items())[:SAMPLE]
+        sampled = sum(sizeof(k, depth + 1) + sizeof(v, depth + 1) for k, v in items)
+        return sys.getsizeof(value) + sampled * len(value) // max(len(items), 1)
+    if isinstance(value, (list, tuple)):
+        sample = value[:SAMPLE]
+        sampled = sum(sizeof(v, depth + 1) for v in sample)
+        return sys.getsizeof(value) + sampled * len(value) // max(len(sample), 1)
+    if hasattr(value, "__dict__"):
+        return sizeof(vars(value), depth + 1)
+    return sys.getsizeof(value)
+
+
+def _spill_path(key: str) -> str:
+    return os.path.join(SPILL_DIR, hashlib.sha1(key.encode()).hexdigest() + ".pkl")
+
+
+def _spill(key: str, entry: _Entry):
+    path = _spill_path(key)
+    try:
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(entry.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        metrics.inc("session_store_spills")
+    except (OSError, pickle.PicklingError):
+        logger.exception(f"Could not spill session data {key}")
+
+
+def _remove(key: str):
+    global _bytes
+    entry = _entries.pop(key)
+    _bytes -= entry.size
+    return entry
+
+
+def _evict(keep: str | None = None):
+    """Drop entries idle for longer than TTL_S, then spill or drop the least
+    recently used ones until the store fits in MAX_BYTES. `keep` stays."""
+    now = time.monotonic()
+    while _entries:
+        key, entry = next(iter(_entries.items()))
+        if now - entry.touched < TTL_S:
+            break
+        _remove(key)
+        metrics.inc("session_store_expired")
+    for key in list(_entries):
+        if _bytes <= MAX_BYTES:
+            break
+        if key == keep:
+            continue
+        entry = _remove(key)
+        if entry.spill and SPILL_DIR:
+            _spill(key, entry)
+        metrics.inc("session_store_evictions")
+
+
+def put(key: str, value, size: int | None = None, spill: bool = True):
+    """Store `value` under `key`. Entries with `spill` go to SPILL_DIR (if set)
+    when evicted for memory; others are dropped and must be rebuilt."""
+    global _bytes
+    entry = _Entry(value, sizeof(value) if size is None else size, spill)
+    with _lock:
+        if key in _entries:
+            _remove(key)
+        _entries[key] = entry
+        _bytes += entry.size
+        _evict(keep=key)
+
+
+def get(key: str, default=None):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            entry.touched = time.monotonic()
+            _entries.move_to_end(key)
+            metrics.inc("session_store_hits")
+            return entry.value
+    if SPILL_DIR:
+        path = _spill_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) < TTL_S:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                os.remove(path)
+                put(key, value)
+                metrics.inc("session_store_unspills")
+                return value
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError):
+            logger.exception(f"Discarding unreadable spilled session data {key}")
+    metrics.inc("session_store_misses")
+    return default
+
+
+def drop(key: str):
+    with _lock:
+        if key in _entries:
+            _remove(key)
+    if SPILL_DIR:
+        try:
+            os.remove(_spill_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def stats() -> dict:
+    with _lock:
+        _evict()
+        return {"entries": len(_entries), "bytes": _bytes, "max_bytes": MAX_BYTES}
\ No newline at end of file
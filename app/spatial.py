@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class SpatialIndex:
+    """STR-tree over the footprints of one dataset (EPSG:4326).
+
+    Queries walk the tree to the candidate envelopes and only test those
+    candidates exactly, so cost grows with the number of hits rather than with
+    the dataset size. Results are sorted row positions.
+    """
+
+    def __init__(self, geometries: np.ndarray):
+        from shapely import STRtree
+
+        self.tree = STRtree(geometries)
+        self.n = len(geometries)
+
+    def query(self, shape) -> np.ndarray:
+        positions = self.tree.query(shape, predicate="intersects")
+        return np.sort(positions).astype(np.int32)
+
+    def rectangle(self, corner1: dict, corner2: dict) -> np.ndarray:
+        import shapely
+
+        return self.query(
+            shapely.box(
+                min(corner1["lng"], corner2["lng"]),
+                min(corner1["lat"], corner2["lat"]),
+                max(corner1["lng"], corner2["lng"]),
+                max(corner1["lat"], corner2["lat"]),
+            )
+        )
+
+    def polygon(self, points: list[dict]) -> np.ndarray:
+        import shapely
+
+        shape = shapely.make_valid(
+            shapely.Polygon([(p["lng"], p["lat"]) for p in points])
+        )
+        return self.query(shape)
\ No newline at end of file
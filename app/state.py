@@ -1,14 +1,43 @@
-import reflex as rx
-import reflex_enterprise as rxe
-from typing import TypedDict, Any, Literal
 import asyncio
-import zipfile
-import io
-import geopandas as gpd
-from shapely.geometry import box
-import os
+import contextlib
 import logging
-from reflex_enterprise.components.map.types import LatLng, latlng
+import os
+from typing import Any, Literal, TypedDict
+
+import numpy as np
+import reflex as rx
+
+from app import (
+    dataset_cache,
+    ingest,
+    metrics,
+    predicates,
+    profiling,
+    scheduler,
+    session_store,
+    workers,
+)
+from app.components.virtual_table import WINDOW_ROWS, window_offset
+from app.pvgis_analyzer import ResultSet
+from app.table import TableIndex
+
+logger = logging.getLogger(__name__)
+MAX_UPLOAD_FILES = 20
+MAX_MAP_FEATURES = int(os.environ.get("PVGIS_MAX_MAP_FEATURES", "2000"))
+BUILDING_MATCHES = 50
+SELECTION_PREVIEW = 50
+RECENT_STATUSES = 50
+
+
+class GeometryIssue(TypedDict):
+    feature: str
+    issues: str
+    action: str
+
+
+class GeometryReport(TypedDict):
+    counts: dict[str, int]
+    features: list[GeometryIssue]
 
 
 class DatasetSummary(TypedDict):
@@ -17,6 +46,14 @@ class DatasetSummary(TypedDict):
     crs: str | None
     bounds: tuple[float, float, float, float] | None
     schema: dict[str, str]
+    layers: list[str]
+    validation: GeometryReport
+
+
+class UploadPart(TypedDict):
+    name: str
+    stage: str
+    percent: int
 
 
 class SampleRow(TypedDict):
@@ -24,28 +61,16 @@ class SampleRow(TypedDict):
     data: dict[str, str | int | float | None]
 
 
-class PolygonGeometry(TypedDict):
-    type: Literal["Polygon"]
-    coordinates: list[list[list[float]]]
-
-
-class GeoJSONFeature(TypedDict):
-    type: Literal["Feature"]
-    properties: dict[str, str | int | float | None]
-    geometry: PolygonGeometry
+class LatLng(TypedDict):
+    lat: float
+    lng: float
 
 
 class MapFeature(TypedDict):
     id: int
-    properties: dict[str, str | int | float | None]
     positions: list[LatLng]
 
 
-class GeoJSON(TypedDict):
-    type: Literal["FeatureCollection"]
-    features: list[GeoJSONFeature]
-
-
 class PVResult(TypedDict):
     pv_potential_kwh: float
     pv_kwp: float
@@ -61,33 +86,138 @@ class BuildingStatus(TypedDict):
     message: str
 
 
+class HistogramBin(TypedDict):
+    index: int
+    start: float
+    end: float
+    count: int
+    label: str
+
+
+class BoxStats(TypedDict):
+    count: int
+    min: float
+    q1: float
+    median: float
+    q3: float
+    max: float
+    lower_whisker: float
+    upper_whisker: float
+    outlier_count: int
+
+
+class ScatterPoint(TypedDict):
+    index: int
+    building_id: int
+    y: float
+
+
+class BuildingSelection(TypedDict):
+    count: int
+    building_ids: list[int]
+
+
+_restoring: dict[str, asyncio.Task] = {}
+
+
+def _rebuild_dataset(dataset_key: str) -> dict | None:
+    artifacts = dataset_cache.load(dataset_key)
+    if artifacts is None:
+        logger.warning(f"Dataset {dataset_key} is no longer available.")
+        return None
+    dataset = ingest.build_dataset(artifacts)
+    session_store.put(f"dataset:{dataset_key}", dataset, spill=False)
+    return dataset
+
+
+async def _restore_dataset(dataset_key: str) -> dict | None:
+    """Rebuild a dataset from the dataset cache on a worker thread; computed
+    vars missing the same dataset at once share one rebuild."""
+    task = _restoring.get(dataset_key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(_rebuild_dataset, dataset_key))
+        _restoring[dataset_key] = task
+        task.add_done_callback(lambda _: _restoring.pop(dataset_key, None))
+    return await asyncio.shield(task)
+
+
 class AppState(rx.State):
     is_uploading: bool = False
     upload_progress: int = 0
+    upload_stage: str = ""
     upload_error: str = ""
+    upload_job: str = ""
+    upload_parts: list[UploadPart] = rx.field(default_factory=list)
+    upload_aoi: str = ""
+    upload_columns: str = ""
+    _uploads: list[tuple[str, str, str]] = rx.field(default_factory=list)
+    _upload_cancelled: bool = False
     dataset_summary: DatasetSummary | None = None
-    geojson_data: GeoJSON | None = None
-    sample_rows: list[SampleRow] = []
-    current_page: int = 1
-    rows_per_page: int = 10
-    analysis_results: dict[int, PVResult] = {}
-    analysis_cache: dict[str, PVResult] = {}
+    row_count: int = 0
+    preview_offset: int = 0
+    analysis_count: int = 0
+    results_version: int = 0
+    dataset_version: int = 0
+    _dataset_key: str = ""
+
+    async def _dataset(self) -> dict | None:
+        """Indexes and map data of the loaded dataset from the session store,
+        rebuilt from the dataset cache if this process does not hold them."""
+        if not self._dataset_key:
+            return None
+        dataset = session_store.get(f"dataset:{self._dataset_key}")
+        if dataset is None:
+            dataset = await _restore_dataset(self._dataset_key)
+        return dataset
+
+    async def _dataset_item(self, name: str):
+        dataset = await self._dataset()
+        return None if dataset is None else dataset[name]
+
+    def _analysis_results(self) -> ResultSet:
+        """This session's results, kept in the session store rather than in
+        state; empty until the first building is analyzed."""
+        # Read so computed vars calling this recompute when results change.
+        self.results_version  # noqa: B018
+        key = f"analysis_results:{self.router.session.client_token}"
+        results = session_store.get(key)
+        return ResultSet(0.0, 0.0) if results is None else results
+
+    def _store_results(self, results: ResultSet):
+        # Re-put so the store re-measures the grown set and keeps it recent.
+        session_store.put(
+            f"analysis_results:{self.router.session.client_token}", results
+        )
+        self.analysis_count = len(results)
+        self.results_version += 1
+
+    def _record_result(
+        self, building_id: int, base: dict, pv_kwp: float, losses: float
+    ) -> PVResult:
+        results = self._analysis_results()
+        if (results.pv_kwp, results.losses) != (pv_kwp, losses):
+            results.derive(pv_kwp, losses)
+        results.add(building_id, base)
+        self._store_results(results)
+        return results.result(building_id)
+
+    def _rederive_results(self, pv_kwp: float, losses: float):
+        results = self._analysis_results()
+        if len(results):
+            with metrics.span("analysis.rederive"):
+                results.derive(pv_kwp, losses)
+            self._store_results(results)
 
     @rx.var
     def is_data_loaded(self) -> bool:
         return self.dataset_summary is not None
 
     @rx.var
-    def total_pages(self) -> int:
-        if not self.sample_rows:
-            return 1
-        return (len(self.sample_rows) + self.rows_per_page - 1) // self.rows_per_page
-
-    @rx.var
-    def paginated_rows(self) -> list[SampleRow]:
-        start = (self.current_page - 1) * self.rows_per_page
-        end = start + self.rows_per_page
-        return self.sample_rows[start:end]
+    async def preview_rows(self) -> list[SampleRow]:
+        table_index = await self._dataset_item("table_index")
+        if table_index is None:
+            return []
+        return table_index.window(self.preview_offset, WINDOW_ROWS)
 
     @rx.var
     def attribute_columns(self) -> list[str]:
@@ -95,144 +225,243 @@ class AppState(rx.State):
             return []
         return list(self.dataset_summary["schema"].keys())
 
-    @rx.var
-    def geojson_features(self) -> list[GeoJSONFeature]:
-        if not self.geojson_data:
-            return []
-        return self.geojson_data.get("features", [])
-
-    @rx.var
-    def map_features(self) -> list[MapFeature]:
-        if not self.geojson_data:
-            return []
-        map_features_list = []
-        for feature in self.geojson_data.get("features", []):
-            try:
-                coords = feature["geometry"]["coordinates"][0]
-                positions = [latlng(lat=p[1], lng=p[0]) for p in coords]
-                map_features_list.append(
-                    {
-                        "id": feature["properties"]["id"],
-                        "properties": feature["properties"],
-                        "positions": positions,
-                    }
-                )
-            except (KeyError, IndexError) as e:
-                logging.exception(f"Skipping invalid feature for map: {e}")
-        return map_features_list
-
-    @rx.event
-    async def next_page(self):
-        explore_state = await self.get_state(ExploreState)
-        total_pages = self.total_pages
-        if self.router.page.path == "/explore":
-            total_pages = await self.get_var_value(explore_state.explore_total_pages)
-        if self.current_page < total_pages:
-            self.current_page += 1
-
     @rx.event
-    def prev_page(self):
-        if self.current_page > 1:
-            self.current_page -= 1
+    def scroll_preview(self, scroll_top: float):
+        offset = window_offset(scroll_top)
+        if offset != self.preview_offset:
+            self.preview_offset = offset
 
     @rx.event
     async def handle_upload(self, files: list[rx.UploadFile]):
         if not files:
             yield rx.toast.error("No file selected for upload.", duration=5000)
             return
+        if self.is_uploading:
+            yield rx.toast.info("An upload is already being processed.")
+            return
         self.is_uploading = True
         self.upload_progress = 0
+        self.upload_stage = "Receiving file"
         self.upload_error = ""
+        self._upload_cancelled = False
         self.dataset_summary = None
-        self.geojson_data = None
-        self.sample_rows = []
-        self.current_page = 1
+        self.row_count = 0
+        self._dataset_key = ""
+        self.preview_offset = 0
         yield
-        file = files[0]
-        if not file.name.lower().endswith(".zip"):
+        if len(files) > MAX_UPLOAD_FILES:
             self.is_uploading = False
-            self.upload_error = "Invalid file type. Please upload a .ZIP file."
+            self.upload_error = f"Upload at most {MAX_UPLOAD_FILES} files at once."
+            yield rx.toast.error(self.upload_error, duration=5000)
+            return
+        if not all(
+            file.name.lower().endswith(ingest.UPLOAD_EXTENSIONS) for file in files
+        ):
+            self.is_uploading = False
+            self.upload_error = (
+                "Invalid file type. Please upload zipped shapefiles, GeoPackage, "
+                "GeoParquet or FlatGeobuf files."
+            )
             yield rx.toast.error(self.upload_error, duration=5000)
             return
         try:
-            upload_data = await file.read()
-            self.upload_progress = 20
-            yield
-            await asyncio.sleep(0.5)
-            with zipfile.ZipFile(io.BytesIO(upload_data)) as zf:
-                required_ext = {".shp", ".shx", ".dbf", ".prj"}
-                found_ext = {os.path.splitext(f)[1].lower() for f in zf.namelist()}
-                if not required_ext.issubset(found_ext):
-                    missing = required_ext - found_ext
-                    self.is_uploading = False
-                    self.upload_error = (
-                        f"ZIP is missing required files: {', '.join(missing)}"
+            ingest.parse_aoi(self.upload_aoi)
+        except ingest.IngestError as e:
+            self.is_uploading = False
+            self.upload_error = str(e)
+            yield rx.toast.error(self.upload_error, duration=5000)
+            return
+        uploads = []
+        with metrics.span("upload.read"):
+            for file in sorted(files, key=lambda f: f.name):
+                path, digest = await dataset_cache.spool_hashed(file)
+                uploads.append((file.name, path, digest))
+        self._uploads = uploads
+        self.upload_progress = 10
+        yield AppState.process_upload
+
+    async def _set_upload_progress(self, stage: str, percent: int):
+        async with self:
+            self.upload_stage = stage
+            self.upload_progress = percent
+
+    async def _set_part_progress(self, updates: list[tuple[int, str, int]]):
+        async with self:
+            parts = list(self.upload_parts)
+            for index, stage, percent in updates:
+                parts[index] = {**parts[index], "stage": stage, "percent": percent}
+            self.upload_parts = parts
+            self.upload_progress = 10 + 65 * sum(p["percent"] for p in parts) // (
+                100 * len(parts)
+            )
+            if len(parts) == 1:
+                self.upload_stage = parts[0]["stage"]
+            else:
+                done = sum(p["percent"] >= 90 for p in parts)
+                self.upload_stage = f"Processing layers ({done}/{len(parts)})"
+
+    @rx.event(background=True)
+    async def process_upload(self):
+        async with self:
+            uploads = self._uploads
+            aoi = ingest.parse_aoi(self.upload_aoi)
+            columns = ingest.parse_columns(self.upload_columns)
+            self.upload_stage = "Checking dataset cache"
+        filename = ", ".join(name for name, _, _ in uploads)
+        digest = dataset_cache.dataset_key(
+            [digest for _, _, digest in uploads], aoi, columns
+        )
+        job = claim = None
+        try:
+            with metrics.span("upload.cache_load"):
+                artifacts = await asyncio.to_thread(dataset_cache.load, digest)
+                if artifacts is None:
+                    claim = await dataset_cache.claim_async(digest)
+                    # Another worker may have stored it while this one waited.
+                    artifacts = await asyncio.to_thread(dataset_cache.load, digest)
+            if artifacts is not None:
+                metrics.inc("dataset_cache_hits")
+            else:
+                layers = await asyncio.to_thread(ingest.plan_parts, uploads, aoi)
+                job = await asyncio.to_thread(workers.new_job)
+                async with self:
+                    self.upload_job = job.id
+                    self.upload_parts = [
+                        {
+                            "name": ingest.part_name(name, layer)
+                            + (f" rows {rows.start}-{rows.stop}" if rows else ""),
+                            "stage": "Queued",
+                            "percent": 0,
+                        }
+                        for name, _, layer, rows in layers
+                    ]
+                    if self._upload_cancelled or self._uploads != uploads:
+                        job.cancel()
+                with metrics.span("upload.process"):
+                    results = await workers.run_many(
+                        job,
+                        ingest.process_part,
+                        [(i, *layer, aoi, columns) for i, layer in enumerate(layers)],
+                        on_progress=self._set_part_progress,
                     )
-                    yield rx.toast.error(self.upload_error, duration=5000)
-                    return
-                self.upload_progress = 40
-                yield
-                shp_path = next(
-                    (f for f in zf.namelist() if f.lower().endswith(".shp"))
-                )
-                gdf = gpd.read_file(
-                    f"zip://{file.name}!{shp_path}",
-                    vfs="zip",
-                    zipfile=io.BytesIO(upload_data),
+                for _, worker_metrics in results:
+                    metrics.merge(worker_metrics)
+                await self._set_upload_progress("Merging layers", 75)
+                artifacts = await asyncio.to_thread(
+                    ingest.merge_parts, [part for part, _ in results], filename
                 )
-            self.upload_progress = 60
-            yield
-            await asyncio.sleep(0.5)
-            gdf_reprojected = gdf.to_crs(epsg=4326)
-            gdf_reprojected["id"] = range(len(gdf_reprojected))
-            bounds = gdf_reprojected.total_bounds
-            schema = {
-                col: str(gdf_reprojected[col].dtype)
-                for col in gdf_reprojected.columns
-                if col != "geometry"
-            }
-            self.dataset_summary = {
-                "filename": file.name,
-                "feature_count": len(gdf_reprojected),
-                "crs": str(gdf_reprojected.crs),
-                "bounds": (
-                    round(bounds[0], 4),
-                    round(bounds[1], 4),
-                    round(bounds[2], 4),
-                    round(bounds[3], 4),
-                ),
-                "schema": schema,
-            }
-            self.upload_progress = 80
-            yield
-            explore_state = await self.get_state(ExploreState)
-            explore_state.map_bounds = bounds
-            explore_state.selected_building_id = None
-            self.geojson_data = gdf_reprojected.__geo_interface__
-            for i, feature in enumerate(self.geojson_data["features"]):
-                feature["properties"]["id"] = i
-            all_rows_df = gdf_reprojected.drop(columns="geometry")
-            self.sample_rows = []
-            for i, row in all_rows_df.iterrows():
-                row_data = {k: str(v) for k, v in row.to_dict().items()}
-                self.sample_rows.append({"id": int(row_data["id"]), "data": row_data})
-            self.upload_progress = 100
-            yield
-            await asyncio.sleep(0.5)
-        except Exception as e:
-            logging.exception(f"File processing error: {e}")
-            self.is_uploading = False
-            self.upload_error = f"Processing failed: {e}"
-            yield rx.toast.error(
-                f"An unexpected error occurred during file processing.", duration=8000
+                await self._set_upload_progress("Caching dataset", 85)
+                with metrics.span("upload.cache_store"):
+                    await asyncio.to_thread(dataset_cache.store, digest, artifacts)
+            await self._set_upload_progress("Building indexes", 90)
+            dataset = await asyncio.to_thread(ingest.build_dataset, artifacts)
+            session_store.put(
+                f"dataset:{digest}", dataset, spill=not dataset_cache.ENABLED
             )
+            async with self:
+                if self._upload_cancelled or self._uploads != uploads:
+                    raise ingest.UploadCancelled()
+                explore_state = await self.get_state(ExploreState)
+                explore_state.map_bounds = ingest.total_bounds(artifacts["geometry"])
+                explore_state.selected_building_id = None
+                explore_state.table_offset = 0
+                explore_state._viewport = None
+                explore_state.clear_map_selection()
+                self.dataset_summary = {**artifacts["summary"], "filename": filename}
+                self.row_count = len(artifacts["geometry"])
+                self.dataset_version += 1
+                self._dataset_key = digest
+                self.upload_progress = 100
+                self.is_uploading = False
+                self.upload_job = ""
+                self.upload_parts = []
+            metrics.inc("uploads")
+            metrics.inc("features_loaded", len(artifacts["geometry"]))
+            yield rx.toast.success("Dataset processed successfully!", duration=5000)
+        except ingest.UploadCancelled:
+            async with self:
+                # cancel_upload resets an upload it found without a job, and
+                # a newer upload owns the fields now.
+                current = self._uploads == uploads
+                if current:
+                    self.is_uploading = False
+                    self.upload_job = ""
+                    self.upload_parts = []
+                    self.upload_progress = 0
+            if current:
+                yield rx.toast.info("Upload cancelled.")
+        except ingest.IngestError as e:
+            async with self:
+                current = self._uploads == uploads and not self._upload_cancelled
+                if current:
+                    self.is_uploading = False
+                    self.upload_job = ""
+                    self.upload_parts = []
+                    self.upload_error = str(e)
+            if current:
+                yield rx.toast.error(str(e), duration=5000)
+        except Exception as e:
+            logger.exception("File processing error")
+            metrics.inc("upload_errors")
+            async with self:
+                current = self._uploads == uploads and not self._upload_cancelled
+                if current:
+                    self.is_uploading = False
+                    self.upload_job = ""
+                    self.upload_parts = []
+                    self.upload_error = f"Processing failed: {e}"
+            if current:
+                yield rx.toast.error(
+                    "An unexpected error occurred during file processing.",
+                    duration=8000,
+                )
+        finally:
+            dataset_cache.release(claim)
+            if job is not None:
+                workers.release(job.id)
+            for _, path, _ in uploads:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @rx.event
+    def set_upload_aoi(self, value: str):
+        self.upload_aoi = value.strip()
+        try:
+            ingest.parse_aoi(self.upload_aoi)
+        except ingest.IngestError as e:
+            self.upload_error = str(e)
+        else:
+            self.upload_error = ""
+
+    @rx.event
+    def set_upload_columns(self, value: str):
+        self.upload_columns = ", ".join(ingest.parse_columns(value) or [])
+
+    @rx.event
+    def cancel_upload(self):
+        if not self.is_uploading:
             return
+        self._upload_cancelled = True
+        if self.upload_job and workers.cancel(self.upload_job):
+            # process_upload resets the upload once the workers stop.
+            self.upload_stage = "Cancelling"
+            return None
+        # No job to stop: processing has not reached the workers or is gone.
+        for _, path, _ in self._uploads:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+        self._uploads = []
         self.is_uploading = False
-        yield rx.toast.success("Shapefile processed successfully!", duration=5000)
+        self.upload_job = ""
+        self.upload_parts = []
+        self.upload_progress = 0
+        self.upload_stage = ""
+        return rx.toast.info("Upload cancelled.")
 
     @rx.event
     def open_map(self):
-        self.current_page = 1
         return rx.redirect("/explore")
 
 
@@ -243,132 +472,168 @@ class SidebarState(rx.State):
 
 
 class AnalysisState(rx.State):
-    analysis_mode: Literal["all", "single"] = "all"
+    analysis_mode: Literal["all", "single", "filtered", "selection"] = "all"
     selected_building_for_analysis: int | None = None
+    building_search: str = ""
     tilt: float = 35.0
     azimuth: float = 180.0
     pv_kwp: float = 5.0
     losses: float = 14.0
     is_analyzing: bool = False
     analysis_progress: int = 0
-    building_status: list[BuildingStatus] = []
+    analysis_total: int = 0
+    completed_count: int = 0
+    cached_count: int = 0
+    error_count: int = 0
+    # Only the last RECENT_STATUSES buildings; the counters cover the run.
+    building_status: list[BuildingStatus] = rx.field(default_factory=list)
     _stop_analysis_flag: bool = False
 
     @rx.var
-    async def building_ids_for_dropdown(self) -> list[int]:
+    async def building_id_matches(self) -> list[int]:
+        """The first BUILDING_MATCHES ids starting with the typed digits."""
         app_state = await self.get_state(AppState)
-        if not app_state.sample_rows:
+        table_index = await app_state._dataset_item("table_index")
+        if table_index is None:
             return []
-        return [row["id"] for row in app_state.sample_rows]
+        return table_index.store.ids_with_prefix(
+            self.building_search.strip(), BUILDING_MATCHES
+        )
 
     @rx.event
-    def set_analysis_mode(self, mode: Literal["all", "single"]):
+    def set_analysis_mode(
+        self, mode: Literal["all", "single", "filtered", "selection"]
+    ):
         self.analysis_mode = mode
 
+    @rx.event
+    def set_building_search(self, value: str):
+        self.building_search = value
+
     @rx.event
     def set_selected_building(self, building_id_str: str):
         if building_id_str:
             self.selected_building_for_analysis = int(building_id_str)
 
-    def _get_cache_key(self, building_id: int) -> str:
-        return f"{building_id}-{self.tilt}-{self.azimuth}-{self.pv_kwp}-{self.losses}"
+    async def _set_system(self, pv_kwp: float, losses: float):
+        self.pv_kwp, self.losses = pv_kwp, losses
+        app_state = await self.get_state(AppState)
+        app_state._rederive_results(pv_kwp, losses)
+
+    @rx.event
+    async def set_pv_kwp(self, value: str):
+        try:
+            await self._set_system(float(value), self.losses)
+        except ValueError:
+            return
+
+    @rx.event
+    async def set_losses(self, value: str):
+        try:
+            await self._set_system(self.pv_kwp, float(value))
+        except ValueError:
+            return
 
     @rx.event(background=True)
     async def start_analysis(self):
-        from app.pvgis_analyzer import analyze_building
+        from app.pvgis_analyzer import analyze_cached
 
         async with self:
             self.is_analyzing = True
             self.analysis_progress = 0
+            self.completed_count = self.cached_count = self.error_count = 0
             self.building_status = []
             self._stop_analysis_flag = False
             app_state = await self.get_state(AppState)
+            table_index = await app_state._dataset_item("table_index")
+            centroids = await app_state._dataset_item("centroids")
             buildings_to_analyze = []
-            if self.analysis_mode == "all":
-                buildings_to_analyze = app_state.sample_rows
-            elif self.selected_building_for_analysis is not None:
-                building = next(
-                    (
-                        row
-                        for row in app_state.sample_rows
-                        if row["id"] == self.selected_building_for_analysis
-                    ),
-                    None,
-                )
-                if building:
-                    buildings_to_analyze = [building]
+            if table_index is not None:
+                ids = table_index.store.ids
+                if self.analysis_mode == "all":
+                    buildings_to_analyze = ids.tolist()
+                elif self.analysis_mode == "filtered":
+                    explore = await self.get_state(ExploreState)
+                    positions = table_index.query(
+                        explore.table_filter, None, "asc", explore.table_predicate
+                    )
+                    buildings_to_analyze = ids[positions].tolist()
+                elif self.analysis_mode == "selection":
+                    explore = await self.get_state(ExploreState)
+                    buildings_to_analyze = ids[explore._selection()].tolist()
+                elif (
+                    self.selected_building_for_analysis is not None
+                    and self.selected_building_for_analysis in ids
+                ):
+                    buildings_to_analyze = [self.selected_building_for_analysis]
             if not buildings_to_analyze:
                 self.is_analyzing = False
                 yield rx.toast.error("No buildings selected for analysis.")
                 return
-        total_buildings = len(buildings_to_analyze)
-        for i, building_row in enumerate(buildings_to_analyze):
-            async with self:
+            queue = scheduler.AnalysisQueue(
+                buildings_to_analyze, scheduler.morton_order(centroids)
+            )
+            queue_key = f"analysis_queue:{self.router.session.client_token}"
+            session_store.put(queue_key, queue, spill=False)
+            explore = await self.get_state(ExploreState)
+            await explore._prioritize(queue)
+            self.analysis_total = len(queue)
+        total_buildings = len(queue)
+        for i in range(total_buildings):
+            async with metrics.locked(self):
                 if self._stop_analysis_flag:
                     self.is_analyzing = False
+                    session_store.drop(queue_key)
                     yield rx.toast.info("Analysis stopped by user.")
                     return
-                building_id = building_row["id"]
-                self.building_status.append(
+                building_id = queue.pop()
+                self.building_status = [
+                    *self.building_status[-(RECENT_STATUSES - 1) :],
                     {
                         "building_id": building_id,
                         "status": "Processing",
                         "message": "Starting...",
-                    }
-                )
-            yield
+                    },
+                ]
+            with metrics.span("analysis.state_yield"):
+                yield
             try:
-                cache_key = self._get_cache_key(building_id)
-                async with self:
-                    app_state = await self.get_state(AppState)
-                    if cache_key in app_state.analysis_cache:
-                        result = app_state.analysis_cache[cache_key]
-                        self.building_status[-1] = {
-                            "building_id": building_id,
-                            "status": "Cached",
-                            "message": "Result from cache.",
-                        }
-                        app_state.analysis_results[building_id] = result
-                        self.analysis_progress = int((i + 1) / total_buildings * 100)
-                        yield
-                        continue
-                feature = next(
-                    (
-                        f
-                        for f in app_state.geojson_data["features"]
-                        if f["properties"]["id"] == building_id
-                    ),
-                    None,
-                )
-                if not feature or feature["geometry"]["type"] != "Polygon":
+                if centroids is None or np.isnan(centroids[building_id, 0]):
                     raise ValueError("Building geometry not found or invalid.")
-                coords = feature["geometry"]["coordinates"][0]
-                lon = sum((p[0] for p in coords)) / len(coords)
-                lat = sum((p[1] for p in coords)) / len(coords)
-                result = analyze_building(
-                    lat, lon, self.tilt, self.azimuth, self.pv_kwp, self.losses
-                )
-                async with self:
+                lat, lon = centroids[building_id].tolist()
+                base, cached = await analyze_cached(lat, lon, self.tilt, self.azimuth)
+                async with metrics.locked(self):
                     app_state = await self.get_state(AppState)
-                    app_state.analysis_results[building_id] = result
-                    app_state.analysis_cache[cache_key] = result
+                    result = app_state._record_result(
+                        building_id, base, self.pv_kwp, self.losses
+                    )
+                    if cached:
+                        self.cached_count += 1
+                    else:
+                        self.completed_count += 1
                     self.building_status[-1] = {
                         "building_id": building_id,
-                        "status": "Completed",
-                        "message": f"{result['pv_potential_kwh']:,} kWh/yr",
+                        "status": "Cached" if cached else "Completed",
+                        "message": "Result from cache."
+                        if cached
+                        else f"{result['pv_potential_kwh']:,} kWh/yr",
                     }
             except Exception as e:
-                logging.exception(f"Analysis for building {building_id} failed: {e}")
-                async with self:
+                logger.exception(f"Analysis for building {building_id} failed")
+                metrics.inc("analysis_errors")
+                async with metrics.locked(self):
+                    self.error_count += 1
                     self.building_status[-1] = {
                         "building_id": building_id,
                         "status": "Error",
                         "message": str(e),
                     }
             finally:
-                async with self:
+                async with metrics.locked(self):
                     self.analysis_progress = int((i + 1) / total_buildings * 100)
-                yield
+                with metrics.span("analysis.state_yield"):
+                    yield
+        session_store.drop(queue_key)
         async with self:
             self.is_analyzing = False
             yield rx.toast.success("Analysis complete!")
@@ -378,99 +643,317 @@ class AnalysisState(rx.State):
         self._stop_analysis_flag = True
 
 
+class ResultsState(rx.State):
+    histogram_bin_count: int = 30
+    max_scatter_points: int = int(os.environ.get("PVGIS_MAX_SCATTER_POINTS", "2000"))
+    selected_bin: int | None = None
+    selected_building: int | None = None
+    selection_label: str = ""
+
+    @rx.var
+    async def yield_histogram(self) -> list[HistogramBin]:
+        from app.chart_data import histogram_bins, yield_arrays
+
+        app_state = await self.get_state(AppState)
+        _, values = yield_arrays(app_state._analysis_results())
+        return histogram_bins(values, self.histogram_bin_count)
+
+    @rx.var
+    async def yield_box_stats(self) -> BoxStats | None:
+        from app.chart_data import box_stats, yield_arrays
+
+        app_state = await self.get_state(AppState)
+        _, values = yield_arrays(app_state._analysis_results())
+        return box_stats(values)
+
+    @rx.var
+    async def yield_scatter(self) -> list[ScatterPoint]:
+        from app.chart_data import downsample_scatter, yield_arrays
+
+        app_state = await self.get_state(AppState)
+        ids, values = yield_arrays(app_state._analysis_results())
+        return downsample_scatter(ids, values, self.max_scatter_points)
+
+    @rx.var
+    async def selection(self) -> BuildingSelection:
+        """Size of the chart selection and the first SELECTION_PREVIEW ids,
+        resolved from the results so the full id list stays on the server."""
+        from app.chart_data import ValueIndex, yield_arrays
+
+        if self.selected_building is not None:
+            return {"count": 1, "building_ids": [self.selected_building]}
+        if self.selected_bin is None:
+            return {"count": 0, "building_ids": []}
+        app_state = await self.get_state(AppState)
+        index = ValueIndex(*yield_arrays(app_state._analysis_results()))
+        count, building_ids = index.ids_in_bin(
+            self.selected_bin, self.histogram_bin_count, SELECTION_PREVIEW
+        )
+        return {"count": count, "building_ids": building_ids}
+
+    @rx.event
+    async def select_histogram_bin(self, bin_index: int):
+        bins = await self.get_var_value(self.yield_histogram)
+        if 0 <= bin_index < len(bins):
+            self.selected_bin = bin_index
+            self.selected_building = None
+            self.selection_label = f"{bins[bin_index]['label']} kWh/kWp"
+
+    @rx.event
+    async def select_scatter_point(self, point_index: int):
+        points = await self.get_var_value(self.yield_scatter)
+        if 0 <= point_index < len(points):
+            building_id = points[point_index]["building_id"]
+            self.selected_bin = None
+            self.selected_building = building_id
+            self.selection_label = f"Building {building_id}"
+
+    @rx.event
+    def clear_selection(self):
+        self.selected_bin = None
+        self.selected_building = None
+        self.selection_label = ""
+
+
+class StageMetric(TypedDict):
+    stage: str
+    count: int
+    total_s: float
+    mean_ms: float
+    max_ms: float
+
+
+class CounterMetric(TypedDict):
+    name: str
+    value: float
+
+
+class PayloadStat(TypedDict):
+    handler: str
+    var: str
+    kind: str
+    count: int
+    total_bytes: int
+    max_bytes: int
+    total_ms: float
+    mean_ms: float
+    over_budget: bool
+
+
+class EventProfile(TypedDict):
+    handler: str
+    duration_ms: float
+    samples: int
+    profile: str
+    timestamp: str
+
+
+class AdminState(rx.State):
+    metrics_enabled: bool = metrics.ENABLED
+    stage_metrics: list[StageMetric] = rx.field(default_factory=list)
+    counter_metrics: list[CounterMetric] = rx.field(default_factory=list)
+    payload_profiling: bool = profiling.payload_profiling
+    payload_budget_kb: int = profiling.payload_budget_bytes // 1024
+    payload_offenders: list[PayloadStat] = rx.field(default_factory=list)
+    event_profiling: bool = profiling.event_profiling
+    event_sample_rate: float = profiling.event_sample_rate
+    slow_events: list[EventProfile] = rx.field(default_factory=list)
+
+    @rx.event
+    def refresh_metrics(self):
+        self.stage_metrics, self.counter_metrics = metrics.summary()
+        self.payload_profiling = profiling.payload_profiling
+        self.payload_offenders = profiling.payload_offenders()
+        self.event_profiling = profiling.event_profiling
+        self.slow_events = profiling.slowest_profiles()
+
+    @rx.event
+    def toggle_payload_profiling(self):
+        profiling.set_payload_profiling(not profiling.payload_profiling)
+        self.payload_profiling = profiling.payload_profiling
+
+    @rx.event
+    def toggle_event_profiling(self):
+        profiling.set_event_profiling(not profiling.event_profiling)
+        self.event_profiling = profiling.event_profiling
+
+    @rx.event
+    def set_event_sample_rate(self, value: str):
+        try:
+            rate = float(value)
+        except ValueError:
+            return
+        profiling.set_event_profiling(profiling.event_profiling, rate)
+        self.event_sample_rate = profiling.event_sample_rate
+
+    @rx.event
+    def reset_payload_stats(self):
+        profiling.reset_payload_stats()
+        self.payload_offenders = []
+
+    @rx.event
+    def reset_metrics(self):
+        metrics.reset()
+        self.stage_metrics, self.counter_metrics = metrics.summary()
+
+
 class ExploreState(rx.State):
     selected_building_id: int | None = None
     table_filter: str = ""
-    layer_visibility: dict[str, bool] = {"buildings": True, "pv_potential": False}
-    map_center: LatLng = latlng(lat=39.8283, lng=-98.5795)
+    table_predicate: str = ""
+    predicate_error: str = ""
+    layer_visibility: dict[str, bool] = rx.field(
+        default_factory=lambda: {"buildings": True, "pv_potential": False}
+    )
+    map_center: LatLng = LatLng(lat=39.8283, lng=-98.5795)
     map_zoom: float = 4.0
     map_bounds: tuple[float, float, float, float] | None = None
     table_sort_column: str | None = None
     table_sort_direction: str = "asc"
+    table_offset: int = 0
+    selection_tool: Literal["none", "rectangle", "polygon"] = "none"
+    draw_points: list[LatLng] = rx.field(default_factory=list)
+    selection_shape: list[LatLng] = rx.field(default_factory=list)
+    selection_count: int = 0
+    _viewport: tuple[float, float, float] | None = None
+
+    async def _prioritize(self, queue: scheduler.AnalysisQueue | None = None):
+        """Move the selected building and those in view to the front of the
+        running analysis, if there is one."""
+        if queue is None:
+            queue = session_store.get(
+                f"analysis_queue:{self.router.session.client_token}"
+            )
+            if queue is None:
+                return
+        visible = []
+        if self._viewport is not None:
+            app_state = await self.get_state(AppState)
+            spatial_index = await app_state._dataset_item("spatial_index")
+            if spatial_index is not None:
+                positions = spatial_index.rectangle(
+                    *scheduler.viewport_bounds(*self._viewport)
+                )
+                ids = (await app_state._dataset_item("table_index")).store.ids
+                visible = ids[positions].tolist()
+        with metrics.span("analysis.prioritize"):
+            queue.prioritize(self.selected_building_id, visible)
+
+    @rx.event
+    async def set_viewport(self, event: dict[str, Any]):
+        center = event.get("last_center")
+        if not center:
+            return
+        self._viewport = (center["lat"], center["lng"], event["target"]["zoom"])
+        await self._prioritize()
+
+    def _selection(self) -> np.ndarray:
+        """Row positions of the map selection, kept in the session store."""
+        # Read so computed vars calling this recompute when the selection changes.
+        self.selection_count  # noqa: B018
+        key = f"selection:{self.router.session.client_token}"
+        return session_store.get(key, np.array([], dtype=np.int32))
+
+    def _set_selection(self, positions: np.ndarray):
+        key = f"selection:{self.router.session.client_token}"
+        session_store.put(key, positions)
+        self.selection_count = len(positions)
 
     @rx.var
-    def map_bounds_for_map(self) -> rxe.map.LatLngBounds | None:
-        from reflex_enterprise.components.map.types import latlng, LatLngBounds
+    async def map_features(self) -> list[MapFeature]:
+        """Footprints in the current view, thinned evenly to MAX_MAP_FEATURES,
+        so state holds a bounded slice of the dataset rather than all of it."""
+        app_state = await self.get_state(AppState)
+        spatial_index = await app_state._dataset_item("spatial_index")
+        if spatial_index is None:
+            return []
+        if self._viewport is None:
+            positions = np.arange(spatial_index.n)
+        else:
+            positions = spatial_index.rectangle(
+                *scheduler.viewport_bounds(*self._viewport)
+            )
+        if len(positions) > MAX_MAP_FEATURES:
+            positions = positions[:: -(-len(positions) // MAX_MAP_FEATURES)]
+        return ingest.build_map_features(
+            await app_state._dataset_item("geometry"), positions
+        )
 
+    @rx.var
+    def map_bounds_for_map(self) -> list[list[float]] | None:
         if not self.map_bounds:
             return None
         b = self.map_bounds
-        return LatLngBounds(
-            corner1=latlng(lat=b[1], lng=b[0]), corner2=latlng(lat=b[3], lng=b[2])
-        )
+        return [[b[1], b[0]], [b[3], b[2]]]
 
-    @rx.var
-    async def filtered_rows(self) -> list[SampleRow]:
-        app_state = await self.get_state(AppState)
-        rows = app_state.sample_rows
-        if not self.table_filter:
-            return rows
-        search_term = self.table_filter.lower()
-        return [
-            row
-            for row in rows
-            if any((search_term in str(val).lower() for val in row["data"].values()))
-        ]
-
-    def _sort_key(self, row):
-        val = row["data"].get(self.table_sort_column)
-        if val is None:
-            return -float("inf") if self.table_sort_direction == "asc" else float("inf")
-        try:
-            return float(val)
-        except (ValueError, TypeError) as e:
-            logging.exception(f"Could not convert {val} to float: {e}")
-            return str(val)
+    def _query_positions(self, table_index: TableIndex | None) -> list[int]:
+        if table_index is None:
+            return []
+        return table_index.query(
+            self.table_filter,
+            self.table_sort_column,
+            self.table_sort_direction,
+            self.table_predicate,
+        )
 
-    @rx.var
-    async def sorted_and_filtered_rows(self) -> list[SampleRow]:
-        rows = await self.get_var_value(self.filtered_rows)
-        if not self.table_sort_column:
-            return rows
-        try:
-            return sorted(
-                rows, key=self._sort_key, reverse=self.table_sort_direction == "desc"
-            )
-        except Exception as e:
-            logging.exception(f"Error sorting table: {e}")
-            return rows
+    def _window(self, table_index: TableIndex | None) -> list[SampleRow]:
+        if table_index is None:
+            return []
+        return table_index.window(
+            self.table_offset,
+            WINDOW_ROWS,
+            self.table_filter,
+            self.table_sort_column,
+            self.table_sort_direction,
+            self.table_predicate,
+        )
 
     @rx.var
-    async def current_page(self) -> int:
+    async def visible_explore_rows(self) -> list[SampleRow]:
         app_state = await self.get_state(AppState)
-        return app_state.current_page
+        return self._window(await app_state._dataset_item("table_index"))
 
     @rx.var
-    async def rows_per_page(self) -> int:
+    async def explore_row_count(self) -> int:
         app_state = await self.get_state(AppState)
-        return app_state.rows_per_page
+        return len(self._query_positions(await app_state._dataset_item("table_index")))
 
     @rx.var
-    async def paginated_explore_rows(self) -> list[SampleRow]:
-        sorted_rows = await self.get_var_value(self.sorted_and_filtered_rows)
-        page = await self.get_var_value(self.current_page)
-        per_page = await self.get_var_value(self.rows_per_page)
-        start = (page - 1) * per_page
-        end = start + per_page
-        return sorted_rows[start:end]
+    def table_view_key(self) -> str:
+        """Changes with the query, so the scroll area remounts at the top."""
+        return f"{self.table_filter}|{self.table_predicate}|{self.table_sort_column}|{self.table_sort_direction}"
 
-    @rx.var
-    async def explore_total_pages(self) -> int:
-        filtered_rows = await self.get_var_value(self.filtered_rows)
-        per_page = await self.get_var_value(self.rows_per_page)
-        if not filtered_rows:
-            return 1
-        return (len(filtered_rows) + per_page - 1) // per_page
+    @rx.event
+    def scroll_table(self, scroll_top: float):
+        offset = window_offset(scroll_top)
+        if offset != self.table_offset:
+            self.table_offset = offset
 
     @rx.event
-    async def next_page(self):
-        app_state = await self.get_state(AppState)
-        return app_state.next_page
+    def set_table_filter(self, value: str):
+        self.table_filter = value
+        self.table_offset = 0
 
     @rx.event
-    async def prev_page(self):
+    async def apply_predicate(self, form_data: dict):
+        predicate = form_data.get("predicate", "").strip()
         app_state = await self.get_state(AppState)
-        return app_state.prev_page
+        table_index = await app_state._dataset_item("table_index")
+        if predicate and table_index is not None:
+            try:
+                table_index.where(predicate)
+            except predicates.PredicateError as e:
+                self.predicate_error = str(e)
+                return
+        self.table_predicate = predicate
+        self.predicate_error = ""
+        self.table_offset = 0
+
+    @rx.event
+    def clear_predicate(self):
+        self.table_predicate = ""
+        self.predicate_error = ""
+        self.table_offset = 0
 
     @rx.event
     def toggle_layer(self, layer_name: str):
@@ -478,35 +961,76 @@ class ExploreState(rx.State):
         yield rx.toast.info(f"{layer_name.title()} layer toggled.")
 
     @rx.event
-    def select_building_from_map(self, feature_id: int):
+    def set_selection_tool(self, tool: Literal["none", "rectangle", "polygon"]):
+        self.selection_tool = tool
+        self.draw_points = []
+
+    @rx.event
+    def add_draw_point(self, event: dict[str, Any]):
+        if self.selection_tool == "none":
+            return
+        point = LatLng(lat=event["latlng"]["lat"], lng=event["latlng"]["lng"])
+        self.draw_points.append(point)
+        if self.selection_tool == "rectangle" and len(self.draw_points) == 2:
+            return ExploreState.finish_selection
+
+    @rx.event
+    async def finish_selection(self):
+        points = self.draw_points
+        app_state = await self.get_state(AppState)
+        spatial_index = await app_state._dataset_item("spatial_index")
+        if spatial_index is None:
+            return
+        if self.selection_tool == "rectangle" and len(points) == 2:
+            a, b = points
+            with metrics.span("explore.spatial_query"):
+                positions = spatial_index.rectangle(a, b)
+            self.selection_shape = [
+                LatLng(lat=a["lat"], lng=a["lng"]),
+                LatLng(lat=a["lat"], lng=b["lng"]),
+                LatLng(lat=b["lat"], lng=b["lng"]),
+                LatLng(lat=b["lat"], lng=a["lng"]),
+            ]
+        elif self.selection_tool == "polygon" and len(points) >= 3:
+            with metrics.span("explore.spatial_query"):
+                positions = spatial_index.polygon(points)
+            self.selection_shape = list(points)
+        else:
+            return rx.toast.error("A polygon selection needs at least 3 points.")
+        self._set_selection(positions)
+        self.selection_tool = "none"
+        self.draw_points = []
+        return rx.toast.info(f"{self.selection_count} buildings selected.")
+
+    @rx.event
+    def clear_map_selection(self):
+        self.selection_tool = "none"
+        self.draw_points = []
+        self.selection_shape = []
+        self._set_selection(np.array([], dtype=np.int32))
+
+    @rx.event
+    async def select_building_from_map(self, feature_id: int):
+        if self.selection_tool != "none":
+            return
         self.selected_building_id = feature_id
+        await self._prioritize()
         yield rx.toast.info(f"Building {feature_id} selected.")
 
     @rx.event
     async def select_building_from_table(self, row: SampleRow):
         self.selected_building_id = row["id"]
+        await self._prioritize()
         app_state = await self.get_state(AppState)
-        if app_state.geojson_data:
-            feature = next(
-                (
-                    f
-                    for f in app_state.geojson_data["features"]
-                    if f["properties"].get("id") == row["id"]
-                ),
-                None,
-            )
-            if feature and feature["geometry"]["type"] == "Polygon":
-                coords = feature["geometry"]["coordinates"][0]
-                lats = [c[1] for c in coords]
-                lons = [c[0] for c in coords]
-                centroid_lat = sum(lats) / len(lats)
-                centroid_lon = sum(lons) / len(lons)
-                self.map_center = latlng(lat=centroid_lat, lng=centroid_lon)
-                self.map_zoom = 18.0
-                yield rx.toast.info(f"Zooming to Building {row['id']}")
-
-    @rx.event
-    async def sort_table(self, column_name: str):
+        centroids = await app_state._dataset_item("centroids")
+        if centroids is not None and not np.isnan(centroids[row["id"], 0]):
+            centroid_lat, centroid_lon = centroids[row["id"]].tolist()
+            self.map_center = LatLng(lat=centroid_lat, lng=centroid_lon)
+            self.map_zoom = 18.0
+            yield rx.toast.info(f"Zooming to Building {row['id']}")
+
+    @rx.event
+    def sort_table(self, column_name: str):
         if self.table_sort_column == column_name:
             self.table_sort_direction = (
                 "asc" if self.table_sort_direction == "desc" else "desc"
@@ -514,6 +1038,4 @@ class ExploreState(rx.State):
         else:
             self.table_sort_column = column_name
             self.table_sort_direction = "asc"
-        app_state = await self.get_state(AppState)
-        app_state.current_page = 1
-        yield
\ No newline at end of file
+        self.table_offset = 0
\ No newline at end of file
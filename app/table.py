@@ -0,0 +1,318 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app import predicates
+
+
+def _code_points(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+class SearchIndex:
+    """Inverted index from distinct lowercased cell values to row positions.
+
+    Each distinct value is stored once in a newline-joined vocabulary, kept as
+    an array of code points, so a substring query is a vectorized scan of the
+    vocabulary (not of every cell), and a prefix query is a binary search over
+    the sorted vocabulary. Postings are kept in CSR form (`indptr`, `rows`).
+    Null cells are not indexed.
+    """
+
+    def __init__(self, vocab: np.ndarray, indptr: np.ndarray, rows: np.ndarray, n: int):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.rows = rows
+        self.n = n
+        self._chars = _code_points("\n".join(vocab.tolist()))
+        self._starts = np.concatenate(
+            ([0], np.cumsum([len(v) + 1 for v in vocab], dtype=np.int64))
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SearchIndex":
+        n = len(df)
+        labels, column_codes, column_rows, offset = [], [], [], 0
+        for col in df.columns:
+            codes, uniques = pd.factorize(df[col])
+            present = codes >= 0
+            labels.extend(str(u).lower().replace("\n", " ") for u in uniques)
+            column_codes.append(codes[present] + offset)
+            column_rows.append(np.flatnonzero(present).astype(np.int32))
+            offset += len(uniques)
+        if not labels:
+            return cls(
+                np.array([], dtype=object),
+                np.zeros(1, np.int64),
+                np.array([], np.int32),
+                n,
+            )
+        vocab, inverse = np.unique(np.array(labels, dtype=object), return_inverse=True)
+        flat = inverse[np.concatenate(column_codes)]
+        if len(vocab) <= 1 << 16:
+            # numpy radix-sorts 16-bit keys when a stable sort is requested
+            order = np.argsort(flat.astype(np.uint16), kind="stable")
+        else:
+            order = np.argsort(flat)
+        rows = np.concatenate(column_rows)[order]
+        indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(flat, minlength=len(vocab))))
+        )
+        return cls(vocab, indptr, rows, n)
+
+    def _substring_ids(self, term: str) -> np.ndarray:
+        chars, pattern = self._chars, _code_points(term)
+        # Offsets of the first character, narrowed by each following one.
+        hits = np.flatnonzero(
+            chars[: max(len(chars) - len(pattern) + 1, 0)] == pattern[0]
+        )
+        for j in range(1, len(pattern)):
+            hits = hits[chars[hits + j] == pattern[j]]
+        return np.unique(np.searchsorted(self._starts, hits, side="right") - 1)
+
+    def _prefix_ids(self, term: str) -> np.ndarray:
+        lo = np.searchsorted(self.vocab, term, side="left")
+        hi = np.searchsorted(self.vocab, term + "\uffff", side="left")
+        return np.arange(lo, hi)
+
+    def positions(self, vocab_ids: np.ndarray) -> np.ndarray:
+        starts = self.indptr[vocab_ids]
+        lengths = self.indptr[vocab_ids + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.array([], dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.rows[offsets + np.arange(total)]] = True
+        return np.flatnonzero(mask)
+
+    def search(self, term: str, prefix: bool = False) -> np.ndarray:
+        term = term.lower()
+        if not term:
+            return np.arange(self.n)
+        ids = self._prefix_ids(term) if prefix else self._substring_ids(term)
+        return self.positions(ids)
+
+
+class SortIndex:
+    """Typed columns with lazily computed, cached sort permutations.
+
+    Column types are inferred once: numeric dtypes, and text columns whose
+    values all parse as numbers, sort numerically; everything else sorts as
+    text. Nulls always sort last, so a descending order is the reversed
+    non-null part of the ascending one.
+    """
+
+    def __init__(self, values: dict[str, np.ndarray], nulls: dict[str, np.ndarray]):
+        self.values = values
+        self.nulls = nulls
+        self._orders: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SortIndex":
+        values, nulls = {}, {}
+        for col in df.columns:
+            series = df[col]
+            null = series.isna().to_numpy()
+            if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(
+                series
+            ):
+                numeric = pd.to_numeric(series, errors="coerce")
+                if (numeric.isna().to_numpy() == null).all() and not null.all():
+                    series = numeric
+            if pd.api.types.is_numeric_dtype(series):
+                values[col] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                values[col] = series.astype(str).to_numpy(dtype=object)
+            nulls[col] = null
+        return cls(values, nulls)
+
+    def kind(self, column: str) -> str:
+        return "numeric" if self.values[column].dtype == np.float64 else "text"
+
+    def _order(self, column: str) -> tuple[np.ndarray, np.ndarray]:
+        order = self._orders.get(column)
+        if order is None:
+            null = self.nulls[column]
+            present = np.flatnonzero(~null)
+            present = present[np.argsort(self.values[column][present], kind="stable")]
+            order = self._orders[column] = (present, np.flatnonzero(null))
+        return order
+
+    def permutation(self, column: str, direction: str) -> np.ndarray | None:
+        if column not in self.values:
+            return None
+        present, null = self._order(column)
+        if direction == "desc":
+            present = present[::-1]
+        return np.concatenate((present, null))
+
+
+class RowStore:
+    """Columnar attribute store; row dicts are only built for requested positions."""
+
+    def __init__(self, columns: dict[str, np.ndarray], ids: np.ndarray):
+        self.columns = columns
+        self.ids = ids
+        self._sorted_ids: np.ndarray | None = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RowStore":
+        columns = {col: df[col].to_numpy() for col in df.columns}
+        ids = df["id"].to_numpy(dtype=np.int64) if "id" in df else np.arange(len(df))
+        return cls(columns, ids)
+
+    def ids_with_prefix(self, prefix: str, limit: int) -> list[int]:
+        """Up to `limit` ids whose decimal form starts with `prefix`, shortest
+        first; one binary search per digit count over the sorted ids."""
+        if self._sorted_ids is None:
+            self._sorted_ids = np.sort(self.ids)
+        ids = self._sorted_ids
+        if not prefix:
+            return ids[:limit].tolist()
+        if not prefix.isdigit() or len(ids) == 0:
+            return []
+        if prefix.startswith("0"):
+            return [0] if prefix == "0" and 0 in ids else []
+        matches: list[int] = []
+        start, scale = int(prefix), 1
+        while start * scale <= ids[-1] and len(matches) < limit:
+            lo = np.searchsorted(ids, start * scale)
+            hi = np.searchsorted(ids, (start + 1) * scale)
+            matches.extend(ids[lo : min(hi, lo + limit - len(matches))].tolist())
+            scale *= 10
+        return matches
+
+    def rows(self, positions: np.ndarray) -> list[dict]:
+        data = [
+            (col, values[positions].tolist()) for col, values in self.columns.items()
+        ]
+        return [
+            {"id": int(self.ids[p]), "data": {col: str(v[i]) for col, v in data}}
+            for i, p in enumerate(positions.tolist())
+        ]
+
+
+class TableIndex:
+    """Search and sort indexes of one dataset plus an LRU of query results.
+
+    Results are row-position arrays keyed on (dataset version, filter,
+    predicate, sort column, direction); paging is a slice of the cached array.
+    Predicates are evaluated against `frame`, which keeps the original dtypes.
+    Row dicts are materialized per block of `block_size` rows and share the LRU.
+    """
+
+    def __init__(
+        self,
+        search: SearchIndex,
+        sort: SortIndex,
+        frame: pd.DataFrame,
+        version: int,
+        cache_size: int = 64,
+        block_size: int = 50,
+    ):
+        self.search = search
+        self.sort = sort
+        self.frame = frame
+        self.store = RowStore.from_frame(frame)
+        self.version = version
+        self.n = search.n
+        self.block_size = block_size
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+    def _cached(self, key: tuple, compute) -> np.ndarray:
+        positions = self._cache.get(key)
+        if positions is None:
+            positions = self._cache[key] = compute()
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return positions
+
+    def where(self, predicate: str) -> np.ndarray:
+        """Positions matching a predicate; raises `PredicateError` if invalid."""
+        if not predicate.strip():
+            return np.arange(self.n)
+        return self._cached(
+            (self.version, "", predicate, None, None),
+            lambda: np.flatnonzero(predicates.compile_mask(predicate, self.frame)),
+        )
+
+    def _matches(self, table_filter: str, predicate: str = "") -> np.ndarray:
+        if not predicate.strip():
+            return self._cached(
+                (self.version, table_filter, "", None, None),
+                lambda: self.search.search(table_filter),
+            )
+        if not table_filter:
+            return self.where(predicate)
+        return self._cached(
+            (self.version, table_filter, predicate, None, None),
+            lambda: np.intersect1d(
+                self._matches(table_filter), self.where(predicate), assume_unique=True
+            ),
+        )
+
+    def _sorted(
+        self, table_filter: str, predicate: str, column: str, direction: str
+    ) -> np.ndarray:
+        order = self.sort.permutation(column, direction)
+        if order is None:
+            return self._matches(table_filter, predicate)
+        if not table_filter and not predicate.strip():
+            return order
+        keep = np.zeros(self.n, dtype=bool)
+        keep[self._matches(table_filter, predicate)] = True
+        return order[keep[order]]
+
+    def query(
+        self,
+        table_filter: str,
+        column: str | None,
+        direction: str,
+        predicate: str = "",
+    ) -> np.ndarray:
+        if not column:
+            return self._matches(table_filter, predicate)
+        return self._cached(
+            (self.version, table_filter, predicate, column, direction),
+            lambda: self._sorted(table_filter, predicate, column, direction),
+        )
+
+    def window(
+        self,
+        offset: int,
+        limit: int,
+        table_filter: str = "",
+        column: str | None = None,
+        direction: str = "asc",
+        predicate: str = "",
+    ) -> list[dict]:
+        """Rows `offset:offset + limit` of a query, built from cached blocks."""
+        positions = self.query(table_filter, column, direction, predicate)
+        size = self.block_size
+        first = max(offset, 0) // size
+        last = min(offset + limit, len(positions)) - 1
+        rows = []
+        for block in range(first, last // size + 1 if last >= 0 else first):
+            rows.extend(
+                self._cached(
+                    (
+                        self.version,
+                        "rows",
+                        table_filter,
+                        predicate,
+                        column,
+                        direction,
+                        block,
+                    ),
+                    lambda block=block: self.store.rows(
+                        positions[block * size : (block + 1) * size]
+                    ),
+                )
+            )
+        start = max(offset, 0) - first * size
+        return rows[start : start + limit]
\ No newline at end of file
@@ -0,0 +1,96 @@
+import numpy as np
+
+from app import metrics
+
+EMPTY = 1
+NOT_POLYGON = 2
+INVALID = 4
+DEGENERATE = 8
+DUPLICATE_VERTICES = 16
+ORIENTATION = 32
+DROPPED = 128
+UNUSABLE = EMPTY | NOT_POLYGON | INVALID | DEGENERATE | DUPLICATE_VERTICES
+ISSUES = {
+    EMPTY: "empty",
+    NOT_POLYGON: "not_polygon",
+    INVALID: "invalid",
+    DEGENERATE: "degenerate",
+    DUPLICATE_VERTICES: "duplicate_vertices",
+    ORIENTATION: "orientation",
+    DROPPED: "dropped",
+}
+POLYGONAL = (3, 6)
+
+
+def describe(flags: int) -> str:
+    return ", ".join(name for bit, name in ISSUES.items() if flags & bit)
+
+
+def check(geometry: np.ndarray) -> np.ndarray:
+    """Issue bits per geometry, each check one vectorized pass over the array.
+
+    ORIENTATION means a polygon shell that is not counter-clockwise, as
+    GeoJSON expects; shapefiles store shells clockwise, so it is only fixed,
+    never a reason to drop a feature.
+    """
+    import shapely
+
+    issues = np.zeros(len(geometry), dtype=np.uint8)
+    empty = shapely.is_missing(geometry) | shapely.is_empty(geometry)
+    issues[empty] |= EMPTY
+    present = ~empty
+    type_ids = shapely.get_type_id(geometry)
+    polygonal = present & np.isin(type_ids, POLYGONAL)
+    issues[present & ~polygonal] |= NOT_POLYGON
+    issues[present & ~shapely.is_valid(geometry)] |= INVALID
+    issues[polygonal & (shapely.area(geometry) <= 0)] |= DEGENERATE
+
+    coords, index = shapely.get_coordinates(geometry[present], return_index=True)
+    repeated = (coords[1:] == coords[:-1]).all(axis=1) & (index[1:] == index[:-1])
+    issues[np.flatnonzero(present)[np.unique(index[1:][repeated])]] |= (
+        DUPLICATE_VERTICES
+    )
+
+    parts, index = shapely.get_parts(geometry[polygonal], return_index=True)
+    clockwise = ~shapely.is_ccw(shapely.get_exterior_ring(parts))
+    issues[np.flatnonzero(polygonal)[np.unique(index[clockwise])]] |= ORIENTATION
+    return issues
+
+
+def _polygonal(geometry: np.ndarray) -> np.ndarray:
+    """Polygonal part of each geometry (None if there is none), flattening
+    collections; single polygons stay Polygons."""
+    import shapely
+
+    parts, index = shapely.get_parts(geometry, return_index=True)
+    parts, nested = shapely.get_parts(parts, return_index=True)
+    index = index[nested]
+    keep = shapely.get_type_id(parts) == 3
+    result = np.full(len(geometry), None, dtype=object)
+    shapely.multipolygons(parts[keep], indices=index[keep], out=result)
+    single = shapely.get_num_geometries(result) == 1
+    result[single] = shapely.get_geometry(result[single], 0)
+    return result
+
+
+def repair(geometry: np.ndarray, issues: np.ndarray) -> np.ndarray:
+    """Fix what can be fixed in place of the flagged rows and mark the rest
+    DROPPED. Only flagged rows are touched; the result is re-checked."""
+    import shapely
+
+    with metrics.span("upload.repair"):
+        geometry = geometry.copy()
+        rows = np.flatnonzero(issues & (NOT_POLYGON | INVALID | DUPLICATE_VERTICES))
+        if len(rows):
+            fixed = shapely.remove_repeated_points(geometry[rows])
+            fixed = shapely.make_valid(fixed, method="structure", keep_collapsed=False)
+            geometry[rows] = _polygonal(fixed)
+            metrics.inc("geometries_repaired", len(rows))
+        rows = np.flatnonzero(issues)
+        if len(rows):
+            geometry[rows] = shapely.orient_polygons(geometry[rows])
+            remaining = check(geometry[rows])
+            drop = rows[(remaining & UNUSABLE) != 0]
+            issues[drop] |= DROPPED
+            metrics.inc("geometries_dropped", len(drop))
+    return geometry
\ No newline at end of file
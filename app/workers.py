@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import queue
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("PVGIS_UPLOAD_WORKERS", os.cpu_count() or 1))
+
+_context = multiprocessing.get_context("spawn")
+_executor: ProcessPoolExecutor | None = None
+_manager = None
+_jobs: dict[str, "Job"] = {}
+
+
+class Job:
+    """A unit of work in the process pool with a progress queue and a cancel
+    flag that the worker checks between stages."""
+
+    def __init__(self, manager):
+        self.id = uuid.uuid4().hex
+        self.progress = manager.Queue()
+        self.cancel_event = manager.Event()
+
+    def updates(self) -> list[tuple]:
+        updates = []
+        while True:
+            try:
+                updates.append(self.progress.get_nowait())
+            except queue.Empty:
+                return updates
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor, _manager
+    if _executor is None:
+        _manager = _context.Manager()
+        _executor = ProcessPoolExecutor(MAX_WORKERS, mp_context=_context)
+    return _executor
+
+
+def new_job() -> Job:
+    _pool()
+    job = Job(_manager)
+    _jobs[job.id] = job
+    return job
+
+
+def cancel(job_id: str) -> bool:
+    job = _jobs.get(job_id)
+    if job is None:
+        return False
+    job.cancel()
+    return True
+
+
+def release(job_id: str):
+    _jobs.pop(job_id, None)
+
+
+async def run_many(
+    job: Job, fn, arg_lists: list[tuple], on_progress=None, poll_s: float = 0.25
+) -> list:
+    """Run `fn(*args, progress=queue, cancel_event=event)` for every args tuple
+    in the pool and return the results in order, passing the progress updates
+    that arrived since the last poll to `on_progress` while waiting.
+
+    The first failure cancels the job, so the remaining calls stop at their
+    next stage boundary, and is re-raised.
+    """
+    loop = asyncio.get_running_loop()
+    futures = [
+        loop.run_in_executor(
+            _pool(),
+            functools.partial(
+                fn, *args, progress=job.progress, cancel_event=job.cancel_event
+            ),
+        )
+        for args in arg_lists
+    ]
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=poll_s, return_when=asyncio.FIRST_EXCEPTION
+            )
+            updates = job.updates()
+            if updates and on_progress is not None:
+                await on_progress(updates)
+            for future in done:
+                future.result()
+    except BaseException:
+        job.cancel()
+        for future in pending:
+            future.cancel()
+        raise
+    return [future.result() for future in futures]
+
+
+async def run(job: Job, fn, *args, on_progress=None, poll_s: float = 0.25):
+    (result,) = await run_many(job, fn, [args], on_progress, poll_s)
+    return result
\ No newline at end of file
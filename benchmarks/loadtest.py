@@ -0,0 +1,498 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+import numpy as np
+
+from benchmarks.run import git_commit
+from benchmarks.synthetic import shapefile_zip, synthetic_dataset
+
+NAMESPACE = "/_event"
+VAR_SUFFIX = "_rx_state_"
+TASKS = ("upload.total", "analysis.total")
+
+
+class Recorder:
+    """Latencies and delta sizes per event name across all sessions."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.delta_bytes: dict[str, list[int]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float | None = None, size: int | None = None):
+        if seconds is not None:
+            self.latencies[name].append(seconds)
+        if size is not None:
+            self.delta_bytes[name].append(size)
+
+    def summary(self) -> list[dict]:
+        rows = []
+        for name in sorted(
+            set(self.latencies) | set(self.delta_bytes) | set(self.errors)
+        ):
+            latencies = np.array(self.latencies.get(name, [])) * 1000
+            sizes = np.array(self.delta_bytes.get(name, [])) / 1024
+            row = {"event": name, "count": len(latencies), "errors": self.errors[name]}
+            if len(latencies):
+                p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+                row.update(
+                    p50_ms=round(p50, 1),
+                    p90_ms=round(p90, 1),
+                    p99_ms=round(p99, 1),
+                    max_ms=round(latencies.max(), 1),
+                )
+            if len(sizes):
+                row.update(
+                    delta_kb_mean=round(sizes.mean(), 1),
+                    delta_kb_max=round(sizes.max(), 1),
+                )
+            rows.append(row)
+        return rows
+
+
+class Session:
+    """One simulated browser tab: a websocket with its own client token that
+    sends events like the frontend does, re-emitting the backend events an
+    update chains, and tracks the state vars it has seen."""
+
+    def __init__(self, url: str, recorder: Recorder, timeout_s: float):
+        import socketio
+
+        self.url = url
+        self.recorder = recorder
+        self.timeout_s = timeout_s
+        self.token = str(uuid.uuid4())
+        self.updates: asyncio.Queue = asyncio.Queue()
+        self.values: dict[str, dict] = defaultdict(dict)
+        self.router = {"pathname": "/", "query": {}, "asPath": "/"}
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.sio.on("event", self.updates.put_nowait, namespace=NAMESPACE)
+
+    async def connect(self):
+        await self.sio.connect(
+            f"{self.url}?token={self.token}",
+            socketio_path=NAMESPACE,
+            transports=["websocket"],
+            namespaces=[NAMESPACE],
+        )
+        # The server pushes the router data once the token is linked.
+        self._apply(await asyncio.wait_for(self.updates.get(), self.timeout_s))
+
+    async def close(self):
+        await self.sio.disconnect()
+
+    def _apply(self, update: dict) -> int:
+        for substate, values in update.get("delta", {}).items():
+            for key, value in values.items():
+                self.values[substate][key.removesuffix(VAR_SUFFIX)] = value
+        return len(json.dumps(update.get("delta", {})))
+
+    def value(self, state, var: str):
+        return self.values[state.get_full_name()].get(var)
+
+    async def _chained(self, update: dict):
+        for event in update.get("events", []):
+            # Names starting with "_" are frontend-only (toasts, redirects).
+            if not event["name"].startswith("_"):
+                await self.send(event["name"], event.get("payload", {}))
+
+    async def send(self, name: str, payload: dict | None = None, label: str = ""):
+        """Send one event and wait for its final update; the latency and
+        delta size are recorded under `label` (default: the handler name)."""
+        label = label or name.rpartition(".")[2]
+        start = time.perf_counter()
+        await self.sio.emit(
+            "event",
+            {
+                "token": self.token,
+                "name": name,
+                "router_data": self.router,
+                "payload": payload or {},
+            },
+            namespace=NAMESPACE,
+        )
+        size, chained = 0, []
+        try:
+            while True:
+                update = await asyncio.wait_for(self.updates.get(), self.timeout_s)
+                size += self._apply(update)
+                chained.append(update)
+                if update.get("final"):
+                    break
+        except TimeoutError:
+            self.recorder.errors[label] += 1
+            return
+        self.recorder.record(label, time.perf_counter() - start, size)
+        for update in chained:
+            await self._chained(update)
+
+    async def call(self, state, handler: str, **payload):
+        await self.send(f"{state.get_full_name()}.{handler}", payload)
+
+    async def upload(self, http, state, handler: str, filename: str, data: bytes):
+        """POST a file to the upload endpoint as the upload component does."""
+        start = time.perf_counter()
+        response = await http.post(
+            f"{self.url}/_upload",
+            files={"files": (filename, data, "application/octet-stream")},
+            headers={
+                "reflex-client-token": self.token,
+                "reflex-event-handler": f"{state.get_full_name()}.{handler}",
+            },
+            timeout=self.timeout_s,
+        )
+        response.raise_for_status()
+        updates = [json.loads(line) for line in response.text.splitlines() if line]
+        size = sum(self._apply(update) for update in updates)
+        self.recorder.record(handler, time.perf_counter() - start, size)
+        for update in updates:
+            await self._chained(update)
+
+    def forget(self, state, var: str):
+        """Drop a var's last value, so `wait_for` waits for the next one; a
+        background task's first update comes after its handler's final one."""
+        self.values[state.get_full_name()].pop(var, None)
+
+    async def wait_for(self, state, var: str, predicate, label: str, start: float):
+        """Consume pushed updates until `predicate(var)` holds, recording their
+        sizes as `push`, then the time since `start` under `label`."""
+        deadline = start + self.timeout_s * 10
+        while not predicate(self.value(state, var)):
+            remaining = deadline - time.perf_counter()
+            try:
+                update = await asyncio.wait_for(self.updates.get(), max(remaining, 0))
+            except TimeoutError:
+                self.recorder.errors[label] += 1
+                return False
+            self.recorder.record("push", size=self._apply(update))
+            await self._chained(update)
+        self.recorder.record(label, time.perf_counter() - start)
+        return True
+
+
+def lowest(gdf, count: int) -> str:
+    """Predicate matching about `count` of the lowest buildings; the synthetic
+    data has no id column to select them by."""
+    heights = np.sort(gdf["height"].to_numpy())
+    return f"height <= {heights[min(count, len(heights)) - 1]}"
+
+
+async def scenario(session: Session, http, dataset: tuple[bytes, str], args):
+    """Upload, explore the table, select a building and analyze a few."""
+    import reflex as rx
+
+    from app.components.virtual_table import ROW_HEIGHT
+    from app.state import AnalysisState, AppState, ExploreState
+
+    await session.connect()
+    data, analysis_predicate = dataset
+    try:
+        await session.send(f"{rx.State.get_full_name()}.hydrate")
+        for _ in range(args.iterations):
+            session.forget(AppState, "is_uploading")
+            start = time.perf_counter()
+            await session.upload(http, AppState, "handle_upload", "buildings.zip", data)
+            if not await session.wait_for(
+                AppState, "is_uploading", lambda v: v is False, "upload.total", start
+            ):
+                continue
+            session.router = {"pathname": "/explore", "query": {}, "asPath": "/explore"}
+            for page in range(args.pages):
+                await session.call(
+                    ExploreState, "scroll_table", scroll_top=page * 50 * ROW_HEIGHT
+                )
+            await session.call(ExploreState, "set_table_filter", value=args.filter)
+            await session.call(ExploreState, "sort_table", column_name=args.sort_column)
+            await session.call(ExploreState, "sort_table", column_name=args.sort_column)
+            await session.call(ExploreState, "set_table_filter", value="")
+            await session.call(
+                ExploreState, "apply_predicate", form_data={"predicate": args.predicate}
+            )
+            rows = session.value(ExploreState, "visible_explore_rows") or []
+            if rows:
+                await session.call(
+                    ExploreState, "select_building_from_table", row=rows[0]
+                )
+            await session.call(
+                ExploreState,
+                "apply_predicate",
+                form_data={"predicate": analysis_predicate},
+            )
+            session.router = {
+                "pathname": "/analysis",
+                "query": {},
+                "asPath": "/analysis",
+            }
+            await session.call(AnalysisState, "set_analysis_mode", mode="filtered")
+            session.forget(AnalysisState, "is_analyzing")
+            start = time.perf_counter()
+            await session.call(AnalysisState, "start_analysis")
+            await session.wait_for(
+                AnalysisState,
+                "is_analyzing",
+                lambda v: v is False,
+                "analysis.total",
+                start,
+            )
+            await session.call(ExploreState, "clear_predicate")
+    finally:
+        await session.close()
+
+
+class ServerMonitor:
+    """CPU and RSS of the server process and its children, sampled in a
+    background task."""
+
+    def __init__(self, pid: int, interval_s: float):
+        import psutil
+
+        self.process = psutil.Process(pid)
+        # cpu_percent measures since the previous call on the same handle.
+        self.handles: dict[int, psutil.Process] = {}
+        self.interval_s = interval_s
+        self.cpu: list[float] = []
+        self.rss: list[float] = []
+
+    def _processes(self):
+        import psutil
+
+        try:
+            processes = [self.process, *self.process.children(recursive=True)]
+        except psutil.NoSuchProcess:
+            return []
+        return [self.handles.setdefault(p.pid, p) for p in processes]
+
+    async def run(self):
+        import psutil
+
+        for p in self._processes():
+            p.cpu_percent()
+        while True:
+            await asyncio.sleep(self.interval_s)
+            cpu = rss = 0.0
+            for p in self._processes():
+                try:
+                    cpu += p.cpu_percent()
+                    rss += p.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            self.cpu.append(cpu)
+            self.rss.append(rss / 1024 / 1024)
+
+    def summary(self) -> dict:
+        if not self.cpu:
+            return {}
+        return {
+            "cpu_percent_mean": round(float(np.mean(self.cpu)), 1),
+            "cpu_percent_max": round(max(self.cpu), 1),
+            "rss_mb_max": round(max(self.rss), 1),
+            "rss_mb_last": round(self.rss[-1], 1),
+            "cpu_count": os.cpu_count(),
+        }
+
+
+def start_server(port: int, env: dict) -> subprocess.Popen:
+    """Start the backend of this checkout with the seeded stand-in analyzer."""
+    from reflex import constants
+    from reflex.utils import prerequisites
+
+    # A backend-only run adds the upload endpoint only once a compile has
+    # seen an upload component and left this marker.
+    marker = prerequisites.get_backend_dir() / constants.Dirs.UPLOAD_IS_USED
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+    # Prod mode: the dev reloader restarts the backend on dataset cache writes.
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "reflex",
+            "run",
+            "--env",
+            "prod",
+            "--backend-only",
+            "--backend-port",
+            str(port),
+        ],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop_server(server: subprocess.Popen, grace_s: float = 10):
+    """Stop `reflex run` and the app server it started in its process group,
+    killing whatever is left after `grace_s`."""
+    os.killpg(server.pid, signal.SIGTERM)
+    deadline = time.perf_counter() + grace_s
+    while time.perf_counter() < deadline:
+        server.poll()
+        try:
+            os.killpg(server.pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.5)
+    os.killpg(server.pid, signal.SIGKILL)
+    server.wait()
+
+
+async def wait_ready(http, url: str, timeout_s: float, server=None):
+    import httpx
+
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"The server exited with code {server.returncode}.")
+        with contextlib.suppress(httpx.TransportError):
+            if (await http.get(f"{url}/ping")).status_code == 200:
+                return
+        await asyncio.sleep(1)
+    raise RuntimeError(f"No server answered at {url} within {timeout_s:.0f}s.")
+
+
+async def run(args) -> dict:
+    import httpx
+
+    server = cache_dir = None
+    if args.start:
+        # Fresh caches per run, so no run starts warm from an earlier one and
+        # the checkout's own caches are left alone.
+        cache_dir = tempfile.mkdtemp(prefix="pvgis-loadtest-")
+        server = start_server(
+            args.port,
+            {
+                "PVGIS_ANALYZER": "standin",
+                "PVGIS_ANALYZER_SEED": str(args.seed),
+                "PVGIS_ANALYZER_LATENCY": args.analyzer_latency,
+                "PVGIS_RESULTS_DB": os.path.join(cache_dir, "results_cache.sqlite"),
+                "PVGIS_DATASET_CACHE_DIR": os.path.join(cache_dir, "dataset_cache"),
+            },
+        )
+    recorder = Recorder()
+    datasets = []
+    for i in range(1 if args.shared_dataset else args.sessions):
+        gdf = synthetic_dataset(args.rows, seed=args.seed + i)
+        datasets.append((shapefile_zip(gdf), lowest(gdf, args.analysis_buildings)))
+    try:
+        async with httpx.AsyncClient() as http:
+            await wait_ready(http, args.url, args.startup_timeout_s, server)
+            monitor = None
+            pid = server.pid if server else args.server_pid
+            if pid:
+                monitor = ServerMonitor(pid, args.sample_s)
+                sampler = asyncio.create_task(monitor.run())
+            sessions = []
+            started = time.perf_counter()
+            for i in range(args.sessions):
+                session = Session(args.url, recorder, args.timeout_s)
+                sessions.append(
+                    asyncio.create_task(
+                        scenario(session, http, datasets[i % len(datasets)], args)
+                    )
+                )
+                await asyncio.sleep(args.ramp_s)
+            outcomes = await asyncio.gather(*sessions, return_exceptions=True)
+            elapsed = time.perf_counter() - started
+            if monitor:
+                sampler.cancel()
+    finally:
+        if server:
+            stop_server(server)
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    failures = [repr(o) for o in outcomes if isinstance(o, Exception)]
+    events = sum(len(v) for k, v in recorder.latencies.items() if k not in TASKS)
+    return {
+        "sessions": args.sessions,
+        "failed_sessions": len(failures),
+        "failures": failures[:10],
+        "seconds": round(elapsed, 2),
+        "events_per_s": round(events / elapsed, 1),
+        "events": recorder.summary(),
+        "server": monitor.summary() if monitor else {},
+    }
+
+
+def compare(report: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {r["event"]: r for r in json.load(f)["events"]}
+    print(f"\ncompared with {baseline_path} (p99 latency, mean delta size):")
+    for row in report["events"]:
+        before = baseline.get(row["event"])
+        if before and before.get("p99_ms") and row.get("p99_ms"):
+            line = f"  {row['event']:<28} {row['p99_ms'] / before['p99_ms']:>6.2f}x"
+            if before.get("delta_kb_mean") and row.get("delta_kb_mean"):
+                line += f" {row['delta_kb_mean'] / before['delta_kb_mean']:>6.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--start",
+        action="store_true",
+        help="start this checkout's backend on --port with empty temporary caches",
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--server-pid", type=int, help="sample CPU/RSS of a running server"
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--ramp-s", type=float, default=0.2)
+    parser.add_argument("--iterations", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument(
+        "--shared-dataset",
+        action="store_true",
+        help="every session uploads the same file (dataset cache hits)",
+    )
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--filter", default="resid")
+    parser.add_argument("--sort-column", default="height")
+    parser.add_argument("--predicate", default="height > 10 AND use IN ('residential')")
+    parser.add_argument("--analysis-buildings", type=int, default=20)
+    parser.add_argument("--analyzer-latency", default="lognormal:0.2,0.6")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout-s", type=float, default=60)
+    parser.add_argument("--startup-timeout-s", type=float, default=120)
+    parser.add_argument("--sample-s", type=float, default=0.5)
+    parser.add_argument("--output", default="bench_loadtest.json")
+    parser.add_argument("--compare", help="previous load test JSON to diff against")
+    args = parser.parse_args()
+    if args.start:
+        args.url = f"http://localhost:{args.port}"
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": vars(args),
+        **asyncio.run(run(args)),
+    }
+    for row in report["events"]:
+        print(
+            f"  {row['event']:<28} n={row['count']:<6} p50={row.get('p50_ms', '-'):>8} "
+            f"p99={row.get('p99_ms', '-'):>8} ms  delta={row.get('delta_kb_mean', '-')} KB"
+        )
+    print(f"  server: {report['server']}")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
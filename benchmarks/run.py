@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from app import dataset_cache, ingest, pvgis_analyzer, results_cache, workers
+from app.pvgis_analyzer import ResultSet, analyze_cached
+from app.table import TableIndex
+from benchmarks.synthetic import shapefile_zip, synthetic_dataset, tiled_zip
+
+
+def timed(fn, repeat: int = 1):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_size(size: int, args) -> list[dict]:
+    results = []
+
+    def record(name: str, seconds: float, items: int):
+        results.append(
+            {
+                "name": name,
+                "size": size,
+                "seconds": round(seconds, 6),
+                "items_per_s": round(items / seconds, 1) if seconds else None,
+            }
+        )
+        print(f"  {name:<28} {seconds * 1000:>10.1f} ms")
+
+    print(f"size={size}")
+    gdf = synthetic_dataset(size, args.vertices, args.width, args.seed)
+    data = shapefile_zip(gdf)
+    filename = "buildings.zip"
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    upload_start = time.perf_counter()
+    (layer,) = ingest.list_layers(filename, path)
+    seconds, raw = timed(lambda: ingest.read_layer(path, layer))
+    record("upload.read_layer", seconds, size)
+    os.remove(path)
+    seconds, (raw, _, _) = timed(lambda: ingest.validate(raw))
+    record("upload.validate", seconds, size)
+    seconds, (gdf_4326, metric) = timed(lambda: ingest.reproject(raw))
+    record("upload.reproject", seconds, size)
+    raw_4326 = raw.to_crs(epsg=4326)
+    seconds, _ = timed(lambda: ingest.reproject(raw_4326))
+    record("upload.reproject.wgs84", seconds, size)
+    frame = ingest.attributes(gdf_4326)
+    seconds, search_index = timed(lambda: ingest.build_search_index(frame))
+    record("upload.search_index", seconds, size)
+    seconds, sort_index = timed(lambda: ingest.build_sort_index(frame))
+    record("upload.sort_index", seconds, size)
+    seconds, centroids = timed(lambda: ingest.centroids(metric))
+    record("upload.centroids", seconds, size)
+    record("handle_upload", time.perf_counter() - upload_start, size)
+
+    artifacts = ingest.prepare(gdf_4326, metric, filename)
+    if args.parts > 1:
+        bench_parts(gdf, size, args.parts, record)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dataset_cache.CACHE_DIR = cache_dir
+        digest = hashlib.sha256(data).hexdigest()
+        seconds, _ = timed(lambda: dataset_cache.store(digest, artifacts))
+        record("dataset_cache.store", seconds, size)
+        seconds, _ = timed(lambda: dataset_cache.load(digest), args.repeat)
+        record("dataset_cache.load", seconds, size)
+
+    positions = np.arange(min(size, args.map_features))
+    seconds, _ = timed(
+        lambda: ingest.build_map_features(artifacts["geometry"], positions), args.repeat
+    )
+    record("map_features", seconds, len(positions))
+    table_index = TableIndex(search_index, sort_index, frame, version=1)
+    seconds, _ = timed(lambda: table_index.query(args.filter, None, "asc"))
+    record("filtered_rows", seconds, size)
+    seconds, _ = timed(lambda: table_index.query(args.filter, args.sort_column, "asc"))
+    record("sorted_and_filtered_rows", seconds, size)
+    seconds, _ = timed(lambda: table_index.query(args.filter, args.sort_column, "desc"))
+    record("sort_table.toggle", seconds, size)
+    offset = len(table_index.query(args.filter, args.sort_column, "desc")) // 2
+    seconds, _ = timed(
+        lambda: table_index.window(offset, 150, args.filter, args.sort_column, "desc")
+    )
+    record("scroll_table", seconds, 150)
+    seconds, _ = timed(
+        lambda: table_index.window(offset, 150, args.filter, args.sort_column, "desc"),
+        args.repeat,
+    )
+    record("scroll_table.cached", seconds, 150)
+    seconds, _ = timed(lambda: table_index.where(args.predicate))
+    record("predicate", seconds, size)
+
+    ids = table_index.store.ids[: args.analysis_buildings].tolist()
+    analysed = ResultSet(5.0, 14.0)
+
+    async def run_analysis():
+        # The per-building path of AnalysisState.start_analysis.
+        for building_id in ids:
+            lat, lon = centroids[building_id].tolist()
+            base, _ = await analyze_cached(lat, lon, 35.0, 180.0)
+            analysed.add(building_id, base)
+        return base
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        results_cache.DB_PATH = os.path.join(cache_dir, "results.sqlite")
+        seconds, base = timed(lambda: asyncio.run(run_analysis()))
+        record("start_analysis", seconds, len(ids))
+        results_cache.flush()
+        seconds, _ = timed(lambda: asyncio.run(run_analysis()), args.repeat)
+        record("start_analysis.cached", seconds, len(ids))
+        results_cache.close()
+    for building_id in table_index.store.ids.tolist():
+        analysed.add(building_id, base)
+    seconds, _ = timed(lambda: analysed.derive(6.0, 12.0), args.repeat)
+    record("analysis.rederive", seconds, len(analysed))
+    return results
+
+
+def bench_parts(gdf, size: int, parts: int, record):
+    """Ingest the dataset split into `parts` layers serially, then in the pool."""
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    with os.fdopen(fd, "wb") as f:
+        f.write(tiled_zip(gdf, parts))
+    layers = ingest.list_layers("tiles.zip", path)
+    arg_lists = [(i, "tiles.zip", path, layer) for i, layer in enumerate(layers)]
+
+    def serial():
+        return [ingest.process_part(*args)[0] for args in arg_lists]
+
+    def parallel():
+        job = workers.new_job()
+        try:
+            results = asyncio.run(workers.run_many(job, ingest.process_part, arg_lists))
+        finally:
+            workers.release(job.id)
+        return [part for part, _ in results]
+
+    parallel()
+    seconds, _ = timed(lambda: ingest.merge_parts(serial(), "tiles.zip"))
+    record(f"upload.parts_{parts}.serial", seconds, size)
+    seconds, _ = timed(lambda: ingest.merge_parts(parallel(), "tiles.zip"))
+    record(f"upload.parts_{parts}.parallel", seconds, size)
+    os.remove(path)
+
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {
+            (r["name"], r["size"]): r["seconds"] for r in json.load(f)["results"]
+        }
+    print(f"\ncompared with {baseline_path}:")
+    for r in results:
+        before = baseline.get((r["name"], r["size"]))
+        if before:
+            print(f"  {r['name']:<28} {r['size']:>8} {r['seconds'] / before:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest and exploration benchmarks.")
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--vertices", type=int, default=5)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--filter", default="resid")
+    parser.add_argument("--sort-column", default="height")
+    parser.add_argument("--predicate", default="height > 10 AND use IN ('residential')")
+    parser.add_argument(
+        "--parts", type=int, default=4, help="layers for the parallel ingest run"
+    )
+    parser.add_argument("--analysis-buildings", type=int, default=20)
+    parser.add_argument(
+        "--map-features", type=int, default=2000, help="footprints in the map view"
+    )
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        results.extend(bench_size(size, args))
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": vars(args),
+        "analyzer": {
+            "backend": pvgis_analyzer.BACKEND,
+            "seed": pvgis_analyzer.SEED,
+            "latency": pvgis_analyzer.LATENCY,
+            "spikes": pvgis_analyzer.SPIKES,
+            "error_rate": pvgis_analyzer.ERROR_RATE,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
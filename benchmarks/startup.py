@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.run import git_commit
+
+HEAVY_MODULES = (
+    "geopandas",
+    "shapely",
+    "pyproj",
+    "pyogrio",
+    "fiona",
+    "reflex_enterprise.components.map.base",
+    "app.pages.explore",
+)
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """Import `module` in a fresh interpreter and report time, RSS and which
+    heavy modules came along with it."""
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=False,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"error": (proc.stderr or proc.stdout).strip().splitlines()[-1:]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import benchmark.")
+    parser.add_argument("--modules", default="app.state,app.app")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--budget-s", type=float, help="fail if a module takes longer to import"
+    )
+    parser.add_argument("--output", default="bench_startup.json")
+    args = parser.parse_args()
+
+    results, failed = [], False
+    for module in args.modules.split(","):
+        runs = [probe(module) for _ in range(args.repeat)]
+        errors = [r["error"] for r in runs if "error" in r]
+        if errors:
+            print(f"  {module:<16} failed: {errors[0]}")
+            results.append({"name": f"import.{module}", "error": errors[0]})
+            failed = True
+            continue
+        best = min(runs, key=lambda r: r["seconds"])
+        results.append(
+            {
+                "name": f"import.{module}",
+                "seconds": round(best["seconds"], 4),
+                "max_rss_mb": round(best["max_rss_mb"], 1),
+                "loaded": best["loaded"],
+            }
+        )
+        print(
+            f"  {module:<16} {best['seconds'] * 1000:>8.0f} ms"
+            f" {best['max_rss_mb']:>7.1f} MB  eager: {', '.join(best['loaded']) or '-'}"
+        )
+        if best["loaded"] or (args.budget_s and best["seconds"] > args.budget_s):
+            failed = True
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nwrote {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import argparse
+import io
+import os
+import tempfile
+import zipfile
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+USES = ["residential", "commercial", "industrial", "mixed", "public", "agricultural"]
+
+
+def building_footprints(
+    count: int, vertices: int = 5, seed: int = 0, epsg: int = 32632
+) -> gpd.GeoSeries:
+    """Rotated, jittered footprints on a city-like grid in a metric CRS."""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(count)))
+    cell = 25.0
+    origin_x, origin_y = 500_000.0, 5_000_000.0
+    idx = np.arange(count)
+    cx = origin_x + (idx % side) * cell + rng.uniform(-3, 3, count)
+    cy = origin_y + (idx // side) * cell + rng.uniform(-3, 3, count)
+    n = max(3, vertices - 1)
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    angles = angles[None, :] + rng.uniform(0, np.pi, count)[:, None]
+    radius = rng.uniform(4, 10, (count, 1)) * rng.uniform(0.85, 1.15, (count, n))
+    xs = cx[:, None] + radius * np.cos(angles)
+    ys = cy[:, None] + radius * np.sin(angles)
+    ring = np.stack([xs, ys], axis=-1)
+    ring = np.concatenate([ring, ring[:, :1]], axis=1)
+    return gpd.GeoSeries(shapely.polygons(ring), crs=f"EPSG:{epsg}")
+
+
+def attributes(count: int, width: int = 8, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed + 1)
+    columns = {
+        "height": rng.gamma(2.0, 5.0, count).round(1),
+        "floors": rng.integers(1, 12, count),
+        "use": rng.choice(USES, count),
+        "year": rng.integers(1850, 2024, count),
+    }
+    for i in range(len(columns), width):
+        kind = i % 3
+        if kind == 0:
+            columns[f"num_{i}"] = rng.normal(100, 25, count).round(3)
+        elif kind == 1:
+            columns[f"int_{i}"] = rng.integers(0, 10_000, count)
+        else:
+            columns[f"txt_{i}"] = np.char.add(
+                "tag", rng.integers(0, 500, count).astype(str)
+            )
+    return dict(list(columns.items())[:width])
+
+
+def synthetic_dataset(
+    count: int, vertices: int = 5, width: int = 8, seed: int = 0, epsg: int = 32632
+) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        attributes(count, width, seed),
+        geometry=building_footprints(count, vertices, seed, epsg),
+    )
+
+
+def shapefile_zip(gdf: gpd.GeoDataFrame, name: str = "buildings") -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        gdf.to_file(os.path.join(tmp, f"{name}.shp"), driver="ESRI Shapefile")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for part in sorted(os.listdir(tmp)):
+                zf.write(os.path.join(tmp, part), part)
+    return buffer.getvalue()
+
+
+def tiled_zip(gdf: gpd.GeoDataFrame, tiles: int) -> bytes:
+    """One ZIP holding the rows split into `tiles` shapefile layers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, rows in enumerate(np.array_split(np.arange(len(gdf)), tiles)):
+            gdf.iloc[rows].to_file(
+                os.path.join(tmp, f"tile_{i}.shp"), driver="ESRI Shapefile"
+            )
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for part in sorted(os.listdir(tmp)):
+                zf.write(os.path.join(tmp, part), part)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write zipped synthetic building-footprint shapefiles."
+    )
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--vertices", type=int, default=5)
+    parser.add_argument("--width", type=int, default=8, help="attribute columns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--epsg", type=int, default=32632)
+    parser.add_argument("--out-dir", default="benchmarks/data")
+    args = parser.parse_args()
+    os.makedirs(args.out_dir, exist_ok=True)
+    for size in (int(s) for s in args.sizes.split(",")):
+        gdf = synthetic_dataset(size, args.vertices, args.width, args.seed, args.epsg)
+        path = os.path.join(args.out_dir, f"buildings_{size}.zip")
+        with open(path, "wb") as f:
+            f.write(shapefile_zip(gdf, f"buildings_{size}"))
+        print(f"{path}: {size} features, {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
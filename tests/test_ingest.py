@@ -0,0 +1,53 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from app import ingest
+
+
+def layer(columns: dict, lon: float) -> gpd.GeoDataFrame:
+    rows = len(next(iter(columns.values())))
+    footprints = [
+        shapely.box(lon + i * 0.01, 52.0, lon + i * 0.01 + 0.001, 52.001)
+        for i in range(rows)
+    ]
+    return gpd.GeoDataFrame(columns, geometry=footprints, crs="EPSG:4326")
+
+
+def part(gdf: gpd.GeoDataFrame, name: str) -> dict:
+    return ingest.part(*ingest.reproject(gdf), name)
+
+
+def test_merge_parts_with_different_schemas():
+    roofs = layer({"height": [10.0, 12.5], "floors": [3, 4]}, 5.0)
+    shops = layer({"height": ["tall", None, "8"], "use": ["shop", "home", None]}, 6.0)
+    parts = [part(roofs, "a.gpkg:roofs"), part(shops, "b.zip")]
+    assert parts[1]["attributes"]["id"].tolist() == [0, 1, 2]
+
+    merged = ingest.merge_parts(parts, "a.gpkg, b.zip")
+    frame = merged["attributes"]
+
+    # Ids are global row positions across parts.
+    assert frame["id"].tolist() == [0, 1, 2, 3, 4]
+    assert len(merged["geometry"]) == len(merged["centroids"]) == 5
+    assert merged["summary"]["layers"] == ["a.gpkg:roofs", "b.zip"]
+    assert frame["source_layer"].tolist() == ["a.gpkg:roofs"] * 2 + ["b.zip"] * 3
+    # Numeric in one part and text in the other: text everywhere, nulls kept.
+    assert not pd.api.types.is_numeric_dtype(frame["height"])
+    assert frame["height"].tolist()[:3] == ["10.0", "12.5", "tall"]
+    assert frame["height"].isna().tolist() == [False, False, False, True, False]
+    # Columns missing from a part are null there.
+    assert frame["floors"].tolist()[:2] == [3, 4]
+    assert frame["floors"].isna().tolist() == [False, False, True, True, True]
+    assert frame["use"].isna().tolist() == [True, True, False, False, True]
+    # Map features carry the global ids.
+    features = ingest.build_map_features(merged["geometry"], np.array([1, 3]))
+    assert [f["id"] for f in features] == [1, 3]
+    assert features[1]["positions"][0]["lng"] > 6.0
+
+
+def test_single_part_has_no_source_layer():
+    merged = ingest.merge_parts([part(layer({"height": [1.0]}, 5.0), "a.zip")], "a.zip")
+    assert "source_layer" not in merged["attributes"]
+    assert merged["summary"]["layers"] == ["a.zip"]
\ No newline at end of file
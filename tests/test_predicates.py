@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.predicates import PredicateError, compile_mask, parse
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "height": [5.0, 12.0, np.nan, 30.0, 8.0],
+            "use": ["residential", "retail", "residential", None, "mixed"],
+            "code": ["10", "20", "30", "40", None],
+            "roof type": ["flat", "gabled", "flat", "flat", "hip"],
+        }
+    )
+
+
+def rows(text: str) -> list[int]:
+    return np.flatnonzero(compile_mask(text, frame())).tolist()
+
+
+def test_parse_precedence():
+    assert parse("NOT a = 1 AND b = 2 OR c = 3") == (
+        "or",
+        ("and", ("not", ("cmp", "a", "=", 1.0)), ("cmp", "b", "=", 2.0)),
+        ("cmp", "c", "=", 3.0),
+    )
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("height > 10", [1, 3]),
+        ("height <= 8", [0, 4]),
+        ("use = 'residential'", [0, 2]),
+        ("use IN ('retail', 'mixed')", [1, 4]),
+        ("height BETWEEN 5 AND 12", [0, 1, 4]),
+        ("use IS NULL", [3]),
+        ("height IS NOT NULL", [0, 1, 3, 4]),
+        ("\"roof type\" = 'flat'", [0, 2, 3]),
+        ("`roof type` != 'flat'", [1, 4]),
+        # Text column whose values are numbers, against a numeric literal.
+        ("code >= 20", [1, 2, 3]),
+    ],
+)
+def test_tests(text, expected):
+    assert rows(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        # A negated test is unknown, so false, for nulls as in SQL.
+        ("NOT height > 10", [0, 4]),
+        ("height NOT BETWEEN 5 AND 12", [3]),
+        ("use NOT IN ('residential')", [1, 4]),
+        ("NOT use IS NULL", [0, 1, 2, 4]),
+        ("NOT (height > 10 OR use = 'mixed')", [0]),
+    ],
+)
+def test_negation(text, expected):
+    assert rows(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("height > 6 AND use = 'residential'", []),
+        ("height > 6 AND use IN ('retail', 'mixed')", [1, 4]),
+        ("height < 6 OR use = 'mixed'", [0, 4]),
+        ("(height < 6 OR height > 20) AND `roof type` = 'flat'", [0, 3]),
+        ("height < 6 OR height > 20 AND use IS NULL", [0, 3]),
+        ("use = 'residential' AND NOT height IS NULL", [0]),
+    ],
+)
+def test_compound(text, expected):
+    assert rows(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "height >",
+        "height > 10 AND",
+        "(height > 10",
+        "height 10",
+        "height > 10 extra",
+        "missing = 1",
+        "height = 'tall'",
+        "use ~ 'x'",
+    ],
+)
+def test_invalid(text):
+    with pytest.raises(PredicateError):
+        compile_mask(text, frame())
\ No newline at end of file
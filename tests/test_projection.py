@@ -0,0 +1,39 @@
+import geopandas as gpd
+import pytest
+import shapely
+from pyproj import CRS
+
+from app import ingest, projection
+
+# A 100 m x 100 m square at 52°N, drawn in its own UTM zone.
+UTM = "EPSG:32631"
+SQUARE = shapely.box(500000, 5761000, 500100, 5761100)
+
+
+def squares(crs: str) -> gpd.GeoDataFrame:
+    frame = gpd.GeoDataFrame({"name": ["a"]}, geometry=[SQUARE], crs=UTM)
+    return frame.to_crs(crs)
+
+
+@pytest.mark.parametrize("crs", ["EPSG:3857", "EPSG:3395", "EPSG:4326", UTM])
+def test_area_is_true_in_any_crs(crs):
+    _, metric = ingest.reproject(squares(crs))
+    assert ingest.areas(metric)[0] == pytest.approx(10_000, rel=1e-3)
+
+
+def test_web_mercator_is_reprojected_to_utm():
+    _, metric = ingest.reproject(squares("EPSG:3857"))
+    assert metric.crs.to_string() == UTM
+
+
+def test_local_metric_crs_is_kept():
+    frame = squares(UTM)
+    _, metric = ingest.reproject(frame)
+    assert metric.crs.to_string() == UTM
+    assert metric.iloc[0].equals(frame.geometry.iloc[0])
+
+
+def test_is_local_metric():
+    assert projection.is_local_metric(CRS(UTM), 3.0, 52.0)
+    assert not projection.is_local_metric(CRS("EPSG:3857"), 3.0, 52.0)
+    assert not projection.is_local_metric(CRS("EPSG:4326"), 3.0, 52.0)
\ No newline at end of file
@@ -0,0 +1,48 @@
+import numpy as np
+
+from app.scheduler import AnalysisQueue, morton_order
+
+
+def grid(size: int) -> np.ndarray:
+    """(lat, lon) of a size x size grid, row by row."""
+    lat, lon = np.divmod(np.arange(size * size), size)
+    return np.column_stack([lat, lon]).astype(float)
+
+
+def test_morton_order_of_a_square():
+    # Z-curve: (0, 0), (0, 1), (1, 0), (1, 1).
+    assert morton_order(grid(2)).tolist() == [0, 1, 2, 3]
+
+
+def test_morton_order_visits_quadrants_in_turn():
+    points = grid(4)
+    ranks = morton_order(points)
+    assert sorted(ranks.tolist()) == list(range(16))
+    # Each run of four ranks covers one 2x2 quadrant.
+    by_rank = points[np.argsort(ranks)] // 2
+    for start in range(0, 16, 4):
+        assert len({tuple(q) for q in by_rank[start : start + 4].tolist()}) == 1
+    assert by_rank[::4].tolist() == [[0, 0], [0, 1], [1, 0], [1, 1]]
+
+
+def test_morton_order_ranks_missing_points_last():
+    points = np.array([[52.1, 5.1], [np.nan, np.nan], [52.0, 5.0], [52.2, np.nan]])
+    ranks = morton_order(points)
+    assert ranks[[2, 0]].tolist() == [0, 1]
+    assert ranks[[1, 3]].tolist() == [4, 4]
+
+
+def test_morton_order_of_identical_points():
+    assert morton_order(np.array([[52.0, 5.0], [52.0, 5.0]])).tolist() == [0, 1]
+    assert morton_order(np.full((2, 2), np.nan)).tolist() == [2, 2]
+
+
+def test_queue_pops_in_spatial_order_and_prioritizes():
+    ranks = morton_order(grid(2))
+    queue = AnalysisQueue([3, 1, 0, 2], ranks)
+    queue.prioritize(selected=3, visible=[2, 3, 9])
+    assert [queue.pop(), queue.pop()] == [3, 2]
+    # New priorities replace the old ones; popped buildings are ignored.
+    queue.prioritize(selected=None, visible=[1, 2])
+    assert len(queue) == 2
+    assert [queue.pop(), queue.pop(), queue.pop()] == [1, 0, None]
\ No newline at end of file
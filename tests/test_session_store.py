@@ -0,0 +1,94 @@
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from app import session_store
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    monkeypatch.setattr(session_store, "_entries", OrderedDict())
+    monkeypatch.setattr(session_store, "_bytes", 0)
+    monkeypatch.setattr(session_store, "MAX_BYTES", 300)
+    monkeypatch.setattr(session_store, "TTL_S", 3600)
+    monkeypatch.setattr(session_store, "SPILL_DIR", "")
+
+
+def test_put_and_get():
+    value = np.arange(10)
+    session_store.put("a", value)
+    assert session_store.get("a") is value
+    assert session_store.get("missing", "default") == "default"
+    assert session_store.stats()["bytes"] == value.nbytes
+
+
+def test_evicts_least_recently_used():
+    for key in "abc":
+        session_store.put(key, key, size=100)
+    session_store.get("a")
+    session_store.put("d", "d", size=100)
+    assert session_store.get("b") is None
+    assert [session_store.get(key) for key in "acd"] == ["a", "c", "d"]
+    assert session_store.stats()["bytes"] == 300
+
+
+def test_keeps_an_entry_larger_than_the_budget():
+    session_store.put("a", "a", size=100)
+    session_store.put("big", "big", size=1000)
+    assert session_store.get("a") is None
+    assert session_store.get("big") == "big"
+
+
+def test_replacing_an_entry_updates_its_size():
+    session_store.put("a", "a", size=200)
+    session_store.put("a", "a2", size=50)
+    assert session_store.stats()["bytes"] == 50
+    assert session_store.get("a") == "a2"
+
+
+def test_expires_idle_entries(monkeypatch):
+    monkeypatch.setattr(session_store, "TTL_S", 0.05)
+    session_store.put("a", "a", size=10)
+    session_store.put("b", "b", size=10)
+    time.sleep(0.1)
+    session_store.get("b")
+    assert session_store.stats()["entries"] == 1
+    assert session_store.get("a") is None
+    assert session_store.get("b") == "b"
+
+
+def test_spills_evicted_entries_and_reloads_them(monkeypatch, tmp_path):
+    monkeypatch.setattr(session_store, "SPILL_DIR", str(tmp_path))
+    session_store.put("spilled", {"rows": [1, 2, 3]}, size=200)
+    session_store.put("dropped", "dropped", size=100, spill=False)
+    session_store.put("new", "new", size=300)
+    assert len(os.listdir(tmp_path)) == 1
+    assert session_store.get("dropped") is None
+    assert session_store.get("spilled") == {"rows": [1, 2, 3]}
+    # Reloading moves it back into memory, which spills the newest entry.
+    assert not os.path.exists(session_store._spill_path("spilled"))
+    assert os.path.exists(session_store._spill_path("new"))
+    assert list(session_store._entries) == ["spilled"]
+
+
+def test_expired_spill_files_are_discarded(monkeypatch, tmp_path):
+    monkeypatch.setattr(session_store, "SPILL_DIR", str(tmp_path))
+    session_store.put("a", "a", size=200)
+    session_store.put("b", "b", size=200)
+    (path,) = tmp_path.iterdir()
+    os.utime(path, (0, 0))
+    assert session_store.get("a") is None
+    assert not path.exists()
+
+
+def test_drop_removes_spilled_copy(monkeypatch, tmp_path):
+    monkeypatch.setattr(session_store, "SPILL_DIR", str(tmp_path))
+    session_store.put("a", "a", size=200)
+    session_store.put("b", "b", size=200)
+    session_store.drop("a")
+    session_store.drop("b")
+    assert os.listdir(tmp_path) == []
+    assert session_store.stats()["entries"] == 0
\ No newline at end of file
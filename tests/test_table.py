@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from app.ingest import build_table_index
+from app.table import SearchIndex, SortIndex
+
+
+def frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "use": ["Residential", None, "retail", "Residential", np.nan],
+            "height": [12.5, np.nan, 3.0, 120.0, 7.0],
+        }
+    )
+
+
+def test_substring_search():
+    index = SearchIndex.from_frame(frame())
+    assert index.search("resid").tolist() == [0, 3]
+    assert index.search("re").tolist() == [0, 2, 3]
+    assert index.search("12").tolist() == [0, 3]
+    assert index.search("xyz").tolist() == []
+    assert index.search("").tolist() == [0, 1, 2, 3, 4]
+
+
+def test_prefix_search():
+    index = SearchIndex.from_frame(frame())
+    assert index.search("re", prefix=True).tolist() == [0, 2, 3]
+    assert index.search("12", prefix=True).tolist() == [0, 3]
+
+
+def test_nulls_are_not_indexed():
+    index = SearchIndex.from_frame(frame())
+    assert "nan" not in index.vocab.tolist()
+    assert "none" not in index.vocab.tolist()
+    assert index.search("nan").tolist() == []
+    assert index.indptr[-1] == len(index.rows) == 7
+
+
+def sortable() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "height": [7.0, np.nan, 3.0, 12.0, np.nan, 3.0],
+            "code": ["10", "9", None, "100", "9", "20"],
+            "use": ["shop", None, "home", "office", "home", None],
+        }
+    )
+
+
+def values(column: str, positions: np.ndarray) -> list:
+    return sortable()[column].iloc[positions].tolist()
+
+
+def test_numeric_sort_puts_nulls_last():
+    index = SortIndex.from_frame(sortable())
+    assert index.kind("height") == "numeric"
+    assert index.permutation("height", "asc").tolist() == [2, 5, 0, 3, 1, 4]
+    assert index.permutation("height", "desc").tolist() == [3, 0, 5, 2, 1, 4]
+
+
+def test_numeric_text_sorts_as_numbers():
+    index = SortIndex.from_frame(sortable())
+    assert index.kind("code") == "numeric"
+    asc = values("code", index.permutation("code", "asc"))
+    desc = values("code", index.permutation("code", "desc"))
+    assert asc[:5] == ["9", "9", "10", "20", "100"]
+    assert desc[:5] == ["100", "20", "10", "9", "9"]
+    assert pd.isna(asc[5]) and pd.isna(desc[5])
+
+
+def test_text_sort_puts_nulls_last():
+    index = SortIndex.from_frame(sortable())
+    assert index.kind("use") == "text"
+    asc = values("use", index.permutation("use", "asc"))
+    desc = values("use", index.permutation("use", "desc"))
+    assert asc[:4] == ["home", "home", "office", "shop"]
+    assert desc[:4] == ["shop", "office", "home", "home"]
+    assert pd.isna(asc[4:]).all() and pd.isna(desc[4:]).all()
+
+
+def test_query_filters_then_sorts_with_nulls_last():
+    table = build_table_index(sortable(), version=1)
+    positions = table.query("o", "height", "desc")
+    assert positions.tolist() == [3, 0, 2, 4]
+    assert table.query("o", "height", "desc") is positions
+    with_use = table.query("", "height", "asc", "use IS NOT NULL")
+    assert with_use.tolist() == [2, 0, 3, 4]
+    rows = table.window(0, 10, "o", "height", "desc")
+    assert [row["id"] for row in rows] == [3, 0, 2, 4]
+    assert rows[-1]["data"]["height"] == "nan"
\ No newline at end of file